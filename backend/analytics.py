@@ -0,0 +1,354 @@
+import re
+import time
+import threading
+import importlib.util
+
+import metrics
+
+# 没装 numpy 分析接口回 503，其它接口不受影响；numpy 在 Columns 里第一次建列时才 import
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+np = None
+
+# === 跨联赛数据分析 (列式) ===
+# player_stats 是逐赛季的行，原来只能在 /api/player 里一个人一个人地看。要做"五大联赛每次首发进球数排行"、
+# "年龄-能力值分布"这类查询，每次现写 GROUP BY 打 MySQL 太重。现在:
+#   player_profiles (+ 所在球队/联赛) 和 player_stats 读进内存，建成 numpy 列 (数值列 float64，类别列编码成整数)
+#   爬虫提交球员/球队后只标脏，下次查询时后台只重读变了的球员，再整体重建列 (五大联赛十几万行不到一秒)，查询期间一直用旧的
+#   排行/分布/分组都是 bincount / argpartition / lexsort 之类的向量运算，几毫秒出结果
+# 接口: GET /api/analytics/leaderboard | distribution | groups | meta，参数见各方法
+
+REFRESH_INTERVAL = 30  # 秒，两次刷新之间至少隔这么久
+MAX_LIMIT = 200
+
+PROFILES_SQL = """
+    SELECT pp.person_id, pp.name_cn, pp.club, pp.nationality, pp.age, pp.ability_total, pp.speed, pp.shooting,
+           pp.passing, pp.dribbling, pp.defense, pp.power, p.position, p.team_id, t.league_id
+    FROM player_profiles pp
+             LEFT JOIN players p ON p.person_id = pp.person_id
+             LEFT JOIN teams t ON t.team_id = p.team_id
+"""
+STATS_SQL = "SELECT person_id, season, matches, starts, goals, assists, yellow, red FROM player_stats"
+
+STAT_FIELDS = ("matches", "starts", "goals", "assists", "yellow", "red")
+PROFILE_FIELDS = ("age", "ability_total", "speed", "shooting", "passing", "dribbling", "defense", "power")
+GROUP_FIELDS = {"league": "league_id", "club": "club", "nationality": "nationality", "position": "position"}
+
+# 指标: (分子列, 分母列)；分母为 None 就是直接求和
+METRICS = {
+    "goals": (("goals",), None),
+    "assists": (("assists",), None),
+    "contributions": (("goals", "assists"), None),
+    "matches": (("matches",), None),
+    "starts": (("starts",), None),
+    "yellow": (("yellow",), None),
+    "red": (("red",), None),
+    "goals_per_match": (("goals",), "matches"),
+    "goals_per_start": (("goals",), "starts"),
+    "assists_per_match": (("assists",), "matches"),
+    "contributions_per_match": (("goals", "assists"), "matches"),
+    "cards_per_match": (("yellow", "red"), "matches"),
+}
+
+INT_RE = re.compile(r"\d+")
+
+
+def _float(v):
+    # 年龄存的是 "25岁" 这种字符串
+    if v is None or v == "": return float("nan")
+    if isinstance(v, (int, float)): return float(v)
+    m = INT_RE.search(str(v))
+    return float(m.group()) if m else float("nan")
+
+
+def _round(v):
+    v = float(v)
+    return None if v != v else round(v, 3)
+
+
+def _choice(args, name, options, default):
+    v = args.get(name) or default
+    if v not in options: raise ValueError(f"{name} 只能是: {', '.join(options)}")
+    return v
+
+
+def _int(args, name, default, lo=0, hi=None):
+    try:
+        v = int(args.get(name, default))
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} 必须是整数")
+    return max(lo, v if hi is None else min(v, hi))
+
+
+class Columns:
+    """某一时刻的一份列式快照，建好之后只读"""
+
+    def __init__(self, profiles, stats):
+        global np
+        if np is None: import numpy as np
+        self.ids = sorted(profiles)
+        n = len(self.ids)
+        self.index = {pid: i for i, pid in enumerate(self.ids)}
+        rows = [profiles[pid] for pid in self.ids]
+        self.names = [r['name_cn'] for r in rows]
+        self.num = {f: np.array([_float(r[f]) for r in rows], dtype=np.float64).reshape(n) for f in PROFILE_FIELDS}
+        self.labels, self.codes = {}, {}
+        for field, col in GROUP_FIELDS.items():
+            labels, codes = np.unique(np.array([str(r[col] or "") for r in rows] or [""], dtype=object),
+                                      return_inverse=True)
+            self.labels[field] = [str(l) for l in labels]
+            self.codes[field] = codes.reshape(-1)[:n]
+        self.code_of = {f: {l: i for i, l in enumerate(ls)} for f, ls in self.labels.items()}
+
+        flat = [(self.index[pid], r) for pid, rs in stats.items() if pid in self.index for r in rs]
+        self.player = np.array([i for i, _ in flat], dtype=np.int64)
+        seasons, season = np.unique(np.array([r['season'] or "" for _, r in flat] or [""], dtype=object),
+                                    return_inverse=True)
+        self.seasons = [str(s) for s in seasons if s]
+        self.season_of = {str(s): i for i, s in enumerate(seasons)}
+        self.season = season.reshape(-1)[:len(flat)]
+        self.stat = {f: np.array([r[f] or 0 for _, r in flat], dtype=np.float64) for f in STAT_FIELDS}
+        self.size = n
+
+    def league(self, i):
+        label = self.labels["league"][self.codes["league"][i]]
+        return int(label) if label else None
+
+    def player_mask(self, args):
+        """league / position / nationality / club 筛选，都按球员当前所在"""
+        mask = np.ones(self.size, dtype=bool)
+        for field in GROUP_FIELDS:
+            value = args.get(field)
+            if not value: continue
+            code = self.code_of[field].get(str(value))
+            if code is None: return np.zeros(self.size, dtype=bool)
+            mask &= self.codes[field] == code
+        return mask
+
+    def row_mask(self, season):
+        if season == "all": return np.ones(len(self.player), dtype=bool)
+        code = self.season_of.get(season)
+        return self.season == code if code is not None else np.zeros(len(self.player), dtype=bool)
+
+    def season_arg(self, args):
+        """默认最近一个赛季；all = 整个生涯"""
+        season = args.get("season") or "latest"
+        if season == "latest": return self.seasons[-1] if self.seasons else ""
+        if season != "all" and season not in self.season_of: raise ValueError(f"没有这个赛季: {season}")
+        return season
+
+    def totals(self, rows, groups=None, size=None):
+        """按球员 (或给定的分组编码) 把 rows 选中的赛季行加起来"""
+        groups = self.player[rows] if groups is None else groups
+        size = self.size if size is None else size
+        return {f: np.bincount(groups, weights=self.stat[f][rows], minlength=size) for f in STAT_FIELDS}
+
+    @staticmethod
+    def metric(sums, name):
+        num_cols, den = METRICS[name]
+        num = sum(sums[c] for c in num_cols)
+        if den is None: return num
+        return np.divide(num, sums[den], out=np.full(len(num), np.nan), where=sums[den] > 0)
+
+    @staticmethod
+    def top(values, candidates, limit, ascending=False):
+        """candidates 里按 values 取前 limit 个 (argpartition 再只排这 limit 个)，同分按下标"""
+        if not len(candidates) or not limit: return candidates[:0]
+        keys = values[candidates] if ascending else -values[candidates]
+        k = min(limit, len(candidates))
+        if k < len(candidates):
+            # 第 k 名的值卡线，和它同分的都留下再按下标排，不然同分的谁进前 k 每次不一样
+            kth = keys[np.argpartition(keys, k - 1)[k - 1]]
+            keep = keys <= kth
+            candidates, keys = candidates[keep], keys[keep]
+        return candidates[np.lexsort((candidates, keys))][:k]
+
+
+class Analytics:
+    def __init__(self):
+        self.profiles = {}  # person_id -> 资料行
+        self.stats = {}  # person_id -> [赛季行]
+        self.cols = None
+        self.built_at = 0
+        self.full = True  # 下次要不要全量读
+        self.dirty_players = set()
+        self.dirty_teams = set()
+        self.lock = threading.Lock()
+        self.refreshing = False
+        self.info = {"refreshes": 0, "last_players": 0, "last_ms": 0.0}
+
+    @property
+    def ready(self): return self.cols is not None
+
+    # --- 刷新 ---
+    def on_commit(self, kind, eid, lid=None):
+        with self.lock:
+            if kind == "player": self.dirty_players.add(str(eid))
+            elif kind == "team": self.dirty_teams.add(str(eid))  # 阵容变了，球员所属球队/联赛跟着变
+
+    @property
+    def dirty(self): return self.full or bool(self.dirty_players or self.dirty_teams)
+
+    def refresh(self, conn_factory):
+        with self.lock:
+            full, pids, tids = self.full, self.dirty_players, self.dirty_teams
+            self.full, self.dirty_players, self.dirty_teams = False, set(), set()
+        start = time.perf_counter()
+        conn = None
+        try:
+            conn = conn_factory()
+            if not conn:
+                self._requeue(full, pids, tids)
+                return False
+            with conn.cursor() as c:
+                if full:
+                    c.execute(PROFILES_SQL)
+                    profiles = c.fetchall()
+                    c.execute(STATS_SQL)
+                    stats = c.fetchall()
+                else:
+                    where, params = [], []
+                    if pids:
+                        where.append(f"pp.person_id IN ({','.join(['%s'] * len(pids))})")
+                        params += list(pids)
+                    if tids:
+                        where.append(f"p.team_id IN ({','.join(['%s'] * len(tids))})")
+                        params += list(tids)
+                    c.execute(PROFILES_SQL + " WHERE " + " OR ".join(where), params)
+                    profiles = c.fetchall()
+                    pids = pids | {str(r['person_id']) for r in profiles}
+                    c.execute(f"{STATS_SQL} WHERE person_id IN ({','.join(['%s'] * len(pids))})", list(pids))
+                    stats = c.fetchall()
+        except Exception:
+            self._requeue(full, pids, tids)
+            raise
+        finally:
+            if conn: conn.close()
+
+        if full: self.profiles, self.stats = {}, {}
+        else:
+            for pid in pids: self.stats.pop(pid, None)
+        for r in profiles: self.profiles[str(r['person_id'])] = r
+        for r in stats: self.stats.setdefault(str(r['person_id']), []).append(r)
+        with metrics.span("analytics_build", players=len(self.profiles)):
+            self.cols = Columns(self.profiles, self.stats)  # 整体换掉，正在查的继续用旧的
+        self.built_at = time.time()
+        self.info.update(refreshes=self.info["refreshes"] + 1, last_players=len(profiles),
+                         last_ms=round((time.perf_counter() - start) * 1000, 1))
+        return True
+
+    def _requeue(self, full, pids, tids):
+        with self.lock:
+            self.full |= full
+            self.dirty_players |= pids
+            self.dirty_teams |= tids
+
+    def maybe_refresh(self, conn_factory):
+        """脏了并且离上次刷新够久就后台刷新；第一次 (还没数据) 同步读"""
+        if not self.dirty or (self.ready and time.time() - self.built_at < REFRESH_INTERVAL): return
+        with self.lock:
+            if self.refreshing: return
+            self.refreshing = True
+
+        def run():
+            try:
+                self.refresh(conn_factory)
+            except Exception as e:
+                print(f"分析数据刷新失败: {e}")
+            finally:
+                self.refreshing = False
+
+        if not self.ready: return run()
+        threading.Thread(target=run, daemon=True).start()
+
+    # --- 查询 ---
+    def query(self, name, args):
+        if name not in QUERIES: raise LookupError(name)
+        with metrics.span("analytics", query=name):
+            return getattr(self, name)(self.cols, args)
+
+    def leaderboard(self, cols, args):
+        """球员排行。metric / season (默认最近赛季，all=生涯) / league position nationality club /
+        min_matches min_starts / order=desc|asc / limit"""
+        metric = _choice(args, "metric", list(METRICS), "goals")
+        season = cols.season_arg(args)
+        limit = _int(args, "limit", 20, 1, MAX_LIMIT)
+        rows = cols.row_mask(season)
+        sums = cols.totals(rows)
+        values = cols.metric(sums, metric)
+        played = np.bincount(cols.player[rows], minlength=cols.size) > 0
+        mask = (cols.player_mask(args) & played & np.isfinite(values)
+                & (sums["matches"] >= _int(args, "min_matches", 0)) & (sums["starts"] >= _int(args, "min_starts", 0)))
+        top = cols.top(values, np.flatnonzero(mask), limit, _choice(args, "order", ["desc", "asc"], "desc") == "asc")
+        return {
+            'metric': metric, 'season': season, 'total': int(mask.sum()),
+            'items': [{'id': cols.ids[i], 'name': cols.names[i], 'league': cols.league(i),
+                       'club': cols.labels["club"][cols.codes["club"][i]],
+                       'position': cols.labels["position"][cols.codes["position"][i]], 'value': _round(values[i]),
+                       **{f: int(sums[f][i]) for f in STAT_FIELDS}} for i in top],
+        }
+
+    def distribution(self, cols, args):
+        """y 在 x 各分段上的分布 (人数/均值/分位数)。x y 取资料里的数值列，bins 是 x 的分段宽度"""
+        x = _choice(args, "x", PROFILE_FIELDS, "age")
+        y = _choice(args, "y", PROFILE_FIELDS, "ability_total")
+        bins = _int(args, "bins", 1 if x == "age" else 5, 1, 100)
+        xs, ys = cols.num[x], cols.num[y]
+        mask = cols.player_mask(args) & np.isfinite(xs) & np.isfinite(ys)
+        g, v = np.floor(xs[mask] / bins) * bins, ys[mask]
+        if not len(v): return {'x': x, 'y': y, 'bins': bins, 'total': 0, 'groups': []}
+        order = np.lexsort((v, g))
+        g, v = g[order], v[order]
+        keys, start, count = np.unique(g, return_index=True, return_counts=True)
+
+        def pct(q):
+            # 每组已经按 y 排好，线性插值取分位数
+            pos = start + q * (count - 1)
+            lo, hi = np.floor(pos).astype(np.int64), np.ceil(pos).astype(np.int64)
+            return v[lo] + (v[hi] - v[lo]) * (pos - lo)
+
+        mean = np.add.reduceat(v, start) / count
+        p25, p50, p75 = pct(.25), pct(.5), pct(.75)
+        return {
+            'x': x, 'y': y, 'bins': bins, 'total': int(mask.sum()),
+            'groups': [{'x': _round(keys[i]), 'count': int(count[i]), 'mean': _round(mean[i]), 'min': _round(v[start[i]]),
+                        'p25': _round(p25[i]), 'median': _round(p50[i]), 'p75': _round(p75[i]),
+                        'max': _round(v[start[i] + count[i] - 1])} for i in range(len(keys))],
+        }
+
+    def groups(self, cols, args):
+        """按 league / club / nationality / position 分组汇总。metric / season / agg=sum|per_player /
+        min_players / order / limit；筛选条件同 leaderboard"""
+        by = _choice(args, "by", list(GROUP_FIELDS), "league")
+        metric = _choice(args, "metric", list(METRICS), "goals")
+        agg = _choice(args, "agg", ["sum", "per_player"], "sum")
+        season = cols.season_arg(args)
+        limit = _int(args, "limit", 20, 1, MAX_LIMIT)
+        size = len(cols.labels[by])
+        rows = cols.row_mask(season) & cols.player_mask(args)[cols.player]
+        codes = cols.codes[by]
+        sums = cols.totals(rows, codes[cols.player[rows]], size)
+        played = np.bincount(cols.player[rows], minlength=cols.size) > 0
+        players = np.bincount(codes[played], minlength=size)
+        values = cols.metric(sums, metric)
+        if agg == "per_player" and METRICS[metric][1] is None:
+            values = np.divide(values, players, out=np.full(size, np.nan), where=players > 0)
+        named = np.array([bool(l) for l in cols.labels[by]], dtype=bool)
+        mask = named & (players >= max(1, _int(args, "min_players", 1))) & np.isfinite(values)
+        top = cols.top(values, np.flatnonzero(mask), limit, _choice(args, "order", ["desc", "asc"], "desc") == "asc")
+        label = (lambda i: int(cols.labels[by][i])) if by == "league" else (lambda i: cols.labels[by][i])
+        return {
+            'by': by, 'metric': metric, 'agg': agg, 'season': season, 'total': int(mask.sum()),
+            'items': [{'group': label(i), 'players': int(players[i]), 'value': _round(values[i]),
+                       **{f: int(sums[f][i]) for f in STAT_FIELDS}} for i in top],
+        }
+
+    def meta(self, cols, args):
+        """可选的赛季/指标/字段，前端做下拉框用"""
+        return {
+            'players': cols.size, 'rows': int(len(cols.player)), 'seasons': cols.seasons,
+            'metrics': list(METRICS), 'fields': list(PROFILE_FIELDS), 'groups': list(GROUP_FIELDS),
+            'built_at': int(self.built_at),
+        }
+
+
+QUERIES = ("leaderboard", "distribution", "groups", "meta")
@@ -0,0 +1,407 @@
+import os
+import time
+import uuid
+import asyncio
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import FileResponse, Response
+from starlette.routing import Route
+
+import analytics
+import datastore
+import db_pool
+import image_store
+import league_snapshot
+import metrics
+import planner
+import player_search
+import queries
+import state_store
+from async_refresh import AsyncMySQLSingleFlight, AsyncRefreshScheduler
+from refresh import RefreshScheduler
+from response_cache import ResponseCache
+
+# === 异步服务模式 (ASGI) ===
+# 和 backend_api 同样的 /api/* 路由、同样的 JSON (连字节都一样，ETag 两边通用)，区别是全程不阻塞：
+# 读库用 aiomysql，过期刷新是事件循环里的 Task，抓页面用 aiohttp，等库/等爬取的请求不占线程。
+# 快多少见 bench/load_test.py 里的实测 (只在 sqlite 替身上量过)。
+# 启动: uvicorn asgi_api:app --port 5000
+# Flask 版 (python backend_api.py) 照旧可用，两边互不影响
+
+CACHE_TIMEOUT = 300
+REDIS_CONFIG = {"host": os.environ.get("DQD_REDIS_HOST", "127.0.0.1"), "port": int(os.environ.get("DQD_REDIS_PORT", 6379))}
+
+PLANNER_MODE = os.environ.get("DQD_PLANNER", "off")  # 同 backend_api，见 planner.py
+REFRESH_STORE = state_store.default_kind(PLANNER_MODE)
+ACCESS_LOG = planner.AccessLog(datastore.get_conn) if PLANNER_MODE != "off" else None
+
+DB = {"pool": None, "spider": None}  # pool 在 lifespan 里建好，spider 第一次要刷新时才建 (见 get_spider)
+REFRESHER = AsyncRefreshScheduler(
+    timeout=CACHE_TIMEOUT,
+    store=state_store.make_store(REFRESH_STORE, datastore.get_conn, REDIS_CONFIG),
+    access_log=ACCESS_LOG, view_refresh=PLANNER_MODE == "off",
+    flight=AsyncMySQLSingleFlight(db_pool.dedicated_conn))  # uvicorn --workers N 时同一个 key 只有一个 worker 去爬
+# embedded: planner 用同步爬虫，跑在自己的线程池里，和事件循环共用同一个刷新时间戳 store
+PLANNER = planner.Planner(RefreshScheduler(timeout=CACHE_TIMEOUT, store=REFRESHER.store), datastore.get_conn) \
+    if PLANNER_MODE == "embedded" else None
+
+RESPONSE_CACHE = ResponseCache(maxsize=1024, ttl=CACHE_TIMEOUT)
+
+
+def invalidate_responses(kind, eid, lid=None):
+    if kind == "leagues": return RESPONSE_CACHE.invalidate("leagues")
+    RESPONSE_CACHE.invalidate(f"{kind}_{eid}", *([f"league_{lid}"] if lid else []))
+
+
+datastore.COMMIT_HOOKS.append(invalidate_responses)
+
+SEARCH_INDEX = player_search.SearchIndex()
+datastore.COMMIT_HOOKS.append(SEARCH_INDEX.mark_dirty)
+
+# 快照在自己的后台线程里建 (同步驱动)，不占事件循环
+SNAPSHOTS = league_snapshot.SnapshotStore(datastore.get_conn)
+datastore.COMMIT_HOOKS.append(SNAPSHOTS.on_commit)
+# 图片本地化 (见 image_store)：下载在自己的后台线程里
+IMAGES = image_store.ImageStore(datastore.get_conn).start_reloader()
+datastore.COMMIT_HOOKS.append(IMAGES.on_commit)
+# 跨联赛分析 (见 analytics)：读库和建列都是同步的，放线程里
+ANALYTICS = analytics.Analytics()
+datastore.COMMIT_HOOKS.append(ANALYTICS.on_commit)
+
+# 别的进程 (批量爬虫/planner/其他 worker) 的提交从 commit_log 回放过来；图片不回放，靠上面的 reloader 捡
+COMMIT_FEED = datastore.CommitFeed(
+    datastore.get_conn, [invalidate_responses, SEARCH_INDEX.mark_dirty, SNAPSHOTS.on_commit, ANALYTICS.on_commit]).start()
+BACKGROUND = set()  # 后台 Task 留个引用，免得被垃圾回收
+
+
+@asynccontextmanager
+async def lifespan(app):
+    try:
+        DB["pool"] = await db_pool.create_async_pool()
+    except Exception as e:
+        print(f"数据库连接失败: {e}")
+    if PLANNER: PLANNER.start()
+    yield
+    if PLANNER: PLANNER.stop()
+    if DB["spider"]: await DB["spider"].close()
+    if DB["pool"]:
+        DB["pool"].close()
+        await DB["pool"].wait_closed()
+
+
+async def fetch_all(sql, args=None):
+    async with DB["pool"].acquire() as conn:
+        async with conn.cursor() as c:
+            with metrics.span("query"):
+                await c.execute(sql, args)
+                return await c.fetchall()
+
+
+async def fetch_one(sql, args=None):
+    async with DB["pool"].acquire() as conn:
+        async with conn.cursor() as c:
+            with metrics.span("query"):
+                await c.execute(sql, args)
+                return await c.fetchone()
+
+
+def serialize(data):
+    with metrics.span("serialize"):
+        return queries.dumps(data)
+
+
+def jsonify(data, status_code=200):
+    return Response(serialize(data), status_code=status_code, media_type="application/json")
+
+
+def json_response(request, body, etag):
+    # If-None-Match 命中直接 304
+    tags = {t.strip().removeprefix("W/").strip('"') for t in request.headers.get("if-none-match", "").split(",")}
+    headers = {"ETag": f'"{etag}"'}
+    if etag in tags or "*" in tags: return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def cached_response(request, key):
+    entry = RESPONSE_CACHE.get(key)
+    return json_response(request, entry[0], entry[1]) if entry else None
+
+
+def cache_json(request, key, tags, version, data):
+    body, etag = RESPONSE_CACHE.put(key, serialize(data), tags, version)
+    return json_response(request, body, etag)
+
+
+def with_age(resp, age):
+    if age is not None: resp.headers['X-Data-Age'] = str(int(age))
+    return resp
+
+
+def get_spider():
+    """AsyncSpider 第一次要用时才建 (同 refresh.lazy)"""
+    if not DB["spider"] and DB["pool"]:
+        from async_spider import AsyncSpider
+        DB["spider"] = AsyncSpider(DB["pool"])
+    return DB["spider"]
+
+
+def spider_update(update):
+    """update 是 AsyncSpider 的方法名，返回的协程函数调用时才去拿 spider"""
+    return lambda *args: getattr(get_spider(), update)(*args)
+
+
+async def check_and_update(cache_key, update, *args):
+    """库没连上就只读不刷"""
+    if not DB["pool"]: return None
+    return await REFRESHER.check(cache_key, spider_update(update), *args)
+
+
+async def ensure_index():
+    """和 SearchIndex.maybe_rebuild 一样的节奏，只是读库换成 aiomysql、建索引放线程里"""
+    idx = SEARCH_INDEX
+    if not DB["pool"] or not idx.due(): return
+    if idx.rebuilding: return
+    idx.rebuilding, idx.dirty = True, False
+
+    async def rebuild():
+        try:
+            rows = await fetch_all(player_search.SEARCH_SQL)
+            await asyncio.to_thread(idx.build, list(rows))
+        except Exception as e:
+            idx.dirty = True
+            print(f"搜索索引重建失败: {e}")
+        finally:
+            idx.rebuilding = False
+
+    if idx.ready:
+        task = asyncio.get_running_loop().create_task(rebuild())
+        BACKGROUND.add(task)
+        task.add_done_callback(BACKGROUND.discard)
+    else:
+        await rebuild()
+
+
+# === API 接口 ===
+
+async def get_leagues(request):
+    hit = cached_response(request, "leagues")
+    if hit: return hit
+    if not DB["pool"]: return jsonify([])
+    version = RESPONSE_CACHE.version
+    leagues = await fetch_all(queries.LEAGUES_SQL)
+    return cache_json(request, "leagues", ["leagues"], version, queries.format_leagues(leagues))
+
+
+async def get_teams(request):
+    league_id = request.path_params['league_id']
+    age = await check_and_update(f"league_{league_id}", "update_league_data", league_id)
+    hit = cached_response(request, f"teams:{league_id}")
+    if hit: return with_age(hit, age)
+    if not DB["pool"]: return jsonify([])
+    version = RESPONSE_CACHE.version
+    teams = await fetch_all(queries.TEAMS_SQL, (league_id,))
+    formatted = queries.format_teams(teams, league_id)
+    return with_age(cache_json(request, f"teams:{league_id}", [f"league_{league_id}"], version, formatted), age)
+
+
+async def get_squad(request):
+    team_id = request.path_params['team_id']
+    age = await check_and_update(f"team_{team_id}", "update_team_data", team_id)
+    hit = cached_response(request, f"squad:{team_id}")
+    if hit: return with_age(hit, age)
+    if not DB["pool"]: return jsonify([])
+    version = RESPONSE_CACHE.version
+    players = await fetch_all(queries.SQUAD_SQL, (team_id,))
+    if not players and await REFRESHER.fill(f"team_{team_id}", spider_update("update_team_data"), team_id):
+        players = await fetch_all(queries.SQUAD_SQL, (team_id,))
+    tags = [f"team_{team_id}"] + [f"player_{p['person_id']}" for p in players]
+    return with_age(cache_json(request, f"squad:{team_id}", tags, version, queries.format_squad(players)), age)
+
+
+async def get_rankings(request):
+    league_id, type = request.path_params['league_id'], request.path_params['type']
+    hit = cached_response(request, f"rankings:{league_id}:{type}")
+    if hit: return hit
+    if not DB["pool"]: return jsonify([])
+    version = RESPONSE_CACHE.version
+    data = await fetch_all(queries.RANKINGS_SQL, (league_id, type))
+    return cache_json(request, f"rankings:{league_id}:{type}", [f"league_{league_id}"], version,
+                      queries.format_rankings(data))
+
+
+async def get_league_snapshot(request):
+    league_id = request.path_params['league_id']
+    age = await check_and_update(f"league_{league_id}", "update_league_data", league_id)
+    snap = SNAPSHOTS.get(league_id) or await asyncio.to_thread(SNAPSHOTS.get_or_build, league_id)
+    if not snap: return jsonify({}, 404)
+    enc, body, etag = snap.negotiate(request.headers.get('accept-encoding'))
+    resp = json_response(request, body, etag)
+    if enc and resp.status_code == 200: resp.headers['Content-Encoding'] = enc
+    resp.headers['Vary'] = 'Accept-Encoding'
+    resp.headers['X-Snapshot-Version'] = str(snap.version)
+    return with_age(resp, age)
+
+
+async def get_image(request):
+    size, name = request.path_params['size'], request.path_params['name']
+    path = IMAGES.file_for(size, name)
+    if not path: return jsonify({'error': '图片不存在'}, 404)
+    etag = f'"{size}-{name}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={image_store.CACHE_MAX_AGE}, immutable"}
+    if etag in {t.strip() for t in request.headers.get("if-none-match", "").split(",")}:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=image_store.MIME[name.rsplit('.', 1)[1]], headers=headers)
+
+
+async def get_player(request):
+    person_id = request.path_params['person_id']
+    age = await check_and_update(f"player_{person_id}", "update_player_data", person_id)
+    if not DB["pool"]: return jsonify({})
+    profile = await fetch_one(queries.PLAYER_SQL, (person_id,))
+    # 第一次访问的球员库里没有，只能等这次抓取 (只挂起这个请求，不占线程)
+    if not profile and await REFRESHER.fill(f"player_{person_id}", spider_update("update_player_data"), person_id):
+        profile = await fetch_one(queries.PLAYER_SQL, (person_id,))
+    history = await fetch_all(queries.HISTORY_SQL, (person_id,))
+    if not profile: return jsonify({}, 404)
+    return with_age(jsonify(queries.format_player(profile, history)), age)
+
+
+async def read_json(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+async def get_players_batch(request):
+    try:
+        ids = queries.batch_ids(await read_json(request) or {})
+    except ValueError as e:
+        return jsonify({'error': str(e)}, 400)
+    if not DB["pool"]: return jsonify({'players': [], 'missing': ids})
+    update = spider_update("update_player_data")
+    ages = await REFRESHER.check_many([(f"player_{pid}", update, pid) for pid in ids])
+    profiles = list(await fetch_all(*queries.in_sql(queries.PLAYERS_BATCH_SQL, ids)))
+    found = {str(p['person_id']) for p in profiles}
+    missing = [pid for pid in ids if pid not in found]
+    if missing and await REFRESHER.fill_all([(f"player_{pid}", update, pid) for pid in missing]):
+        profiles += await fetch_all(*queries.in_sql(queries.PLAYERS_BATCH_SQL, missing))
+    found = [str(p['person_id']) for p in profiles]
+    history = await fetch_all(*queries.in_sql(queries.HISTORY_BATCH_SQL, found)) if found else []
+    known = [a for a in ages.values() if a is not None]
+    return with_age(jsonify(queries.format_players_batch(ids, profiles, history)), max(known) if known else None)
+
+
+async def search_players_paged(request):
+    data = await read_json(request) or {}
+    await ensure_index()
+    if not SEARCH_INDEX.ready: return jsonify({'items': [], 'next_cursor': None, 'total': 0, 'facets': {}}, 503)
+    try:
+        return jsonify(SEARCH_INDEX.search(data, data.get('cursor'), player_search.clamp_limit(data.get('limit', 50)),
+                                           data.get('facets', True)))
+    except ValueError:
+        return jsonify({'error': 'cursor 无效'}, 400)
+
+
+async def get_analytics(request):
+    name = request.path_params['name']
+    if not analytics.HAS_NUMPY: return jsonify({'error': '服务器没装 numpy，分析接口不可用'}, 503)
+    if name not in analytics.QUERIES: return jsonify({'error': '没有这个分析'}, 404)
+    await asyncio.to_thread(ANALYTICS.maybe_refresh, datastore.get_conn)
+    if not ANALYTICS.ready: return jsonify({'error': '分析数据还没加载好'}, 503)
+    try:
+        return jsonify(ANALYTICS.query(name, request.query_params))
+    except ValueError as e:
+        return jsonify({'error': str(e)}, 400)
+
+
+async def search_players(request):
+    data = await read_json(request) or {}
+    await ensure_index()
+    if SEARCH_INDEX.ready:
+        return jsonify(SEARCH_INDEX.search(data, limit=50, facets=False)['items'])
+    if not DB["pool"]: return jsonify([])
+    try:
+        results = await fetch_all(*queries.build_search_sql(data))
+        return jsonify([player_search.format_row(r) for r in results])
+    except Exception as e:
+        print(f"搜索出错: {e}")
+        return jsonify([], 500)
+
+
+async def get_metrics(request):
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+async def get_db_pool_stats(request):
+    pool = DB["pool"]
+    if not pool: return jsonify({})
+    return jsonify({"size": pool.size, "free": pool.freesize, "in_use": pool.size - pool.freesize,
+                    "max_size": pool.maxsize})
+
+
+class MetricsMiddleware:
+    """每个请求记路由耗时和状态码，并给这个请求的 span 一个 trace id"""
+
+    def __init__(self, app):
+        self.app = app
+        self.routes = {}  # endpoint -> 路由模板，第一次用时从 app.routes 建
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http": return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        headers = dict(scope.get("headers") or [])
+        metrics.TRACE_ID.set(headers.get(b"x-request-id", b"").decode() or uuid.uuid4().hex[:16])
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start": status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not self.routes: self.routes = {r.endpoint: r.path for r in app.routes}
+            route = self.routes.get(scope.get("endpoint"), "unmatched")
+            sec = time.perf_counter() - start
+            metrics.observe("dqd_http_request_seconds", sec, route=route, method=scope["method"])
+            metrics.inc("dqd_http_requests_total", route=route, method=scope["method"], status=status[0])
+            if metrics.TRACER:
+                metrics.TRACER.write("request", sec, {"route": route, "path": scope["path"], "status": status[0]})
+
+
+@metrics.collector
+def _api_metrics():
+    return [
+        ("dqd_response_cache_total", "counter", "读接口响应缓存", [({"result": k}, v) for k, v in RESPONSE_CACHE.stats.items()]),
+        ("dqd_refresh_in_flight", "gauge", "正在后台刷新的 key 数", [({}, len(REFRESHER.in_flight))]),
+    ]
+
+
+app = Starlette(
+    routes=[
+        Route('/metrics', get_metrics),
+        Route('/api/stats/db_pool', get_db_pool_stats),
+        Route('/api/leagues', get_leagues),
+        Route('/api/teams/{league_id:int}', get_teams),
+        Route('/api/squad/{team_id:str}', get_squad),
+        Route('/api/rankings/{league_id:int}/{type:str}', get_rankings),
+        Route('/api/league/{league_id:int}/snapshot', get_league_snapshot),
+        Route('/img/{size:str}/{name:str}', get_image),
+        Route('/api/player/{person_id:str}', get_player),
+        Route('/api/players/batch', get_players_batch, methods=['POST']),
+        Route('/api/players/search', search_players_paged, methods=['POST']),
+        Route('/api/search/players', search_players, methods=['POST']),
+        Route('/api/analytics/{name:str}', get_analytics),
+    ],
+    middleware=[Middleware(MetricsMiddleware), Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'],
+                           expose_headers=['X-Data-Age', 'X-Snapshot-Version'])],
+    lifespan=lifespan)
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(app, port=5000)
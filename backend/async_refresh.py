@@ -0,0 +1,144 @@
+import time
+import asyncio
+
+import metrics
+from refresh import REFRESH_TTL, RefreshScheduler, _count
+from singleflight import FOLLOWED, MySQLSingleFlight
+from state_store import MemoryStore
+
+# asyncio 版调度器单独放一个模块：Flask 进程 import refresh 时不用连带加载 asyncio
+
+FOLLOW_POLL = 0.2  # 秒，等别的 worker 放锁时隔多久试一次
+
+
+class AsyncMySQLSingleFlight:
+    """MySQLSingleFlight 的 asyncio 版：uvicorn --workers N 的多个进程之间也用 GET_LOCK 去重，
+    谁先拿到锁谁爬、放锁前记下成没成，其它的等它放锁再看结果 (同 MySQLSingleFlight)。
+    每条 SQL 都是阻塞调用，逐条放线程里跑；等锁不用 GET_LOCK(name, timeout) 占着线程干等，而是隔一会儿试一次。
+    进程内去重 AsyncRefreshScheduler.in_flight 已经做了，这里只管跨进程"""
+
+    def __init__(self, conn_factory, prefix="dqd:", timeout=30):
+        self.sync = MySQLSingleFlight(conn_factory, prefix, timeout)
+
+    async def do(self, key, func, *args):
+        sync = self.sync
+        conn, name = await asyncio.to_thread(sync._connect, key)
+        if not conn: return await func(*args)
+        try:
+            if await asyncio.to_thread(sync._try_lock, conn, name):
+                result = False
+                try:
+                    result = await func(*args)
+                    return result
+                finally:
+                    await asyncio.to_thread(sync._finish, conn, name, result)
+            before = await asyncio.to_thread(sync._outcome, conn, name)
+            deadline = time.time() + sync.timeout
+            while not await asyncio.to_thread(sync._try_lock, conn, name):
+                if time.time() >= deadline: return False
+                await asyncio.sleep(FOLLOW_POLL)
+            await asyncio.to_thread(sync._unlock, conn, name)
+            return sync._verdict(before, await asyncio.to_thread(sync._outcome, conn, name))
+        finally:
+            conn.close()
+
+
+class AsyncRefreshScheduler:
+    """asyncio 版 (asgi_api 用)：刷新是事件循环里的 Task，不占线程；同一个 key 同一时间只有一个 Task。
+    update_func 是协程函数。多进程部署时给 flight=AsyncMySQLSingleFlight，不然每个 worker 各爬一遍"""
+
+    ttl_for = RefreshScheduler.ttl_for
+
+    def __init__(self, timeout=300, store=None, ttls=None, access_log=None, view_refresh=True, flight=None):
+        self.timeout = timeout
+        self.flight = flight
+        self.ttls = REFRESH_TTL if ttls is None else ttls
+        self.store = store or MemoryStore()
+        self.access_log = access_log
+        self.view_refresh = view_refresh
+        self.blocking = not isinstance(self.store, MemoryStore)  # MySQL/Redis store 是阻塞调用，放到线程里跑
+        self.in_flight = {}  # key -> Task
+
+    async def age(self, key):
+        ts = await asyncio.to_thread(self.store.get, key) if self.blocking else self.store.get(key)
+        return time.time() - ts if ts else None
+
+    async def check(self, key, update_func, *args):
+        age = await self.age(key)
+        if self.access_log: self.access_log.touch(key)
+        if _count(key, age, self.ttl_for(key), self.view_refresh): self.schedule(key, update_func, *args)
+        return age
+
+    async def ages(self, keys):
+        get_many = getattr(self.store, "get_many", None) or (lambda ks: {k: self.store.get(k) for k in ks})
+        ts = await asyncio.to_thread(get_many, keys) if self.blocking else get_many(keys)
+        now = time.time()
+        return {k: now - ts[k] if ts.get(k) else None for k in keys}
+
+    async def check_many(self, items):
+        ages = await self.ages([i[0] for i in items])
+        for key, update_func, *args in items:
+            if self.access_log: self.access_log.touch(key)
+            if _count(key, ages[key], self.ttl_for(key), self.view_refresh): self.schedule(key, update_func, *args)
+        return ages
+
+    def schedule(self, key, update_func, *args):
+        task = self.in_flight.get(key)
+        if task: return task
+        task = asyncio.get_running_loop().create_task(self._run(key, update_func, *args))
+        self.in_flight[key] = task
+        return task
+
+    async def wait(self, key, timeout=10):
+        task = self.in_flight.get(key)
+        if not task: return False
+        try:
+            # shield: 等的人超时了也不能把刷新本身取消掉
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except Exception:
+            return False
+
+    async def wait_all(self, keys, timeout=10):
+        tasks = [t for t in (self.in_flight.get(k) for k in keys) if t]
+        if not tasks: return False
+        done, _ = await asyncio.wait([asyncio.shield(t) for t in tasks], timeout=timeout)
+        return bool(done)
+
+    async def fill(self, key, update_func, *args, timeout=10):
+        self.schedule(key, update_func, *args)
+        return await self.wait(key, timeout)
+
+    async def fill_all(self, items, timeout=10):
+        for key, update_func, *args in items: self.schedule(key, update_func, *args)
+        return await self.wait_all([i[0] for i in items], timeout)
+
+    async def _run(self, key, update_func, *args):
+        metrics.TRACE_ID.set(f"refresh:{key}")
+        try:
+            if not self.flight: return await self._refresh(key, update_func, *args)
+            success = await self.flight.do(key, self._refresh_if_stale, key, update_func, *args)
+            # 同 RefreshScheduler._run：别的 worker 刚刚爬成功，自己也记一笔
+            if success is FOLLOWED:
+                await self._set(key)
+                return True
+            return success
+        except Exception as e:
+            print(f"更新失败 [{key}]: {e}")
+            return False
+        finally:
+            self.in_flight.pop(key, None)
+
+    async def _refresh_if_stale(self, key, update_func, *args):
+        # 拿到锁之后再看一眼：store 是共享的，别的 worker 可能刚刷新完
+        age = await self.age(key)
+        if age is not None and age <= self.ttl_for(key): return True
+        return await self._refresh(key, update_func, *args)
+
+    async def _refresh(self, key, update_func, *args):
+        success = await update_func(*args)
+        if success: await self._set(key)
+        return success
+
+    async def _set(self, key):
+        if self.blocking: await asyncio.to_thread(self.store.set, key, time.time())
+        else: self.store.set(key, time.time())
@@ -0,0 +1,158 @@
+import json
+import time
+import asyncio
+
+import aiohttp
+
+import bulk_writer
+import football_spider as fs
+import metrics
+
+# === 异步爬虫 (asgi_api 用) ===
+# 抓的页面、写的行和 football_spider 完全一样 (共用 league_pages / process_*)，只是 I/O 换成异步：
+#   取页面用 aiohttp，读指纹/写库用 aiomysql，解析 (吃 CPU) 丢到线程里，事件循环不会被慢响应卡住。
+# 限速、重试、条件请求、指纹、提交回调 (COMMIT_HOOKS) 全部沿用同步版的配置
+
+
+class Page:
+    """aiohttp 的响应读完后包一层，用起来和 requests.Response 一样，process_* 可以直接吃"""
+
+    def __init__(self, status_code, text, headers):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers
+
+    def json(self): return json.loads(self.text)
+
+
+class AsyncTokenBucket:
+    """fs.TokenBucket 的协程版：没令牌就 await 让出事件循环，而不是 sleep 整个线程"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncSpider:
+    def __init__(self, pool, rate=fs.RATE_PER_SEC, burst=fs.RATE_BURST):
+        self.pool = pool  # db_pool.create_async_pool() 建的 aiomysql 连接池
+        self.bucket = AsyncTokenBucket(rate, burst)
+        self.session = None
+
+    async def start(self):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                headers=fs.HEADERS, timeout=aiohttp.ClientTimeout(total=10),
+                connector=aiohttp.TCPConnector(limit=fs.HTTP_POOL_SIZE))
+
+    async def close(self):
+        if self.session: await self.session.close()
+        self.session = None
+
+    async def fetch(self, url, params=None, headers=None):
+        await self.start()
+        params = {k: str(v) for k, v in params.items()} if params else None
+        cause = None
+        for attempt in range(fs.MAX_RETRIES + 1):
+            await self.bucket.acquire()
+            fs.count("requests")
+            try:
+                with metrics.span("fetch", url=url, attempt=attempt):
+                    async with self.session.get(url, params=params, headers=headers) as res:
+                        if res.status == 304:
+                            fs.count("not_modified")
+                            return Page(304, "", res.headers)
+                        if res.status < 400:
+                            text = await res.text(encoding="utf-8")
+                            fs.count("pages")
+                            return Page(res.status, text, res.headers)
+                # 429/5xx 值得重试，其它 4xx 直接放弃
+                cause = "http_429" if res.status == 429 else f"http_{str(res.status)[0]}xx"
+                if res.status != 429 and res.status < 500: break
+            except asyncio.TimeoutError:
+                cause = "timeout"
+            except aiohttp.ClientConnectionError:
+                cause = "connection"
+            except aiohttp.ClientError:
+                cause = "other"
+            if attempt < fs.MAX_RETRIES:
+                fs.count("retries")
+                await asyncio.sleep(fs.BACKOFF * 2 ** attempt)
+        fs.count("failed")
+        metrics.scrape_failed(cause)
+        return None
+
+    async def fetch_one(self, sql, args=None):
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as c:
+                await c.execute(sql, args)
+                return await c.fetchone()
+
+    async def load_fingerprint(self, key):
+        return await self.fetch_one("SELECT etag, last_modified, digest FROM page_fingerprints WHERE url = %s",
+                                    (key,)) or {}
+
+    async def write(self, batch):
+        """一个实体一个事务，和 fs.write_batch 不带 writer 时一样，提交后触发 COMMIT_HOOKS"""
+        if not batch: return
+        async with self.pool.acquire() as conn:
+            await conn.begin()
+            try:
+                with metrics.span("db_write", entity=batch.entity, rows=batch.rows):
+                    async with conn.cursor() as c:
+                        for sql, args in bulk_writer.statements([batch]): await c.execute(sql, args)
+                    await conn.commit()
+            except Exception:
+                await conn.rollback()
+                metrics.scrape_failed("db_write")
+                raise
+        fs.committed(*batch.entity)
+
+    async def update_league_data(self, lid):
+        print(f"🔄 [异步爬虫] 正在刷新 {fs.LEAGUE_NAMES.get(lid, '未知联赛')} 榜单数据...")
+        pages = fs.league_pages(lid)
+        keys = [fs.fp_key(url, params) for _, url, params in pages]
+        fps = await asyncio.gather(*(self.load_fingerprint(k) for k in keys))
+        # 三个接口并发抓，限速照样由令牌桶管
+        results = await asyncio.gather(*(self.fetch(url, params, fs.conditional_headers(fp))
+                                         for (_, url, params), fp in zip(pages, fps)))
+        batch = bulk_writer.EntityBatch(("league", lid))
+        for (part, _, _), key, fp, res in zip(pages, keys, fps, results):
+            fs.process_league_page(batch, lid, part, key, fp, res)
+        await self.write(batch)
+        return True
+
+    async def update_team_data(self, tid, lid=None):
+        print(f"🔄 [异步爬虫] 正在刷新球队: {tid} ...")
+        row = await self.fetch_one("SELECT league_id FROM teams WHERE team_id = %s", (tid,))
+        stored = row['league_id'] if row else None
+        if lid is None: lid = stored or 0
+        url = fs.team_url(tid)
+        fp = fs.team_fingerprint(await self.load_fingerprint(url), lid, stored)
+        res = await self.fetch(url, headers=fs.conditional_headers(fp))
+        if not res: return False
+        batch = await asyncio.to_thread(fs.process_team_page, tid, lid, url, fp, res)
+        if batch: await self.write(batch)
+        return True
+
+    async def update_player_data(self, pid):
+        print(f"🔄 [异步爬虫] 正在实时抓取球员: {pid} ...")
+        url = fs.player_url(pid)
+        fp = await self.load_fingerprint(url)
+        res = await self.fetch(url, headers=fs.conditional_headers(fp))
+        if not res: return False
+        batch = await asyncio.to_thread(fs.process_player_page, pid, url, fp, res)
+        if batch: await self.write(batch)
+        return True
@@ -1,253 +1,365 @@
-from flask import Flask, jsonify, request
-from flask_cors import CORS
-import pymysql
-import football_spider
+import os
 import time
+import uuid
+from flask import Flask, g, request, send_file, jsonify as flask_jsonify
+from flask_cors import CORS
+import analytics
+import datastore
+import db_pool
+import image_store
+import league_snapshot
+import metrics
+import planner
+import player_search
+import queries
+import state_store
+from refresh import RefreshScheduler, lazy
+from response_cache import ResponseCache
+from singleflight import MySQLSingleFlight
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['X-Data-Age', 'X-Snapshot-Version'])
 
-DB_CONFIG = {
-    "host": "localhost", "user": "root", "password": "20041217",
-    "database": "football_data", "charset": "utf8mb4", "cursorclass": pymysql.cursors.DictCursor
-}
+DB_CONFIG = db_pool.DB_CONFIG
 
-UPDATE_CACHE = {}
 CACHE_TIMEOUT = 300
+REDIS_CONFIG = {"host": os.environ.get("DQD_REDIS_HOST", "127.0.0.1"), "port": int(os.environ.get("DQD_REDIS_PORT", 6379))}
 
 
 def get_db_connection():
     try:
-        return pymysql.connect(**DB_CONFIG)
+        return db_pool.get_conn()
     except Exception as e:
         print(f"数据库连接失败: {e}")
         return None
 
 
+# 刷新计划: off (看的时候过期就刷) / embedded (本进程里跑 planner) / external (另起 python planner.py)，见 planner.py
+PLANNER_MODE = os.environ.get("DQD_PLANNER", "off")
+# 刷新时间戳放哪：memory (每个 worker 各一份) / mysql / redis (多 worker 共用，重启不丢)；默认见 state_store.default_kind
+REFRESH_STORE = state_store.default_kind(PLANNER_MODE)
+ACCESS_LOG = planner.AccessLog(get_db_connection) if PLANNER_MODE != "off" else None
+
+# 多个 gunicorn worker 之间用 GET_LOCK 保证同一个 key 只爬一次
+REFRESHER = RefreshScheduler(
+    timeout=CACHE_TIMEOUT, flight=MySQLSingleFlight(db_pool.dedicated_conn),
+    store=state_store.make_store(REFRESH_STORE, get_db_connection, REDIS_CONFIG),
+    access_log=ACCESS_LOG, view_refresh=PLANNER_MODE == "off")
+UPDATE_CACHE = REFRESHER.store
+PLANNER = planner.Planner(REFRESHER, get_db_connection).start() if PLANNER_MODE == "embedded" else None
+
+
+UPDATE_LEAGUE = lazy("football_spider", "update_league_data")
+UPDATE_TEAM = lazy("football_spider", "update_team_data")
+UPDATE_PLAYER = lazy("football_spider", "update_player_data")
+
+
 def check_and_update(cache_key, update_func, *args):
-    global UPDATE_CACHE
-    current_time = time.time()
-    last_update = UPDATE_CACHE.get(cache_key, 0)
-    if current_time - last_update > CACHE_TIMEOUT:
-        try:
-            success = update_func(*args)
-            if success: UPDATE_CACHE[cache_key] = current_time
-        except Exception as e:
-            print(f"更新失败: {e}")
+    """不再阻塞请求：过期就交给后台刷新，先返回库里现有的数据，返回数据年龄(秒)"""
+    return REFRESHER.check(cache_key, update_func, *args)
+
+
+# 读接口的响应缓存：爬虫每次提交后按 tag 精确失效，所以不会比库里旧
+RESPONSE_CACHE = ResponseCache(maxsize=1024, ttl=CACHE_TIMEOUT)
+
+
+def invalidate_responses(kind, eid, lid=None):
+    if kind == "leagues": return RESPONSE_CACHE.invalidate("leagues")
+    RESPONSE_CACHE.invalidate(f"{kind}_{eid}", *([f"league_{lid}"] if lid else []))
+
+
+datastore.COMMIT_HOOKS.append(invalidate_responses)
+
+# 球员搜索走内存索引，爬虫提交后标脏、后台重建
+SEARCH_INDEX = player_search.SearchIndex()
+datastore.COMMIT_HOOKS.append(SEARCH_INDEX.mark_dirty)
+
+# 联赛快照：联赛/球队提交后后台重建，接口只读内存或磁盘
+SNAPSHOTS = league_snapshot.SnapshotStore(get_db_connection)
+datastore.COMMIT_HOOKS.append(SNAPSHOTS.on_commit)
+
+# 图片本地化：提交后后台下载，接口里的图片地址改写成 /img/...；别的进程下的图定时从 images 表捡
+IMAGES = image_store.ImageStore(get_db_connection).start_reloader()
+datastore.COMMIT_HOOKS.append(IMAGES.on_commit)
+
+# 跨联赛分析：球员资料+逐赛季数据读成 numpy 列，提交后标脏、查询时后台增量刷新 (没装 numpy 接口回 503)
+ANALYTICS = analytics.Analytics()
+datastore.COMMIT_HOOKS.append(ANALYTICS.on_commit)
+
+# 别的进程 (批量爬虫/planner/其他 worker) 的提交从 commit_log 回放过来；图片不回放，靠上面的 reloader 捡
+COMMIT_FEED = datastore.CommitFeed(
+    get_db_connection, [invalidate_responses, SEARCH_INDEX.mark_dirty, SNAPSHOTS.on_commit, ANALYTICS.on_commit]).start()
+
+
+def jsonify(*args, **kwargs):
+    with metrics.span("serialize"):
+        return flask_jsonify(*args, **kwargs)
+
+
+def query(cursor, sql, args=None, one=False):
+    # 每次查询单独计时，慢接口能看出是不是慢在 SQL 上
+    with metrics.span("query"):
+        cursor.execute(sql, args)
+        return cursor.fetchone() if one else cursor.fetchall()
+
+
+def requery(sql, args=None, one=False):
+    """等完后台抓取后重新借一个连接再读一次。等的时候不能拿着连接：抓取写库也要从同一个池里借，
+    十几个冷请求一起等就能把池占满，抓取借不到连接，大家一起超时"""
+    conn = get_db_connection()
+    if not conn: return None if one else []
+    try:
+        with conn.cursor() as cursor:
+            return query(cursor, sql, args, one)
+    finally:
+        conn.close()
+
+
+@metrics.collector
+def _api_metrics():
+    return [
+        ("dqd_response_cache_total", "counter", "读接口响应缓存", [({"result": k}, v) for k, v in RESPONSE_CACHE.stats.items()]),
+        ("dqd_refresh_in_flight", "gauge", "正在后台刷新的 key 数", [({}, len(REFRESHER.in_flight))]),
+    ]
+
+
+@app.before_request
+def start_timer():
+    g.start = time.perf_counter()
+    metrics.TRACE_ID.set(request.headers.get('X-Request-Id') or uuid.uuid4().hex[:16])
+
+
+@app.after_request
+def record_timing(resp):
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    sec = time.perf_counter() - g.get('start', time.perf_counter())
+    metrics.observe("dqd_http_request_seconds", sec, route=route, method=request.method)
+    metrics.inc("dqd_http_requests_total", route=route, method=request.method, status=resp.status_code)
+    if metrics.TRACER: metrics.TRACER.write("request", sec, {"route": route, "path": request.path, "status": resp.status_code})
+    return resp
+
+
+def json_response(body, etag):
+    resp = app.response_class(body, mimetype='application/json')
+    resp.set_etag(etag)
+    return resp.make_conditional(request)  # If-None-Match 命中直接 304
+
+
+def cached_response(key):
+    entry = RESPONSE_CACHE.get(key)
+    return json_response(entry[0], entry[1]) if entry else None
+
+
+def cache_json(key, tags, version, data):
+    # version 是读库之前拿的，读库期间有提交就不缓存这份
+    body, etag = RESPONSE_CACHE.put(key, jsonify(data).get_data(), tags, version)
+    return json_response(body, etag)
+
+
+def with_age(resp, age):
+    # 告诉前端这份数据是多久之前爬的，从没刷新过就不带
+    if age is not None: resp.headers['X-Data-Age'] = str(int(age))
+    return resp
 
 
 # === API 接口 ===
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    # Prometheus 文本格式：各阶段耗时、接口延迟直方图、抓取失败原因、缓存命中、连接池
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/stats/db_pool', methods=['GET'])
+def get_db_pool_stats():
+    # 连接池用量：在用/空闲/等待次数/累计等待时间，用来调 POOL_SIZE
+    return jsonify(db_pool.get_pool().metrics())
+
+
 @app.route('/api/leagues', methods=['GET'])
 def get_leagues():
-    leagues_meta = {
-        24646: {'cn': '英超', 'fullName': '英格兰足球超级联赛', 'logo': '/pl.png'},
-        24651: {'cn': '西甲', 'fullName': '西班牙足球甲级联赛', 'logo': '/laliga.png'},
-        24596: {'cn': '意甲', 'fullName': '意大利足球甲级联赛', 'logo': '/seriea.png'},
-        24648: {'cn': '德甲', 'fullName': '德国足球甲级联赛', 'logo': '/bundesliga.png'},
-        24652: {'cn': '法甲', 'fullName': '法国足球甲级联赛', 'logo': '/ligue1.png'},
-    }
+    hit = cached_response("leagues")
+    if hit: return hit
+    version = RESPONSE_CACHE.version
     conn = get_db_connection()
     if not conn: return jsonify([])
     try:
         with conn.cursor() as cursor:
-            cursor.execute("SELECT id, name FROM leagues")
-            leagues = cursor.fetchall()
+            leagues = query(cursor, queries.LEAGUES_SQL)
     finally:
         conn.close()
-
-    result = []
-    for l in leagues:
-        meta = leagues_meta.get(l['id'], {})
-        result.append({
-            'id': l['id'], 'name': l['name'], 'fullName': meta.get('fullName', l['name']),
-            'cn': meta.get('cn', l['name']), 'logo': meta.get('logo', '/default.png')
-        })
-    return jsonify(result)
+    return cache_json("leagues", ["leagues"], version, queries.format_leagues(leagues))
 
 
 @app.route('/api/teams/<int:league_id>', methods=['GET'])
 def get_teams(league_id):
-    check_and_update(f"league_{league_id}", football_spider.update_league_data, league_id)
+    age = check_and_update(f"league_{league_id}", UPDATE_LEAGUE, league_id)
+    hit = cached_response(f"teams:{league_id}")
+    if hit: return with_age(hit, age)
+    version = RESPONSE_CACHE.version
     conn = get_db_connection()
     if not conn: return jsonify([])
     try:
         with conn.cursor() as cursor:
-            sql = "SELECT t.*, s.`rank`, s.matches, s.won, s.draw, s.lost, s.goals_pro, s.goals_against, s.points FROM teams t LEFT JOIN standings s ON t.team_id = s.team_id WHERE t.league_id = %s ORDER BY s.`rank` ASC"
-            cursor.execute(sql, (league_id,))
-            teams = cursor.fetchall()
+            teams = query(cursor, queries.TEAMS_SQL, (league_id,))
     finally:
         conn.close()
-
-    formatted = []
-    for t in teams:
-        formatted.append({
-            'id': t['team_id'], 'leagueId': league_id, 'name': t['name_cn'], 'en': t['name_en'], 'logo': t['logo_url'],
-            'stats': {'rank': t['rank'], 'played': t['matches'], 'won': t['won'], 'draw': t['draw'], 'lost': t['lost'],
-                      'gf': t['goals_pro'], 'ga': t['goals_against'], 'pts': t['points']},
-            'info': {
-                'founded': t.get('founded'), 'stadium': t.get('stadium') or t.get('venue'),
-                'city': t.get('city'), 'country': t.get('country'), 'capacity': t.get('capacity'),
-                'phone': t.get('phone'), 'email': t.get('email'), 'address': t.get('address')
-            }
-        })
-    return jsonify(formatted)
+    formatted = queries.format_teams(teams, league_id)
+    return with_age(cache_json(f"teams:{league_id}", [f"league_{league_id}"], version, formatted), age)
 
 
 @app.route('/api/squad/<string:team_id>', methods=['GET'])
 def get_squad(team_id):
-    check_and_update(f"team_{team_id}", football_spider.update_team_data, team_id)
+    age = check_and_update(f"team_{team_id}", UPDATE_TEAM, team_id)
+    hit = cached_response(f"squad:{team_id}")
+    if hit: return with_age(hit, age)
+    version = RESPONSE_CACHE.version
     conn = get_db_connection()
     if not conn: return jsonify([])
     try:
         with conn.cursor() as cursor:
-            sql = "SELECT p.*, pp.ability_total FROM players p LEFT JOIN player_profiles pp ON p.person_id = pp.person_id WHERE p.team_id = %s"
-            cursor.execute(sql, (team_id,))
-            players = cursor.fetchall()
-            res = []
-            for p in players:
-                res.append({'id': p['person_id'], 'name': p['name'], 'number': p['number'], 'pos': p['position'],
-                            'avatar': p['avatar_url'], 'rating': p.get('ability_total') or '-'})
-            return jsonify(res)
+            players = query(cursor, queries.SQUAD_SQL, (team_id,))
     finally:
         conn.close()
+    if not players and REFRESHER.fill(f"team_{team_id}", UPDATE_TEAM, team_id):
+        players = requery(queries.SQUAD_SQL, (team_id,))
+    tags = [f"team_{team_id}"] + [f"player_{p['person_id']}" for p in players]
+    return with_age(cache_json(f"squad:{team_id}", tags, version, queries.format_squad(players)), age)
 
 
 @app.route('/api/rankings/<int:league_id>/<string:type>', methods=['GET'])
 def get_rankings(league_id, type):
+    hit = cached_response(f"rankings:{league_id}:{type}")
+    if hit: return hit
+    version = RESPONSE_CACHE.version
     conn = get_db_connection()
     if not conn: return jsonify([])
     try:
         with conn.cursor() as cursor:
-            sql = "SELECT r.*, p.avatar_url FROM rankings r LEFT JOIN players p ON r.person_id = p.person_id WHERE r.league_id = %s AND r.type = %s ORDER BY r.`rank` ASC"
-            cursor.execute(sql, (league_id, type))
-            data = cursor.fetchall()
-            res = []
-            for item in data:
-                res.append({'id': item['person_id'], 'rank': item['rank'], 'name': item['name'], 'team': item['team'],
-                            'count': item['count'], 'avatar': item.get('avatar_url')})
-            return jsonify(res)
+            data = query(cursor, queries.RANKINGS_SQL, (league_id, type))
+            return cache_json(f"rankings:{league_id}:{type}", [f"league_{league_id}"], version,
+                              queries.format_rankings(data))
     finally:
         conn.close()
 
 
+@app.route('/api/league/<int:league_id>/snapshot', methods=['GET'])
+def get_league_snapshot(league_id):
+    # 积分榜+球队资料+射手榜+助攻榜一次给全，预先序列化、压缩好的
+    age = check_and_update(f"league_{league_id}", UPDATE_LEAGUE, league_id)
+    snap = SNAPSHOTS.get_or_build(league_id)  # 只有冷启动第一次才查库，并发的冷请求共用一次
+    if not snap: return jsonify({}), 404
+    enc, body, etag = snap.negotiate(request.headers.get('Accept-Encoding'))
+    resp = app.response_class(body, mimetype='application/json')
+    if enc: resp.headers['Content-Encoding'] = enc
+    resp.headers['Vary'] = 'Accept-Encoding'
+    resp.headers['X-Snapshot-Version'] = str(snap.version)
+    resp.set_etag(etag)
+    return with_age(resp.make_conditional(request), age)
+
+
+@app.route('/img/<size>/<name>', methods=['GET'])
+def get_image(size, name):
+    # 文件名是内容哈希，内容永远不变，浏览器/CDN 缓存一年不用再问
+    path = IMAGES.file_for(size, name)
+    if not path: return jsonify({'error': '图片不存在'}), 404
+    resp = send_file(path, mimetype=image_store.MIME[name.rsplit('.', 1)[1]], etag=f"{size}-{name}",
+                     max_age=image_store.CACHE_MAX_AGE, conditional=True)
+    resp.cache_control.public = True
+    resp.cache_control.immutable = True
+    return resp
+
+
 @app.route('/api/player/<string:person_id>', methods=['GET'])
 def get_player(person_id):
-    check_and_update(f"player_{person_id}", football_spider.update_player_data, person_id)
+    age = check_and_update(f"player_{person_id}", UPDATE_PLAYER, person_id)
     conn = get_db_connection()
     if not conn: return jsonify({})
     try:
         with conn.cursor() as cursor:
-            # 🔥 修改点：关联 players 表获取 nationality_url
-            sql = """
-                  SELECT pp.*, p.nationality_url
-                  FROM player_profiles pp
-                           LEFT JOIN players p ON pp.person_id = p.person_id
-                  WHERE pp.person_id = %s \
-                  """
-            cursor.execute(sql, (person_id,))
-            profile = cursor.fetchone()
-
-            cursor.execute(
-                "SELECT season, club, matches, starts, goals, assists, yellow, red FROM player_stats WHERE person_id=%s ORDER BY season DESC",
-                (person_id,))
-            history = cursor.fetchall()
-
-            if not profile: return jsonify({}), 404
-
-            radar = [
-                {'subject': '速度', 'A': profile['speed'] or 0, 'fullMark': 100},
-                {'subject': '射门', 'A': profile['shooting'] or 0, 'fullMark': 100},
-                {'subject': '传球', 'A': profile['passing'] or 0, 'fullMark': 100},
-                {'subject': '盘带', 'A': profile['dribbling'] or 0, 'fullMark': 100},
-                {'subject': '防守', 'A': profile['defense'] or 0, 'fullMark': 100},
-                {'subject': '力量', 'A': profile['power'] or 0, 'fullMark': 100},
-            ]
-
-            return jsonify({
-                'id': profile['person_id'], 'name_cn': profile['name_cn'], 'name_en': profile['name_en'],
-                'club': profile['club'], 'number': profile['number'], 'pos': '球员',
-                'age': profile['age'], 'height': profile['height'], 'weight': profile['weight'],
-                'foot': profile['foot'], 'birth_date': profile['birth_date'],
-                'country': profile['nationality'], 'avatar': profile['photo_url'],
-                'nationality_logo': profile.get('nationality_url'),  # 🔥 新增字段
-                'ability_total': profile['ability_total'],
-                'radar': radar, 'history': history
-            })
+            profile = query(cursor, queries.PLAYER_SQL, (person_id,), one=True)
+            history = query(cursor, queries.HISTORY_SQL, (person_id,)) if profile else []
     finally:
         conn.close()
+    # 第一次访问的球员库里没有，只能等后台这次抓取 (连接已经还了，见 requery)
+    if not profile and REFRESHER.fill(f"player_{person_id}", UPDATE_PLAYER, person_id):
+        profile = requery(queries.PLAYER_SQL, (person_id,), one=True)
+        if profile: history = requery(queries.HISTORY_SQL, (person_id,))
+
+    if not profile: return jsonify({}), 404
+    return with_age(jsonify(queries.format_player(profile, history)), age)
+
+
+@app.route('/api/players/batch', methods=['POST'])
+def get_players_batch():
+    # 一次拿最多 100 个球员的详情 (结构和 /api/player 一样)，阵容页一个请求搞定
+    try:
+        ids = queries.batch_ids(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    # 过期/没抓过的一起排队，线程池并行刷新
+    ages = REFRESHER.check_many([(f"player_{pid}", UPDATE_PLAYER, pid) for pid in ids])
+    conn = get_db_connection()
+    if not conn: return jsonify({'players': [], 'missing': ids})
+    try:
+        with conn.cursor() as cursor:
+            profiles = list(query(cursor, *queries.in_sql(queries.PLAYERS_BATCH_SQL, ids)))
+            found = [str(p['person_id']) for p in profiles]
+            history = list(query(cursor, *queries.in_sql(queries.HISTORY_BATCH_SQL, found))) if found else []
+    finally:
+        conn.close()
+    # 库里没有的只能等这轮抓取，所有人一起等，总共最多 10 秒 (连接已经还了，见 requery)
+    known_ids = set(found)
+    missing = [pid for pid in ids if pid not in known_ids]
+    if missing and REFRESHER.fill_all([(f"player_{pid}", UPDATE_PLAYER, pid) for pid in missing]):
+        fetched = list(requery(*queries.in_sql(queries.PLAYERS_BATCH_SQL, missing)))
+        profiles += fetched
+        if fetched:
+            history += requery(*queries.in_sql(queries.HISTORY_BATCH_SQL, [str(p['person_id']) for p in fetched]))
+    known = [a for a in ages.values() if a is not None]
+    return with_age(jsonify(queries.format_players_batch(ids, profiles, history)), max(known) if known else None)
+
+
+@app.route('/api/players/search', methods=['POST'])
+def search_players_paged():
+    # 新版搜索：keyset 翻页 + 分面计数，请求体和 /api/search/players 一样，另外支持 cursor / limit / facets
+    data = request.json or {}
+    SEARCH_INDEX.maybe_rebuild(get_db_connection)
+    if not SEARCH_INDEX.ready: return jsonify({'items': [], 'next_cursor': None, 'total': 0, 'facets': {}}), 503
+    try:
+        return jsonify(SEARCH_INDEX.search(data, data.get('cursor'), player_search.clamp_limit(data.get('limit', 50)),
+                                           data.get('facets', True)))
+    except ValueError:
+        return jsonify({'error': 'cursor 无效'}), 400
+
+
+@app.route('/api/analytics/<string:name>', methods=['GET'])
+def get_analytics(name):
+    # leaderboard / distribution / groups / meta，参数见 analytics.Analytics 各方法
+    if not analytics.HAS_NUMPY: return jsonify({'error': '服务器没装 numpy，分析接口不可用'}), 503
+    if name not in analytics.QUERIES: return jsonify({'error': '没有这个分析'}), 404
+    ANALYTICS.maybe_refresh(get_db_connection)
+    if not ANALYTICS.ready: return jsonify({'error': '分析数据还没加载好'}), 503
+    try:
+        return jsonify(ANALYTICS.query(name, request.args))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 
 @app.route('/api/search/players', methods=['POST'])
 def search_players():
     data = request.json
+    SEARCH_INDEX.maybe_rebuild(get_db_connection)
+    if SEARCH_INDEX.ready:
+        return jsonify(SEARCH_INDEX.search(data, limit=50, facets=False)['items'])
+
+    # 索引还没建好 (比如库连不上) 才走 SQL
     conn = get_db_connection()
     if not conn: return jsonify([])
     try:
         with conn.cursor() as cursor:
-            sql = """
-                  SELECT p.person_id, \
-                         p.name, \
-                         p.team_id, \
-                         p.position, \
-                         p.avatar_url,
-                         t.name_cn  as team_name, \
-                         t.logo_url as team_logo,
-                         pp.age, \
-                         pp.nationality, \
-                         pp.ability_total, \
-                         pp.foot, \
-                         pp.number
-                  FROM players p
-                           JOIN teams t ON p.team_id = t.team_id
-                           LEFT JOIN player_profiles pp ON p.person_id = pp.person_id
-                  WHERE 1 = 1 \
-                  """
-            params = []
-            if data.get('name'):
-                sql += " AND (p.name LIKE %s OR pp.name_cn LIKE %s)"
-                params.extend([f"%{data['name']}%", f"%{data['name']}%"])
-            if data.get('league_id'):
-                sql += " AND t.league_id = %s"
-                params.append(data['league_id'])
-            if data.get('team_id'):
-                sql += " AND p.team_id = %s"
-                params.append(data['team_id'])
-            if data.get('position'):
-                sql += " AND p.position LIKE %s"
-                params.append(f"%{data['position']}%")
-            if data.get('nationality'):
-                sql += " AND pp.nationality LIKE %s"
-                params.append(f"%{data['nationality']}%")
-            if data.get('foot'):
-                sql += " AND pp.foot = %s"
-                params.append(data['foot'])
-            if data.get('rating_min'):
-                sql += " AND pp.ability_total >= %s"
-                params.append(data['rating_min'])
-            if data.get('rating_max'):
-                sql += " AND pp.ability_total <= %s"
-                params.append(data['rating_max'])
-            if data.get('age_min'):
-                sql += " AND pp.age >= %s"
-                params.append(data['age_min'])
-            if data.get('age_max'):
-                sql += " AND pp.age <= %s"
-                params.append(data['age_max'])
-
-            sql += " ORDER BY pp.ability_total DESC LIMIT 50"
-            cursor.execute(sql, tuple(params))
-            results = cursor.fetchall()
-
-            formatted = []
-            for r in results:
-                formatted.append({
-                    'id': r['person_id'], 'name': r['name'], 'team': r['team_name'],
-                    'team_logo': r['team_logo'], 'pos': r['position'], 'avatar': r['avatar_url'],
-                    'rating': r['ability_total'] or '-', 'age': r['age'] or '-',
-                    'nationality': r['nationality'] or '-', 'foot': r['foot'] or '-'
-                })
-            return jsonify(formatted)
+            results = query(cursor, *queries.build_search_sql(data))
+            return jsonify([player_search.format_row(r) for r in results])
     except Exception as e:
         print(f"搜索出错: {e}")
         return jsonify([]), 500
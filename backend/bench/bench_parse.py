@@ -0,0 +1,144 @@
+import os
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import page_parser  # noqa: E402
+
+# === 解析基准：整页 html.parser (原实现) vs page_parser 各后端 ===
+# 用法: python bench/bench_parse.py [次数]
+# 先对拍确认各后端输出和原实现完全一致，再比每页解析耗时
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+clean_text = page_parser.clean_text
+
+
+# --- 原 update_team_data / update_player_data 里的解析代码，原样搬过来当基线 ---
+def legacy_team(html, tid):
+    soup = BeautifulSoup(html, 'html.parser')
+    info = {"name_cn": "", "name_en": "", "founded": "", "country": "", "city": "", "stadium": "", "capacity": "",
+            "phone": "", "email": "", "address": "", "logo": ""}
+    con = soup.find('div', class_='info-con')
+    if con:
+        if con.find('p', class_='team-name'): info['name_cn'] = con.find('p', class_='team-name').get_text(strip=True)
+        if con.find('p', class_='en-name'): info['name_en'] = con.find('p', class_='en-name').get_text(strip=True)
+        map_ = {"成立": "founded", "国家": "country", "城市": "city", "主场": "stadium", "容纳": "capacity",
+                "电话": "phone", "邮箱": "email", "地址": "address"}
+        for tag in con.find_all(['span', 'p']):
+            txt = tag.get_text(" ", strip=True)
+            for k, v in map_.items():
+                if k in clean_text(txt): info[v] = re.split(r'[:：]', txt)[-1].strip()
+    img = soup.find('div', class_='team-info').find('img', class_='team-logo')
+    if img: info['logo'] = img['src']
+    honors = []
+    if soup.find('div', class_='hornor-record'):
+        for h in soup.find('div', class_='hornor-record').find_all('div', class_='hornor-list'):
+            raw = h.find('p', class_='header').get_text(strip=True)
+            name, cnt = raw.split("X") if "X" in raw else (raw, "1")
+            honors.append(
+                (tid, name.strip(), cnt.strip(), h.find('span', class_='during-time').get_text(" ", strip=True)))
+    p_ids = re.findall(r'person_id:\s*"(\d+)"', html)
+    players = []
+    if soup.find('div', class_='team-player-data'):
+        for i, r in enumerate(soup.find('div', class_='team-player-data').find_all('p', class_='analysis-list-item')):
+            pid = p_ids[i] if i < len(p_ids) else ""
+            if pid:
+                avt = r.find('span', class_='item3').find('img')['src'] if r.find('span', class_='item3').find(
+                    'img') else ""
+                nat = r.find('span', class_='item6').find('img')['src'] if r.find('span', class_='item6').find(
+                    'img') else ""
+                players.append((pid, tid, r.find('span', class_='item3').get_text(strip=True),
+                                r.find('span', class_='item2').get_text(strip=True),
+                                r.find('span', class_='item1').get_text(strip=True), avt, nat))
+    return info, honors, players
+
+
+def legacy_player(html, pid):
+    soup = BeautifulSoup(html, 'html.parser')
+    prof = {"cn": "", "en": "", "club": "", "nat": "", "h": "", "w": "", "age": "", "birth": "", "num": "", "foot": "",
+            "pic": "", "abil": 0, "spd": 0, "sht": 0, "pas": 0, "dri": 0, "def": 0, "pwr": 0}
+    left = soup.find('div', class_='info-left')
+    if left:
+        if left.find('p', class_='china-name'): prof['cn'] = left.find('p', class_='china-name').get_text(strip=True)
+        if left.find('p', class_='en-name'): prof['en'] = left.find('p', class_='en-name').get_text(strip=True)
+        map_ = {"俱乐部": "club", "国籍": "nat", "身高": "h", "年龄": "age", "体重": "w", "号码": "num",
+                "生日": "birth", "惯用脚": "foot"}
+        for li in left.find_all('li'):
+            for k, v in map_.items():
+                if k in clean_text(li.get_text()): prof[v] = re.split(r'[:：]', li.get_text(" ", strip=True))[-1].strip()
+    if soup.find('img', class_='player-photo'): prof['pic'] = soup.find('img', class_='player-photo')['src']
+    if soup.find('p', class_='average'):
+        try:
+            prof['abil'] = int(soup.find('p', class_='average').find('b').get_text())
+        except:
+            pass
+    chart = soup.find('div', class_='box_chart')
+    if chart:
+        amap = {"速度": "spd", "射门": "sht", "传球": "pas", "盘带": "dri", "防守": "def", "力量": "pwr"}
+        for it in chart.find_all('div', class_='item'):
+            txt = it.get_text()
+            scr = int(re.search(r'\d+', txt).group()) if re.search(r'\d+', txt) else 0
+            for k, v in amap.items():
+                if k in txt: prof[v] = scr
+    stats = []
+    wrap = soup.find('div', class_='total-con-wrap')
+    if wrap:
+        for row in wrap.find_all('p', class_='td'):
+            cols = row.find_all('span')
+            if len(cols) >= 9:
+                try:
+                    stats.append((pid, cols[0].get_text(strip=True), cols[1].get_text(strip=True),
+                                  int(cols[2].get_text(strip=True)), int(cols[3].get_text(strip=True)),
+                                  int(cols[4].get_text(strip=True)), int(cols[5].get_text(strip=True)),
+                                  int(cols[6].get_text(strip=True)), int(cols[7].get_text(strip=True))))
+                except:
+                    continue
+    return prof, stats
+
+
+def new_team(html, tid, backend):
+    return page_parser.parse_team(page_parser.make_soup(html, page_parser.TEAM_SECTIONS, backend), html, tid)
+
+
+def new_player(html, pid, backend):
+    return page_parser.parse_player(page_parser.make_soup(html, page_parser.PLAYER_SECTIONS, backend), pid)
+
+
+def timeit(func, n):
+    func()
+    start = time.perf_counter()
+    for _ in range(n): func()
+    return (time.perf_counter() - start) / n * 1000
+
+
+def run(n=50):
+    pages = []
+    for fn in sorted(os.listdir(FIXTURES)):
+        kind, _, eid = fn.partition("_")
+        if kind not in ("team", "player") or not fn.endswith(".html"): continue
+        with open(os.path.join(FIXTURES, fn), encoding="utf-8") as f:
+            pages.append((kind, eid[:-5], f.read()))
+
+    backends = [b for b in page_parser.BACKENDS if b != "lxml" or page_parser.HAS_LXML]
+    results = {}
+    for kind, eid, html in pages:
+        legacy, new = (legacy_team, new_team) if kind == "team" else (legacy_player, new_player)
+        expect = legacy(html, eid)
+        row = {"legacy": timeit(lambda: legacy(html, eid), n)}
+        for b in backends:
+            got = new(html, eid, b)
+            if got != expect: raise SystemExit(f"❌ {kind}_{eid} 后端 {b} 解析结果和原实现不一致")
+            row[b] = timeit(lambda: new(html, eid, b), n)
+        results[f"{kind}_{eid}"] = row
+
+    print(f"{'页面':<22}" + "".join(f"{k:>12}" for k in ["legacy"] + backends) + "   (ms/页)")
+    for name, row in results.items():
+        print(f"{name:<24}" + "".join(f"{row[k]:>12.2f}" for k in ["legacy"] + backends))
+    return results
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
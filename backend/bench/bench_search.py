@@ -0,0 +1,78 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import player_search  # noqa: E402
+
+# === 搜索基准：2 万名球员的内存索引，随机组合筛选条件，看 p50/p99 ===
+# 用法: python bench/bench_search.py [球员数] [查询次数]
+
+SURNAMES = "王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾萧田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈姚卢姜崔钟谭陆汪范金石廖贾夏韦付方白邹孟熊秦邱江尹薛闫段雷侯龙史陶黎贺顾毛郝龚邵万钱严覃武戴莫孔向汤"
+LATIN = ["son", "mar", "ell", "ian", "ber", "ric", "and", "ton", "kel", "ova", "ez", "ini", "ski", "sen", "aldo", "ard"]
+LEAGUES = [24646, 24651, 24596, 24648, 24652]
+POSITIONS = ["前锋", "中场", "后卫", "门将"]
+FEET = ["左脚", "右脚", "双脚"]
+
+
+def fake_rows(n, seed=1):
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(n):
+        lid = LEAGUES[i % 5]
+        tid = f"{lid}{i % 20:02d}"
+        en = "".join(rnd.choice(LATIN) for _ in range(rnd.randint(2, 4))).capitalize()
+        cn = "".join(rnd.choice(SURNAMES) for _ in range(rnd.randint(2, 4)))
+        rows.append({
+            'person_id': str(50000000 + i), 'name': cn, 'name_cn': cn, 'name_en': en, 'team_id': tid,
+            'league_id': lid, 'team_name': f"球队{tid}", 'team_logo': '', 'position': rnd.choice(POSITIONS),
+            'avatar_url': '', 'age': f"{rnd.randint(16, 40)}岁", 'nationality': f"国家{rnd.randint(1, 80)}",
+            'ability_total': rnd.choice([None] + list(range(40, 95))), 'foot': rnd.choice(FEET), 'number': str(i % 99),
+        })
+    return rows
+
+
+def fake_query(rnd, rows):
+    q = {}
+    r = rnd.random()
+    if r < 0.7:
+        # 中文名 1~2 个字的片段最常见；也有整个名字、英文名 (3~8 个字母，要回表确认子串) 的
+        row = rnd.choice(rows)
+        name = row['name_en'] if r > 0.5 else row['name']
+        size = rnd.randint(3, 8) if r > 0.5 else len(name) if r > 0.4 else rnd.randint(1, 2)
+        start = rnd.randrange(max(1, len(name) - size + 1))
+        q['name'] = name[start:start + size]
+    if rnd.random() < 0.4: q['league_id'] = rnd.choice(LEAGUES)
+    if rnd.random() < 0.3: q['position'] = rnd.choice(POSITIONS)
+    if rnd.random() < 0.2: q['foot'] = rnd.choice(FEET)
+    if rnd.random() < 0.3: q['rating_min'] = rnd.randint(60, 85)
+    if rnd.random() < 0.2: q['age_max'] = rnd.randint(20, 30)
+    if rnd.random() < 0.15: q['nationality'] = f"国家{rnd.randint(1, 80)}"
+    return q
+
+
+def run(n=20000, queries=2000):
+    rows = fake_rows(n)
+    idx = player_search.SearchIndex()
+    start = time.perf_counter()
+    idx.build(rows)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    rnd = random.Random(2)
+    lat = []
+    for _ in range(queries):
+        q = fake_query(rnd, rows)
+        start = time.perf_counter()
+        res = idx.search(q)
+        if res['next_cursor']: idx.search(q, res['next_cursor'])  # 顺带翻一页
+        lat.append((time.perf_counter() - start) * 1000)
+    lat.sort()
+    p = lambda x: lat[min(len(lat) - 1, int(len(lat) * x))]
+    print(f"{n} 名球员，建索引 {build_ms:.0f} ms；{queries} 次查询(含翻页+分面) "
+          f"p50 {p(0.5):.2f} ms  p99 {p(0.99):.2f} ms  max {lat[-1]:.2f} ms")
+    return {"build_ms": build_ms, "p50_ms": p(0.5), "p99_ms": p(0.99)}
+
+
+if __name__ == "__main__":
+    run(*(int(a) for a in sys.argv[1:3]))
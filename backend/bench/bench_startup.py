@@ -0,0 +1,98 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# === 冷启动基准：每次起一个新进程 import 入口模块，看 import 耗时、最重的模块、带进来的重依赖 ===
+# 扩容/滚动发布时新 worker 多久能接请求，大头就是 import。只读的 API worker 不该加载爬虫那一套
+# (requests/bs4)、numpy 之类，--check 时发现就以非 0 退出。
+# 数字来自 python -X importtime (各模块累计微秒)，另外量一下整个进程从启动到 import 完的墙钟时间。
+# 用法:
+#   python bench/bench_startup.py                      # backend_api，跑 5 次取最好
+#   python bench/bench_startup.py asgi_api planner     # 指定入口
+#   python bench/bench_startup.py --check              # 入口带进了 HEAVY 里的模块就失败
+
+RUNS = 5
+TOP = 15
+# 入口 -> 它 import 时不应该加载的模块 (都是真要抓页面/做分析时才用)
+HEAVY = {
+    "backend_api": ("football_spider", "requests", "bs4", "page_parser", "numpy", "PIL", "asyncio"),
+    "asgi_api": ("football_spider", "requests", "bs4", "page_parser", "numpy", "PIL", "aiohttp"),
+}
+PROBE = "import sys, time; t = time.perf_counter(); import {0}; " \
+        "print(round((time.perf_counter() - t) * 1000, 3)); print(' '.join(sorted(sys.modules)))"
+
+
+def parse_importtime(stderr, entry):
+    """-X importtime 的输出 -> entry 这棵子树的 [(模块, 自身微秒, 累计微秒)]，entry 自己在最后。
+    子模块先于父模块输出、缩进更深；site 之类解释器启动时 import 的不算进来"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line: continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit(): continue  # 表头
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cum_us), depth))
+    end = next(i for i, r in enumerate(rows) if r[0] == entry and r[3] == 0)
+    start = end
+    while start and rows[start - 1][3] > 0: start -= 1
+    return [r[:3] for r in rows[start:end + 1]]
+
+
+def measure(entry, runs=RUNS, env=None):
+    """跑 runs 次取最好的一次，返回 {wall_ms, import_ms, importtime_ms, top, modules}"""
+    env = {**os.environ, "DQD_REFRESH_STORE": "memory", "PYTHONDONTWRITEBYTECODE": "1", **(env or {})}
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE.format(entry)], cwd=BACKEND, env=env,
+                              capture_output=True, text=True)
+        wall = (time.perf_counter() - start) * 1000
+        if proc.returncode: raise RuntimeError(f"import {entry} 失败:\n{proc.stderr[-2000:]}")
+        rows = parse_importtime(proc.stderr, entry)
+        import_ms, modules = proc.stdout.strip().splitlines()[-2:]
+        result = {
+            "wall_ms": round(wall, 1), "import_ms": float(import_ms), "importtime_ms": round(rows[-1][2] / 1000, 1),
+            "top": sorted(rows, key=lambda r: -r[2])[:TOP], "modules": set(modules.split()),
+        }
+        if best is None or result["import_ms"] < best["import_ms"]: best = result
+    return best
+
+
+def report(entry, result, top=TOP):
+    print(f"▶ {entry}: import {result['import_ms']:.1f} ms (importtime 累计 {result['importtime_ms']:.1f} ms), "
+          f"进程启动到 import 完 {result['wall_ms']:.1f} ms, 共 {len(result['modules'])} 个模块")
+    print(f"  {'模块':<40} {'自身ms':>8} {'累计ms':>8}")
+    for name, self_us, cum_us in result["top"][:top]:
+        print(f"  {name:<40} {self_us / 1000:>8.1f} {cum_us / 1000:>8.1f}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="冷启动 (import) 基准")
+    ap.add_argument("entries", nargs="*", default=["backend_api"])
+    ap.add_argument("--runs", type=int, default=RUNS)
+    ap.add_argument("--top", type=int, default=TOP)
+    ap.add_argument("--check", action="store_true", help="入口带进了不该加载的重依赖就以 1 退出")
+    args = ap.parse_args(argv)
+
+    failed = False
+    for entry in args.entries:
+        try:
+            result = measure(entry, args.runs)
+        except RuntimeError as e:
+            print(f"⚠️  {e}")
+            failed = True
+            continue
+        report(entry, result, args.top)
+        loaded = [m for m in HEAVY.get(entry, ()) if m in result["modules"]]
+        if loaded:
+            print(f"  {'❌' if args.check else '⚠️ '} import 时就加载了: {', '.join(loaded)}")
+            failed |= args.check
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
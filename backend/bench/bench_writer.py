@@ -0,0 +1,97 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+import pymysql
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bulk_writer  # noqa: E402
+import db_pool  # noqa: E402
+import football_spider as fs  # noqa: E402
+
+# === 写库基准：原来的逐实体逐行写 vs BulkWriter 攒批 ===
+# 需要一个能连上的 MySQL；默认往单独的 football_bench 库里写，不碰正式数据。
+# 没有 MySQL 时 run_bench.py 的 db.* 在 sqlite 替身上比同样两种写法 (db.batched_speedup)，
+# 1 核虚拟机 2000 个球员 22100 行: 逐行 ~18.6k 行/秒，攒批 ~81k 行/秒，约 4.4 倍 (MySQL 上没量过)
+# 用法: python bench/bench_writer.py [--database football_bench] [--players 2000]
+
+
+def fake_data(n_players, seed=1):
+    rnd = random.Random(seed)
+    standings = [(24646 + l, f"{l}{t:02d}", t + 1, 30, 15, 5, 10, 40, 30, 50) for l in range(5) for t in range(20)]
+    players = []
+    for i in range(n_players):
+        pid = str(50000000 + i)
+        prof = (pid, f"球员{i}", f"Player {i}", "俱乐部", "国家", "180CM", "75KG", "25岁", "1999-01-01", "10", "右脚", "",
+                rnd.randint(50, 90), *(rnd.randint(30, 99) for _ in range(6)))
+        stats = [(pid, f"{2024 - s}/{2025 - s}", "俱乐部", 30, 25, rnd.randint(0, 20), rnd.randint(0, 10), 2, 0)
+                 for s in range(10)]
+        players.append((pid, prof, stats))
+    return standings, players
+
+
+def legacy(conn_factory, standings, players):
+    # 原实现的写法：每个实体一个连接一个事务，积分榜逐行 REPLACE
+    conn = conn_factory()
+    c = conn.cursor()
+    for row in standings:
+        c.execute("REPLACE INTO standings VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)", row)
+    conn.commit()
+    conn.close()
+    for pid, prof, stats in players:
+        conn = conn_factory()
+        c = conn.cursor()
+        c.execute("REPLACE INTO player_profiles VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)", prof)
+        c.execute("DELETE FROM player_stats WHERE person_id=%s", (pid,))
+        c.executemany("INSERT INTO player_stats (person_id, season, club, matches, starts, goals, assists, yellow, red) "
+                      "VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)", stats)
+        conn.commit()
+        conn.close()
+
+
+def batched(conn_factory, standings, players):
+    w = bulk_writer.BulkWriter(conn_factory)
+    b = bulk_writer.EntityBatch(("league", 0))
+    b.upsert("standings", fs.STANDING_COLS, standings)
+    w.submit(b)
+    for pid, prof, stats in players:
+        b = bulk_writer.EntityBatch(("player", pid))
+        b.upsert("player_profiles", fs.PROFILE_COLS, [prof])
+        b.replace("player_stats", ("person_id",), (pid,), fs.STAT_COLS, stats)
+        w.submit(b)
+    w.close()
+    if w.errors: raise SystemExit(f"❌ 写入失败: {w.errors[:3]}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--database", default="football_bench")
+    ap.add_argument("--players", type=int, default=2000)
+    ap.add_argument("--pooled", action="store_true", help="两边都用连接池 (只比较写法，不比较建连)")
+    args = ap.parse_args()
+
+    cfg = dict(db_pool.DB_CONFIG)
+    server = pymysql.connect(**{k: v for k, v in cfg.items() if k != "database"})
+    server.cursor().execute(f"CREATE DATABASE IF NOT EXISTS `{args.database}` DEFAULT CHARSET utf8mb4")
+    server.close()
+    cfg["database"] = args.database
+    pool = db_pool.ConnectionPool(cfg)
+    raw = (lambda: pymysql.connect(**cfg)) if not args.pooled else pool.get
+    conn = pool.get()
+    for sql in fs.SCHEMA: conn.cursor().execute(sql)
+    conn.commit()
+    conn.close()
+
+    standings, players = fake_data(args.players)
+    rows = len(standings) + sum(1 + len(s) for _, _, s in players)
+    for name, func, factory in (("逐实体逐行 (原实现)", legacy, raw), ("BulkWriter 攒批", batched, pool.get)):
+        start = time.perf_counter()
+        func(factory, standings, players)
+        sec = time.perf_counter() - start
+        print(f"{name:<20} {rows} 行 {sec:7.2f}s  {rows / sec:9.0f} 行/秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import socketserver
+import sys
+import threading
+
+# === 本地 Redis 替身 ===
+# 只实现 PING/SELECT/GET/MGET/SET/DEL/FLUSHDB，够 state_store.RedisStore 和压测用，不用真装 Redis
+# 用法: python bench/fake_redis.py [端口]   或者在代码里 FakeRedis(port=0).start()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line: return None
+        if not line.startswith(b"*"): return line.decode().split()  # inline 命令 (redis-cli/telnet)
+        args = []
+        for _ in range(int(line[1:-2])):
+            n = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(n + 2)[:-2].decode())
+        return args
+
+    def handle(self):
+        data, lock = self.server.data, self.server.lock
+        while True:
+            args = self._read_command()
+            if args is None: return
+            if not args: continue
+            cmd = args[0].upper()
+            with lock:
+                if cmd == "PING": out = b"+PONG\r\n"
+                elif cmd == "SELECT": out = b"+OK\r\n"
+                elif cmd == "GET":
+                    val = data.get(args[1])
+                    out = b"$-1\r\n" if val is None else b"$%d\r\n%s\r\n" % (len(val.encode()), val.encode())
+                elif cmd == "MGET":
+                    vals = [data.get(k) for k in args[1:]]
+                    out = b"*%d\r\n" % len(vals) + b"".join(
+                        b"$-1\r\n" if v is None else b"$%d\r\n%s\r\n" % (len(v.encode()), v.encode()) for v in vals)
+                elif cmd == "SET":
+                    data[args[1]] = args[2]
+                    out = b"+OK\r\n"
+                elif cmd == "DEL":
+                    out = b":%d\r\n" % sum(data.pop(k, None) is not None for k in args[1:])
+                elif cmd == "FLUSHDB":
+                    data.clear()
+                    out = b"+OK\r\n"
+                else: out = f"-ERR unknown command '{cmd}'\r\n".encode()
+            self.wfile.write(out)
+
+
+class FakeRedis(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=6379):
+        super().__init__((host, port), _Handler)
+        self.data = {}
+        self.lock = threading.Lock()
+
+    @property
+    def port(self): return self.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+if __name__ == "__main__":
+    srv = FakeRedis(port=int(sys.argv[1]) if len(sys.argv) > 1 else 6379)
+    print(f"fake redis 监听 127.0.0.1:{srv.port}")
+    srv.serve_forever()
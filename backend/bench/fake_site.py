@@ -0,0 +1,136 @@
+import os
+import re
+import sys
+import json
+import zlib
+import struct
+import hashlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+# === 本地假懂球帝 ===
+# 回放 fixtures 里录好的 积分榜/射手榜/助攻榜 JSON 和 球队/球员 HTML，给离线压测用。
+#   积分榜、榜单: 每个联赛 (season_id) 把球队/球员 id 平移一下，几个联赛的数据互不重叠
+#   球队页: 同一份 HTML，阵容里的 person_id 换成 "<球队id><两位序号>"，每支球队的球员各不相同
+#   球员页: 同一份 HTML
+#   图片: 页面里的 CDN 地址换成本站 /fastdfs/...，回一张 1x1 的 PNG (国旗都是同一张，测去重)，整套跑下来不出本机
+# 带 ETag，条件请求命中回 304，增量爬取的路径也能测到
+# 用法: DQD_BASE_URL=http://127.0.0.1:8765 python crawler.py ...   另开: python bench/fake_site.py 8765
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+LEAGUES = [24646, 24651, 24596, 24648, 24652]
+PERSON_ID_RE = re.compile(r'(person_id:\s*")(\d+)(")')
+CDN = "https://img1.dongqiudi.com"
+
+
+def _read(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f: return f.read()
+
+
+def _png(seed):
+    chunk = lambda t, d: struct.pack(">I", len(d)) + t + d + struct.pack(">I", zlib.crc32(t + d))
+    pixel = zlib.compress(b"\x00" + hashlib.sha1(seed.encode()).digest()[:3])
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0)) +
+            chunk(b"IDAT", pixel) + chunk(b"IEND", b""))
+
+
+def _shift(value, off, suffix=0):
+    # id 平移 off；suffix 位是序号，保持不动
+    if suffix: return str(int(value[:-suffix]) + off) + value[-suffix:]
+    return str(int(value) + off)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args): pass
+
+    def do_GET(self):
+        site, u = self.server, urlsplit(self.path)
+        site.hits += 1
+        q = {k: v[0] for k, v in parse_qs(u.query).items()}
+        try:
+            body, ctype = site.page(u.path, q)
+        except (KeyError, ValueError):
+            body, ctype = None, None
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        data = body if isinstance(body, bytes) else body.encode()
+        etag = '"%s"' % hashlib.sha1(data).hexdigest()
+        if site.etags and self.headers.get("If-None-Match") == etag:
+            site.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        if site.etags: self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeSite(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, etags=True):
+        super().__init__((host, port), _Handler)
+        self.etags = etags
+        self.hits = 0
+        self.not_modified = 0
+        self.standing = json.loads(_read("standing.json"))
+        self.rankings = {t: json.loads(_read(f"person_ranking_{t}.json")) for t in ("goals", "assists")}
+        self.team_html = _read("team_50000513.html").replace(CDN, self.base_url)
+        self.player_html = _read("player_50000000.html").replace(CDN, self.base_url)
+        self.cache = {}  # 生成好的页面，回放时不重复拼
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self): return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def page(self, path, q):
+        key = (path, q.get("season_id"), q.get("type"))
+        with self.lock:
+            hit = self.cache.get(key)
+        if hit: return hit
+        result = self._render(path, q)
+        with self.lock:
+            self.cache[key] = result
+        return result
+
+    def _render(self, path, q):
+        if path.endswith("/data/standing"):
+            off = LEAGUES.index(int(q["season_id"])) * 1000
+            doc = json.loads(json.dumps(self.standing))
+            for r in doc["content"]["rounds"][0]["content"]["data"]: r["team_id"] = _shift(r["team_id"], off)
+            return json.dumps(doc, ensure_ascii=False), "application/json"
+        if path.endswith("/data/person_ranking"):
+            off = LEAGUES.index(int(q["season_id"])) * 1000
+            doc = json.loads(json.dumps(self.rankings[q["type"]]))
+            for r in doc["content"]["data"]: r["person_id"] = _shift(r["person_id"], off, 2)
+            return json.dumps(doc, ensure_ascii=False), "application/json"
+        m = re.fullmatch(r"/team/(\d+)\.html", path)
+        if m:
+            n = iter(range(100))
+            html = PERSON_ID_RE.sub(lambda p: f"{p.group(1)}{m.group(1)}{next(n):02d}{p.group(3)}", self.team_html)
+            return html, "text/html; charset=utf-8"
+        if re.fullmatch(r"/player/\d+\.html", path): return self.player_html, "text/html; charset=utf-8"
+        if path.startswith("/fastdfs/"): return _png("flag" if "/flag/" in path else path), "image/png"
+        return None, None
+
+
+if __name__ == "__main__":
+    srv = FakeSite(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8765)
+    print(f"假懂球帝监听 {srv.base_url}")
+    srv.serve_forever()
@@ -0,0 +1,342 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+# === 离线基准 + 回归检查 ===
+# 不碰真站、不要 MySQL：fake_site 回放录好的页面，sqlite_db 冒充 MySQL，整条链路在本机跑一遍，量:
+#   parse.*      每页解析耗时 (ms)
+#   spider.*     全量爬取 页/秒、带 ETag 的增量重爬 请求/秒
+#   db.*         BulkWriter 写库 行/秒，和原来逐实体逐行写 (bench_writer.legacy) 的对比
+#   api.<路由>.*  每个接口的吞吐和延迟 (Flask test client，进程内直接调)
+#   startup.*    新进程 import backend_api 的耗时和模块数 (bench_startup.py)
+# 结果和基线比，任何一项退步超过 --threshold 就以非 0 退出。
+# 计时数在共享机器上会抖，超线时先整套重跑确认 (--confirm)，次次都退步才报。
+# 基线有两份：本机的 baseline.local.json (不进仓库) 优先；没有就用仓库里的参考基线 baseline.json。
+# 绝对耗时只在同一台机器上有可比性：基线记着是哪台机器 (主机名/CPU 数/Python 版本) 跑的，
+# 对不上时只判和机器无关的指标 (模块数、写库攒批对逐行的倍数、接口缓存命中对不命中的倍数)，其余只打印。
+# 两份都没有时报错退出 (不会悄悄生成一份当作通过)
+# 用法:
+#   python bench/run_bench.py                     # 跑一遍并和基线比
+#   python bench/run_bench.py --update-baseline   # 跑 --runs 遍，每项最差的存成本机基线 (换机器/有意的取舍之后)
+#   python bench/run_bench.py --baseline bench/baseline.json --update-baseline   # 更新仓库里的参考基线
+#   python bench/run_bench.py --output out.json   # 另外把这次结果写到文件
+
+BASELINE = os.path.join(HERE, "baseline.local.json")  # .gitignore 里，每台机器自己的
+REFERENCE = os.path.join(HERE, "baseline.json")  # 进仓库的参考基线，新机器/CI 上没有本机基线时用
+THRESHOLD = 0.25  # 退步超过 25% 算回归 (计时类指标在共享机器上抖动不小)
+
+
+def machine_id():
+    return f"{platform.node()} / {os.cpu_count()} cpu / {platform.machine()} / python {platform.python_version()}"
+
+
+class Results:
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, name, value, better, gate=True, portable=False):
+        # portable: 计数或者同一台机器上两个数的比值，换台机器也能比
+        self.metrics[name] = {"value": round(value, 3), "better": better, "gate": gate, "portable": portable}
+
+    def best(self, name, value, better, gate=True, portable=False):
+        # 重复几轮取最好的一次，降低抖动
+        old = self.metrics.get(name)
+        if old and ((better == "higher" and old["value"] >= value) or (better == "lower" and old["value"] <= value)):
+            return
+        self.add(name, value, better, gate, portable)
+
+    @classmethod
+    def worst(cls, runs):
+        out = cls()
+        for r in runs:
+            for name, m in r.metrics.items():
+                old = out.metrics.get(name)
+                if not old or (m["value"] < old["value"] if m["better"] == "higher" else m["value"] > old["value"]):
+                    out.metrics[name] = m
+        return out
+
+
+def setup(tmp):
+    """起假站、建 sqlite 库，然后才 import 业务模块 (它们在 import 时读环境变量)"""
+    from fake_site import FakeSite
+    site = FakeSite().start()
+    os.environ["DQD_BASE_URL"] = site.base_url
+    os.environ["DQD_SNAPSHOT_DIR"] = os.path.join(tmp, "snapshots")
+    os.environ["DQD_IMAGE_DIR"] = os.path.join(tmp, "images")
+    os.environ["DQD_REFRESH_STORE"] = "memory"
+    os.environ.pop("DQD_TRACE_FILE", None)
+
+    import db_pool
+    import football_spider
+    import sqlite_db
+    db_pool.set_pool(db_pool.ConnectionPool(connect=sqlite_db.connector(os.path.join(tmp, "bench.db"))))
+    football_spider.RATE_LIMIT.rate = football_spider.RATE_LIMIT.burst = 1e9  # 本地假站不用限速
+    football_spider.init_db()
+    return site
+
+
+def bench_parse(res, rounds):
+    import page_parser
+    pages = {
+        "team": (page_parser.TEAM_SECTIONS, "team_50000513.html",
+                 lambda soup, html: page_parser.parse_team(soup, html, "50000513")),
+        "player": (page_parser.PLAYER_SECTIONS, "player_50000000.html",
+                   lambda soup, html: page_parser.parse_player(soup, "50000000")),
+    }
+    for name, (sections, fixture, parse) in pages.items():
+        with open(os.path.join(HERE, "fixtures", fixture), encoding="utf-8") as f: html = f.read()
+        times = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            soup = page_parser.make_soup(html, sections)
+            page_parser.sections_digest(soup, sections)
+            parse(soup, html)
+            times.append(time.perf_counter() - start)
+        times.sort()
+        res.best(f"parse.{name}_ms", times[len(times) // 2] * 1000, "lower")
+
+
+def bench_spider(res, site, leagues, workers, repeat):
+    import crawler
+    import db_pool
+    import football_spider
+    lids = list(football_spider.LEAGUE_NAMES)[:leagues]
+    for _ in range(repeat):
+        # 清掉指纹，每轮都是完整的 抓取+解析+写库
+        conn = db_pool.get_conn()
+        with conn.cursor() as c: c.execute("DELETE FROM page_fingerprints")
+        conn.commit()
+        conn.close()
+        gc.collect()
+        stats = crawler.Crawler(workers).run(lids)
+        print(f"  全量爬取: {stats['leagues']} 联赛 {stats['teams']} 球队 {stats['players']} 球员, "
+              f"{stats['pages']} 页 / {stats['seconds']}s, 写入 {stats['rows']} 行")
+        if stats['failed'] or stats['write_failed']: raise SystemExit(f"❌ 爬取出错: {stats}")
+        res.best("spider.pages_per_sec", stats['pages_per_sec'], "higher")
+
+    # 再来一遍：页面都没变，应该全是 304，不解析不写库
+    hits, not_modified, start = site.hits, site.not_modified, time.time()
+    crawler.Crawler(workers).run(lids)
+    sec = time.time() - start
+    print(f"  增量重爬: {site.hits - hits} 个请求 / {sec:.2f}s, 其中 304 {site.not_modified - not_modified} 个")
+    res.best("spider.revalidate_per_sec", (site.hits - hits) / sec, "higher")
+
+
+def bench_db(res, tmp, players):
+    """单独的库文件，造的假数据不和爬下来的混在一起；原来的逐实体逐行写法 (bench_writer.legacy) 也在这里比一遍"""
+    import bench_writer
+    import football_spider
+    import sqlite_db
+    standings, rows = bench_writer.fake_data(players)
+    n = len(standings) + sum(1 + len(s) for _, _, s in rows)
+    speed = {}
+    for name, func in (("legacy", bench_writer.legacy), ("batched", bench_writer.batched)):
+        path = os.path.join(tmp, f"writer_{name}_{time.time_ns()}.db")
+        conn = sqlite_db.Connection(path)
+        with conn.cursor() as c:
+            for sql in football_spider.SCHEMA: c.execute(sql)
+        conn.commit()
+        conn.close()
+        start = time.perf_counter()
+        func(sqlite_db.connector(path), standings, rows)
+        speed[name] = n / (time.perf_counter() - start)
+    print(f"  逐实体逐行: {speed['legacy']:.0f} 行/秒, BulkWriter: {speed['batched']:.0f} 行/秒 "
+          f"({speed['batched'] / speed['legacy']:.1f}x), 共 {n} 行")
+    res.best("db.rows_per_sec", speed["batched"], "higher")
+    res.best("db.legacy_rows_per_sec", speed["legacy"], "higher", gate=False)  # 对照组，只看不判
+    res.best("db.batched_speedup", speed["batched"] / speed["legacy"], "higher", portable=True)
+
+
+def api_routes():
+    import db_pool
+    conn = db_pool.get_conn()
+    with conn.cursor() as c:
+        c.execute("SELECT league_id, team_id FROM standings ORDER BY `rank` LIMIT 1")
+        lid, tid = (lambda r: (r['league_id'], r['team_id']))(c.fetchone())
+        c.execute("SELECT person_id FROM players WHERE team_id = %s", (tid,))
+        pids = [r['person_id'] for r in c.fetchall()]
+    conn.close()
+    return lid, tid, pids, [
+        ("leagues", "GET", "/api/leagues", None, True),
+        ("teams", "GET", f"/api/teams/{lid}", None, True),
+        ("rankings", "GET", f"/api/rankings/{lid}/goals", None, True),
+        ("squad", "GET", f"/api/squad/{tid}", None, True),
+        ("player", "GET", f"/api/player/{pids[0]}", None, False),
+        ("snapshot", "GET", f"/api/league/{lid}/snapshot", None, False),
+        ("players_batch", "POST", "/api/players/batch", {"person_ids": pids}, False),
+        ("search", "POST", "/api/search/players", {"name": "球"}, False),
+        ("search_paged", "POST", "/api/players/search", {"position": "前锋", "limit": 20}, False),
+    ]
+
+
+def bench_api(res, requests_per_route):
+    """res 为 None 时只把每个接口打一遍预热，不记数"""
+    import football_spider
+    import backend_api as api
+    # 图片下载只在 import backend_api 之后才挂上，留着的话后面几轮全量爬取会多出一批后台下载，和第一轮没法比
+    if api.IMAGES.on_commit in football_spider.COMMIT_HOOKS: football_spider.COMMIT_HOOKS.remove(api.IMAGES.on_commit)
+    lid, tid, pids, routes = api_routes()
+    # 所有用到的 key 先标成刚刷新过，压测期间不触发后台爬取
+    for key in [f"league_{lid}", f"team_{tid}"] + [f"player_{p}" for p in pids]:
+        api.REFRESHER.store.set(key, time.time())
+    api.SEARCH_INDEX.load(api.get_db_connection)
+    api.SEARCH_INDEX.dirty = False
+    client = api.app.test_client()
+
+    for name, method, path, body, cacheable in routes:
+        variants = [(name, False)] + ([(f"{name}_nocache", True)] if cacheable else [])
+        rps = {}
+        for label, clear in variants:
+            for _ in range(5):  # 预热
+                resp = client.open(path, method=method, json=body)
+            if resp.status_code != 200: raise SystemExit(f"❌ {method} {path} 返回 {resp.status_code}")
+            if res is None: continue
+            lat = []
+            gc.collect()
+            gc.disable()  # 爬完留下一堆垃圾，计时中途触发回收会把头几个接口的数拉得很难看
+            try:
+                start = time.perf_counter()
+                for _ in range(requests_per_route):
+                    if clear: api.RESPONSE_CACHE.clear()
+                    t = time.perf_counter()
+                    client.open(path, method=method, json=body)
+                    lat.append(time.perf_counter() - t)
+                total = time.perf_counter() - start
+            finally:
+                gc.enable()
+            lat.sort()
+            rps[label] = requests_per_route / total
+            res.best(f"api.{label}.rps", rps[label], "higher")
+            # 延迟只记不判：同一个循环的 rps 就是平均延迟的倒数，已经在判了，亚毫秒的分位数抖得厉害
+            res.best(f"api.{label}.p50_ms", lat[len(lat) // 2] * 1000, "lower", gate=False)
+            res.best(f"api.{label}.p95_ms", lat[int(len(lat) * .95)] * 1000, "lower", gate=False)
+        if len(rps) == 2: res.best(f"api.{name}.cache_speedup", rps[name] / rps[f"{name}_nocache"], "higher", portable=True)
+
+
+def compare(current, baseline, threshold, quiet=False, portable_only=False):
+    """返回退步的指标列表；只比两边都有、并且标了 gate 的 (portable_only: 基线是别的机器跑的，只判 portable 的)"""
+    regressions = []
+    lines = [f"\n{'指标':<34} {'基线':>11} {'本次':>11} {'变化':>8}"]
+    for name, cur in sorted(current.items()):
+        base = baseline.get(name)
+        if not base or not base["value"]:
+            lines.append(f"{name:<34} {'-':>11} {cur['value']:>11.3f}")
+            continue
+        change = (cur["value"] - base["value"]) / base["value"]
+        worse = -change if cur["better"] == "higher" else change
+        flag = ""
+        if worse > threshold and cur["gate"] and (cur.get("portable") or not portable_only):
+            regressions.append(name)
+            flag = "  ❌ 退步"
+        elif worse > threshold:
+            flag = "  (不参与判定)"
+        lines.append(f"{name:<34} {base['value']:>11.3f} {cur['value']:>11.3f} {change:>+8.1%}{flag}")
+    if not quiet: print("\n".join(lines))
+    return regressions
+
+
+def bench_startup(res, runs):
+    import bench_startup
+    r = bench_startup.measure("backend_api", runs)
+    print(f"  backend_api: import {r['import_ms']:.1f} ms, 共 {len(r['modules'])} 个模块")
+    # 模块数是确定的，多了就是又有重依赖在 import 时被带进来了；毫秒数受机器负载影响大，只看不判
+    res.best("startup.backend_api.import_ms", r["import_ms"], "lower", gate=False)
+    res.best("startup.backend_api.modules", len(r["modules"]), "lower", portable=True)
+
+
+def run_suite(res, site, tmp, args):
+    print("▶ 启动")
+    bench_startup(res, 5)
+    print("▶ 解析")
+    for _ in range(args.repeat): bench_parse(res, 20)
+    print("▶ 爬虫")
+    bench_spider(res, site, args.leagues, args.workers, args.repeat)
+    print("▶ 接口")
+    bench_api(None, 50)  # 先整体热一遍 (import、连接池、缓存)，不计
+    for _ in range(args.repeat): bench_api(res, args.requests)
+    print("▶ 写库")
+    for _ in range(args.repeat): bench_db(res, tmp, args.writer_players)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="离线基准 + 回归检查")
+    ap.add_argument("--baseline", help="默认本机的 baseline.local.json，没有就用仓库里的 baseline.json")
+    ap.add_argument("--threshold", type=float, default=THRESHOLD, help="允许的退步比例，默认 0.25")
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--output", help="这次的结果另存一份")
+    ap.add_argument("--leagues", type=int, default=1, help="爬几个联赛 (每个 20 队 600 人)")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--requests", type=int, default=200, help="每个接口打多少次")
+    ap.add_argument("--repeat", type=int, default=3, help="解析、全量爬取、接口各重复几轮取最好")
+    ap.add_argument("--writer-players", type=int, default=2000)
+    ap.add_argument("--confirm", type=int, default=2, help="有退步时最多整套跑几遍确认")
+    ap.add_argument("--runs", type=int, default=3, help="--update-baseline 时整套跑几遍，每项存最差的")
+    args = ap.parse_args(argv)
+
+    baseline = None
+    if not args.update_baseline:
+        path = args.baseline or (BASELINE if os.path.exists(BASELINE) else REFERENCE)
+        if not os.path.exists(path):
+            print(f"❌ 没有基线 {path}：先 --update-baseline 生成一份 (或者从仓库恢复 bench/baseline.json)")
+            return 2
+        with open(path, encoding="utf-8") as f: baseline = json.load(f)
+        print(f"基线: {path}")
+    foreign = baseline is not None and baseline["meta"].get("machine") != machine_id()
+    if foreign:
+        print(f"⚠️ 基线是另一台机器跑的 ({baseline['meta'].get('machine') or baseline['meta'].get('platform')})，"
+              f"只判和机器无关的指标，其余只打印；本机可以先 --update-baseline")
+
+    res = Results()
+    with tempfile.TemporaryDirectory(prefix="dqd-bench-") as tmp:
+        site = setup(tmp)
+        if args.update_baseline:
+            # 存基线时整套跑 --runs 遍，每项存最差的一遍：基线偏保守，以后偶尔跑得快的一次不会变成门槛
+            runs = []
+            for i in range(args.runs):
+                if i: print(f"\n▶ 第 {i + 1}/{args.runs} 遍")
+                runs.append(Results())
+                run_suite(runs[-1], site, tmp, args)
+            res = Results.worst(runs)
+        else:
+            for attempt in range(1, args.confirm + 1):
+                run_suite(res, site, tmp, args)
+                # 有指标超线就整套再跑一遍，每项取历次最好的；只有次次都退步的才算数，偶发的抖动不报
+                if not compare(res.metrics, baseline["metrics"], args.threshold, quiet=True, portable_only=foreign): break
+                if attempt < args.confirm: print(f"\n⚠️ 有指标超线，再跑一遍确认 ({attempt + 1}/{args.confirm})")
+        site.shutdown()
+
+    doc = {
+        "meta": {"machine": machine_id(), "python": platform.python_version(), "platform": platform.platform(),
+                 "sqlite": sqlite3.sqlite_version,
+                 "leagues": args.leagues, "requests": args.requests, "time": time.strftime("%Y-%m-%d %H:%M:%S")},
+        "metrics": res.metrics,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f: json.dump(doc, f, ensure_ascii=False, indent=1)
+
+    if args.update_baseline:
+        path = args.baseline or BASELINE
+        with open(path, "w", encoding="utf-8") as f: json.dump(doc, f, ensure_ascii=False, indent=1)
+        print(f"\n✅ 基线已写入 {path}")
+        return 0
+
+    regressions = compare(res.metrics, baseline["metrics"], args.threshold, portable_only=foreign)
+    if regressions:
+        print(f"\n❌ {len(regressions)} 项退步超过 {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print(f"\n✅ 没有超过 {args.threshold:.0%} 的退步")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
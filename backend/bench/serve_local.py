@@ -0,0 +1,60 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+# === 本地起服务 (给 load_test.py 压) ===
+# 和 run_bench 一样：起假站、爬一个联赛进 sqlite，然后起 Flask 或 ASGI 版 (ASGI 的 aiomysql 换成 sqlite_db.AsyncPool)。
+# 爬过的 key 都标成刚刷新，压测时不触发后台爬取，量的就是读接口本身
+# 用法:
+#   python bench/serve_local.py flask --port 5000
+#   python bench/serve_local.py asgi --port 8000
+#   python bench/load_test.py --target flask=http://127.0.0.1:5000 --target asgi=http://127.0.0.1:8000
+
+LEAGUE = 24646
+
+
+def prepare(tmp):
+    import run_bench
+    run_bench.setup(tmp)
+    import crawler
+    crawler.Crawler(4).run([LEAGUE])
+    import db_pool
+    conn = db_pool.get_conn()
+    with conn.cursor() as c:
+        c.execute("SELECT team_id FROM teams")
+        keys = [f"team_{r['team_id']}" for r in c.fetchall()]
+        c.execute("SELECT person_id FROM players")
+        keys += [f"player_{r['person_id']}" for r in c.fetchall()]
+    conn.close()
+    return keys + [f"league_{LEAGUE}"]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("mode", choices=["flask", "asgi"])
+    ap.add_argument("--port", type=int, default=5000)
+    args = ap.parse_args()
+    tmp = tempfile.mkdtemp(prefix="dqd-serve-")
+    keys = prepare(tmp)
+    now = time.time()
+    if args.mode == "flask":
+        import backend_api
+        for key in keys: backend_api.REFRESHER.store.set(key, now)
+        backend_api.app.run(port=args.port, threaded=True)
+    else:
+        import uvicorn
+        import asgi_api
+        import sqlite_db
+        for key in keys: asgi_api.REFRESHER.store.set(key, now)
+        asgi_api.DB["pool"] = sqlite_db.AsyncPool(os.path.join(tmp, "bench.db"))  # lifespan 连不上 MySQL 时保留这个
+        uvicorn.run(asgi_api.app, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import re
+import sqlite3
+import threading
+
+# === 本地数据库替身 ===
+# 用标准库 sqlite3 冒充 pymysql (DictCursor)，让爬虫/API 不连 MySQL 也能整套跑起来，给离线压测用。
+# 只翻译本仓库里真的会出现的 MySQL 写法：
+#   %s 占位符、INSERT ... ON DUPLICATE KEY UPDATE x=VALUES(x)、INSERT IGNORE、(a,b) IN ((..),(..))、
+#   建表里的 AUTO_INCREMENT / KEY idx (...) / ON UPDATE CURRENT_TIMESTAMP、GET_LOCK / RELEASE_LOCK
+# 用法: db_pool.ConnectionPool(connect=sqlite_db.connector(path))
+
+_UPSERT_RE = re.compile(r"ON DUPLICATE KEY UPDATE (.+)$", re.S)
+_VALUES_RE = re.compile(r"VALUES\((`?\w+`?)\)")
+_KEY_RE = re.compile(r",\s*KEY (\w+) \(([^)]*)\)")
+_TABLE_RE = re.compile(r"CREATE TABLE IF NOT EXISTS (\w+)")
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def translate(sql):
+    """MySQL 方言 -> SQLite，返回语句列表 (建表会多出 CREATE INDEX)"""
+    with _cache_lock:
+        hit = _cache.get(sql)
+    if hit: return hit
+    out = sql.replace("%s", "?")
+    extra = []
+    if out.lstrip().upper().startswith("CREATE TABLE"):
+        table = _TABLE_RE.search(out).group(1)
+        for name, cols in _KEY_RE.findall(out):
+            extra.append(f"CREATE INDEX IF NOT EXISTS {table}_{name} ON {table} ({cols})")
+        out = _KEY_RE.sub("", out)
+        out = out.replace("INT AUTO_INCREMENT PRIMARY KEY", "INTEGER PRIMARY KEY AUTOINCREMENT")
+        out = out.replace(" ON UPDATE CURRENT_TIMESTAMP", "")
+    out = out.replace("INSERT IGNORE", "INSERT OR IGNORE")
+    out = _UPSERT_RE.sub(lambda m: "ON CONFLICT DO UPDATE SET " + _VALUES_RE.sub(r"excluded.\1", m.group(1)), out)
+    out = out.replace(") IN ((", ") IN (VALUES (")
+    result = [out] + extra
+    with _cache_lock:
+        _cache[sql] = result
+    return result
+
+
+class Cursor:
+    def __init__(self, raw):
+        self.raw = raw
+        self.rowcount = -1
+
+    def __enter__(self): return self
+
+    def __exit__(self, *exc): self.close()
+
+    def execute(self, sql, args=None):
+        stmts = translate(sql)
+        self.raw.execute(stmts[0], tuple(args) if args is not None else ())
+        for extra in stmts[1:]: self.raw.connection.execute(extra)
+        self.rowcount = self.raw.rowcount
+        return self.rowcount
+
+    def executemany(self, sql, seq):
+        self.raw.executemany(translate(sql)[0], [tuple(a) for a in seq])
+        self.rowcount = self.raw.rowcount
+        return self.rowcount
+
+    def _row(self, r):
+        return dict(zip([d[0] for d in self.raw.description], r)) if r is not None else None
+
+    def fetchone(self): return self._row(self.raw.fetchone())
+
+    def fetchall(self):
+        names = [d[0] for d in self.raw.description] if self.raw.description else []
+        return [dict(zip(names, r)) for r in self.raw.fetchall()]
+
+    def close(self): self.raw.close()
+
+
+class Connection:
+    def __init__(self, path):
+        self.raw = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.raw.execute("PRAGMA journal_mode=WAL")
+        self.raw.execute("PRAGMA synchronous=NORMAL")
+        # 单进程里跑，跨进程锁直接当作拿到了 (进程内去重还有 SingleFlight)
+        self.raw.create_function("GET_LOCK", 2, lambda name, timeout: 1)
+        self.raw.create_function("RELEASE_LOCK", 1, lambda name: 1)
+
+    def cursor(self): return Cursor(self.raw.cursor())
+
+    def commit(self): self.raw.commit()
+
+    def rollback(self): self.raw.rollback()
+
+    def ping(self, reconnect=False): self.raw.execute("SELECT 1")
+
+    def close(self): self.raw.close()
+
+
+def connector(path):
+    return lambda: Connection(path)
+
+
+# === aiomysql 替身 (asgi_api 用) ===
+# 只实现 asgi_api / async_spider 用到的那几个：pool.acquire()、conn.cursor()、begin/commit/rollback、
+# cursor.execute/fetchone/fetchall；每条语句放线程里跑同步的 Connection
+# 用法: asgi_api.DB["pool"] = sqlite_db.AsyncPool(path)
+
+async def _call(func, *args):
+    import asyncio  # 只有 ASGI 那边用得到，Flask 进程 import 这个模块时不连带加载
+    return await asyncio.to_thread(func, *args)
+
+
+class AsyncCursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    async def __aenter__(self): return self
+
+    async def __aexit__(self, *exc): self.cursor.close()
+
+    async def execute(self, sql, args=None): return await _call(self.cursor.execute, sql, args)
+
+    async def fetchone(self): return self.cursor.fetchone()
+
+    async def fetchall(self): return self.cursor.fetchall()
+
+
+class AsyncConnection:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def cursor(self): return AsyncCursor(self.conn.cursor())
+
+    async def begin(self): pass  # sqlite3 碰到写语句自己开事务
+
+    async def commit(self): await _call(self.conn.commit)
+
+    async def rollback(self): await _call(self.conn.rollback)
+
+
+class _Acquire:
+    def __init__(self, pool):
+        self.pool = pool
+        self.conn = None
+
+    async def __aenter__(self):
+        self.conn = await self.pool.acquire_conn()
+        return self.conn
+
+    async def __aexit__(self, *exc):
+        self.pool.free.append(self.conn)
+
+
+class AsyncPool:
+    def __init__(self, path, maxsize=10):
+        self.path = path
+        self.maxsize = self.size = maxsize
+        self.free = [AsyncConnection(Connection(path)) for _ in range(maxsize)]
+
+    @property
+    def freesize(self): return len(self.free)
+
+    def acquire(self): return _Acquire(self)
+
+    async def acquire_conn(self):
+        import asyncio
+        while not self.free: await asyncio.sleep(0.001)
+        return self.free.pop()
+
+    def close(self):
+        for c in self.free: c.conn.close()
+
+    async def wait_closed(self): pass
@@ -0,0 +1,169 @@
+import time
+import threading
+
+import metrics
+
+# === 批量写库 ===
+# 爬虫解析完不再自己开连接逐行写，而是把一个实体(一个联赛/球队/球员)要写的行打包成 EntityBatch，
+# 交给 BulkWriter 攒起来，按行数/时间两个上限合并成多行 INSERT ... ON DUPLICATE KEY UPDATE，
+# 一批一个事务。整批失败就回滚后按实体逐个重试，哪个实体坏了单独报出来，不再被 except: pass 吞掉
+
+MAX_ROWS = 1000  # 攒够这么多行就刷
+MAX_DELAY = 1.0  # 最老的一条等了这么久也刷
+CHUNK = 500  # 单条 INSERT 最多带几行
+
+
+class EntityBatch:
+    """一个实体的全部写操作，要么一起提交要么一起失败"""
+
+    def __init__(self, entity):
+        self.entity = entity  # 比如 ("team", tid, lid)，提交后原样传给 on_commit
+        self.upserts = []  # (table, cols, rows)
+        self.replaces = []  # (table, key_cols, key, cols, rows): 先删掉 key 下的旧行再插
+        self.rows = 0
+
+    def upsert(self, table, cols, rows):
+        if rows:
+            self.upserts.append((table, tuple(cols), list(rows)))
+            self.rows += len(rows)
+
+    def replace(self, table, key_cols, key, cols, rows):
+        self.replaces.append((table, tuple(key_cols), tuple(key), tuple(cols), list(rows)))
+        self.rows += len(rows) + 1
+
+    def __bool__(self): return bool(self.upserts or self.replaces)
+
+
+def _upsert_sql(table, cols, n):
+    ph = "(" + ",".join(["%s"] * len(cols)) + ")"
+    names = ",".join(f"`{c}`" for c in cols)
+    updates = ",".join(f"`{c}`=VALUES(`{c}`)" for c in cols)
+    return f"INSERT INTO {table} ({names}) VALUES {','.join([ph] * n)} ON DUPLICATE KEY UPDATE {updates}"
+
+
+def _insert_sql(table, cols, n):
+    ph = "(" + ",".join(["%s"] * len(cols)) + ")"
+    return f"INSERT INTO {table} ({','.join(f'`{c}`' for c in cols)}) VALUES {','.join([ph] * n)}"
+
+
+def statements(batches):
+    """把若干实体的写操作合并成 (sql, args) 序列：同表同列的 upsert 合成一条，删除按 key 合成一条 IN"""
+    upserts, replaced, deletes, inserts = {}, {}, {}, {}
+    for b in batches:
+        for table, cols, rows in b.upserts:
+            upserts.setdefault((table, cols), []).extend(rows)
+        for table, key_cols, key, cols, rows in b.replaces:
+            replaced[(table, key_cols, key)] = (cols, rows)  # 同一个 key 被写了两次，以后面的为准
+    for (table, key_cols, key), (cols, rows) in replaced.items():
+        deletes.setdefault((table, key_cols), []).append(key)
+        if rows: inserts.setdefault((table, cols), []).extend(rows)
+
+    for (table, key_cols), keys in deletes.items():
+        for i in range(0, len(keys), CHUNK):
+            part = keys[i:i + CHUNK]
+            if len(key_cols) == 1:
+                yield (f"DELETE FROM {table} WHERE `{key_cols[0]}` IN ({','.join(['%s'] * len(part))})",
+                       [k[0] for k in part])
+            else:
+                cols = "(" + ",".join(f"`{k}`" for k in key_cols) + ")"
+                ph = "(" + ",".join(["%s"] * len(key_cols)) + ")"
+                yield (f"DELETE FROM {table} WHERE {cols} IN ({','.join([ph] * len(part))})",
+                       [v for k in part for v in k])
+    for build, groups in ((_upsert_sql, upserts), (_insert_sql, inserts)):
+        for (table, cols), rows in groups.items():
+            for i in range(0, len(rows), CHUNK):
+                part = rows[i:i + CHUNK]
+                yield build(table, cols, len(part)), [v for r in part for v in r]
+
+
+def apply(c, batches):
+    """在游标 c 上执行合并后的写操作 (不提交)"""
+    for sql, args in statements(batches): c.execute(sql, args)
+
+
+class BulkWriter:
+    def __init__(self, conn_factory, max_rows=MAX_ROWS, max_delay=MAX_DELAY, on_commit=None, on_error=None):
+        self.conn_factory = conn_factory
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.on_commit = on_commit  # on_commit(entity) 每个实体提交成功后调一次
+        self.on_error = on_error  # on_error(entity, exc)
+        self.pending = []
+        self.pending_rows = 0
+        self.oldest = None
+        self.lock = threading.Lock()  # 保护 pending
+        self.flush_lock = threading.Lock()  # 同一时间只有一个 flush 在写库
+        self.errors = []  # [(entity, 错误信息)]
+        self.stats = {"batches": 0, "entities": 0, "rows": 0, "failed": 0, "flush_time": 0.0}
+        self.stopped = threading.Event()
+        self.ticker = threading.Thread(target=self._tick, daemon=True, name="bulk-writer")
+        self.ticker.start()
+
+    def submit(self, batch):
+        if not batch: return
+        with self.lock:
+            self.pending.append(batch)
+            self.pending_rows += batch.rows
+            if self.oldest is None: self.oldest = time.time()
+            full = self.pending_rows >= self.max_rows
+        if full: self.flush()
+
+    def _tick(self):
+        while not self.stopped.wait(self.max_delay / 4):
+            oldest = self.oldest
+            if oldest and time.time() - oldest >= self.max_delay: self.flush()
+
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                batches, self.pending, self.pending_rows, self.oldest = self.pending, [], 0, None
+            if not batches: return
+            # 同一个实体在一批里出现两次只留最新的，否则子表会先删一次再插两份
+            batches = list({b.entity: b for b in batches}.values())
+            start = time.time()
+            try:
+                self._commit(batches)
+                done = batches
+            except Exception:
+                # 整批不行就一个实体一个事务重试，把坏的那个找出来
+                done = []
+                for b in batches:
+                    try:
+                        self._commit([b])
+                        done.append(b)
+                    except Exception as e:
+                        self._failed(b, e)
+            self.stats["batches"] += 1
+            self.stats["entities"] += len(done)
+            self.stats["rows"] += sum(b.rows for b in done)
+            self.stats["flush_time"] += time.time() - start
+        if self.on_commit:
+            for b in done:
+                try:
+                    self.on_commit(b.entity)
+                except Exception as e:
+                    print(f"提交回调出错 {b.entity}: {e}")
+
+    def _commit(self, batches):
+        conn = self.conn_factory()
+        try:
+            with metrics.span("db_write", entities=len(batches), rows=sum(b.rows for b in batches)):
+                with conn.cursor() as c:
+                    apply(c, batches)
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _failed(self, batch, exc):
+        self.stats["failed"] += 1
+        metrics.scrape_failed("db_write")
+        self.errors.append((batch.entity, str(exc)))
+        print(f"❌ [批量写库] {batch.entity} 写入失败: {exc}")
+        if self.on_error: self.on_error(batch.entity, exc)
+
+    def close(self):
+        self.stopped.set()
+        self.flush()
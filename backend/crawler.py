@@ -0,0 +1,115 @@
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bulk_writer
+import football_spider
+import image_store
+import league_snapshot
+
+# === 全联赛批量爬取 ===
+# 联赛 -> 球队 -> 球员 逐层展开，一个线程池并发跑，限速和重试交给 football_spider.fetch，
+# 写库交给 BulkWriter 攒批
+# 用法: python crawler.py --workers 8 --rate 5 [--leagues 24646 24651] [--no-players]
+
+DEFAULT_WORKERS = 8
+
+
+class Crawler:
+    def __init__(self, workers=DEFAULT_WORKERS, with_players=True):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crawl")
+        self.with_players = with_players
+        self.writer = bulk_writer.BulkWriter(football_spider.get_conn, on_commit=lambda e: football_spider.committed(*e))
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.finished = threading.Event()
+        self.seen_players = set()
+        self.stats = {"leagues": 0, "teams": 0, "players": 0, "errors": 0}
+
+    def _submit(self, func, *args):
+        with self.lock:
+            self.pending += 1
+        self.pool.submit(self._run, func, *args)
+
+    def _run(self, func, *args):
+        try:
+            func(*args)
+        except Exception as e:
+            with self.lock:
+                self.stats["errors"] += 1
+            print(f"❌ [批量爬虫] {func.__name__}{args} 失败: {e}")
+        finally:
+            with self.lock:
+                self.pending -= 1
+                if self.pending == 0: self.finished.set()
+
+    def _league(self, lid):
+        tids = football_spider.parse_league(football_spider.LEAGUE_NAMES.get(lid), lid, self.writer)
+        with self.lock:
+            self.stats["leagues"] += 1
+        for tid in tids: self._submit(self._team, tid, lid)
+
+    def _team(self, tid, lid):
+        pids = football_spider.parse_team(tid, lid, self.writer)
+        with self.lock:
+            self.stats["teams"] += 1
+            # 转会球员可能出现在两支队里，只爬一次
+            new = [p for p in pids if p not in self.seen_players]
+            self.seen_players.update(new)
+        if self.with_players:
+            for pid in new: self._submit(self._player, pid)
+
+    def _player(self, pid):
+        football_spider.parse_player(pid, self.writer)
+        with self.lock:
+            self.stats["players"] += 1
+
+    def run(self, league_ids):
+        start = time.time()
+        pages_before = football_spider.FETCH_STATS["pages"]
+        with self.lock:
+            self.pending += 1  # 占位，防止第一个联赛跑完时后面的还没提交就被当成全部结束
+        for lid in league_ids: self._submit(self._league, lid)
+        self._run(lambda: None)
+        self.finished.wait()
+        self.pool.shutdown()
+        self.writer.close()
+        elapsed = time.time() - start
+        pages = football_spider.FETCH_STATS["pages"] - pages_before
+        return dict(self.stats, pages=pages, retries=football_spider.FETCH_STATS["retries"],
+                    failed=football_spider.FETCH_STATS["failed"], seconds=round(elapsed, 2),
+                    pages_per_sec=round(pages / elapsed, 2) if elapsed else 0,
+                    rows=self.writer.stats["rows"], write_failed=self.writer.errors)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="懂球帝五大联赛批量爬取")
+    ap.add_argument("--leagues", type=int, nargs="*", default=list(football_spider.LEAGUE_NAMES))
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    ap.add_argument("--rate", type=float, default=football_spider.RATE_PER_SEC, help="全局每秒请求数上限")
+    ap.add_argument("--no-players", action="store_true", help="只爬榜单和球队")
+    ap.add_argument("--init-db", action="store_true", help="先建表")
+    args = ap.parse_args(argv)
+
+    football_spider.RATE_LIMIT.rate = args.rate
+    if args.init_db: football_spider.init_db()
+
+    # 爬完的联赛顺手出快照落盘，API 进程从磁盘捡
+    snapshots = league_snapshot.SnapshotStore(football_spider.get_conn)
+    football_spider.COMMIT_HOOKS.append(snapshots.on_commit)
+    # 球队/球员提交后顺手把队徽、头像、国旗下载到本地
+    images = image_store.ImageStore(football_spider.get_conn)
+    football_spider.COMMIT_HOOKS.append(images.on_commit)
+    stats = Crawler(args.workers, not args.no_players).run(args.leagues)
+    images.drain()
+    snapshots.drain()  # 图片下完会再提交一次 (地址换成本地的)，快照放后面等
+    print(f"✅ [批量爬虫] 完成: {stats['leagues']} 个联赛, {stats['teams']} 支球队, {stats['players']} 名球员, "
+          f"{stats['pages']} 页 / {stats['seconds']}s = {stats['pages_per_sec']} 页/秒 "
+          f"(重试 {stats['retries']}, 失败 {stats['failed']}, 异常 {stats['errors']}), 写入 {stats['rows']} 行")
+    for entity, err in stats['write_failed']: print(f"   写库失败 {entity}: {err}")
+    return stats
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import os
+import time
+import uuid
+import atexit
+import threading
+
+import db_pool
+
+# === 库表结构 + 提交通知 ===
+# API / planner / 爬虫都要用的那一小部分：联赛列表、建表语句、取连接、写库提交后的回调。
+# 原来都在 football_spider 里，结果只读库的 API worker 一启动就把 requests/bs4 整套爬虫 import 进来。
+# 现在这里只依赖 db_pool；football_spider 从这里 import 同样的名字 (同一个 COMMIT_HOOKS 列表)，
+# 老代码里的 football_spider.COMMIT_HOOKS / get_conn / init_db 照旧能用。
+#
+# COMMIT_HOOKS 只在本进程里调。批量爬虫、planner、别的 gunicorn worker 提交的东西，API 进程原来完全不知道，
+# 响应缓存/快照/搜索索引要等到 TTL 才跟上。现在 committed() 顺手把 (kind, eid, lid) 攒起来批量记进 commit_log 表，
+# API 进程起一个 CommitFeed 按自增 id 增量读，把别的进程的提交回放给自己的缓存类 hook (下载图片这种不回放)。
+# DQD_COMMIT_LOG=0 关掉 (单进程部署用不着)
+
+LEAGUE_NAMES = {24646: "英超", 24651: "西甲", 24596: "意甲", 24648: "德甲", 24652: "法甲"}
+
+COMMIT_LOG = os.environ.get("DQD_COMMIT_LOG", "1") != "0"
+COMMIT_POLL = float(os.environ.get("DQD_COMMIT_POLL", 2))  # 秒，API 进程多久读一次 commit_log
+COMMIT_FLUSH = 1  # 秒，提交记录攒多久写一次
+COMMIT_KEEP = 3600  # 秒，commit_log 只留最近这么久
+COMMIT_LOOKBACK = 500  # 往回多读这么多个 id：并发事务的自增 id 提交顺序不保证，晚提交的小 id 也要捡到
+ORIGIN = uuid.uuid4().hex[:16]  # 本进程的标记，回放时跳过自己写的
+
+# 提交成功后的回调 hook(kind, entity_id, league_id)，API 用来让对应的响应缓存失效
+COMMIT_HOOKS = []
+_pending = []
+_pending_lock = threading.Lock()
+_flusher = None
+
+
+def committed(kind, eid, lid=None):
+    for hook in COMMIT_HOOKS:
+        try:
+            hook(kind, eid, lid)
+        except Exception as e:
+            print(f"提交回调出错 [{kind} {eid}]: {e}")
+    if COMMIT_LOG: _publish(kind, eid, lid)
+
+
+def _publish(kind, eid, lid):
+    global _flusher
+    with _pending_lock:
+        _pending.append((kind, None if eid is None else str(eid), lid, ORIGIN, time.time()))
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="commit-log", daemon=True)
+            _flusher.start()
+            atexit.register(flush_commits)  # 批量爬虫跑完就退出，最后一批别丢
+
+
+def flush_commits():
+    """把攒着的提交记录写进 commit_log；写失败就丢掉 (别的进程退回到按 TTL 过期)"""
+    with _pending_lock:
+        rows = list(_pending)
+        del _pending[:]
+    if not rows: return 0
+    try:
+        conn = get_conn()
+        try:
+            with conn.cursor() as c:
+                c.executemany("INSERT INTO commit_log (kind, entity_id, league_id, origin, created_at) "
+                              "VALUES (%s,%s,%s,%s,%s)", rows)
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"提交日志写入失败 ({len(rows)} 条): {e}")
+        return 0
+    return len(rows)
+
+
+def _flush_loop():
+    pruned = 0
+    while True:
+        time.sleep(COMMIT_FLUSH)
+        flush_commits()
+        if time.time() - pruned < 600: continue
+        pruned = time.time()
+        try:
+            conn = get_conn()
+            try:
+                with conn.cursor() as c:
+                    c.execute("DELETE FROM commit_log WHERE created_at < %s", (time.time() - COMMIT_KEEP,))
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"提交日志清理失败: {e}")
+
+
+class CommitFeed:
+    """定时读 commit_log，把别的进程的提交回放给 hooks。启动时从当前最大 id 开始 (本进程的缓存本来就是空的)"""
+
+    def __init__(self, conn_factory, hooks, interval=COMMIT_POLL):
+        self.conn_factory = conn_factory
+        self.hooks = hooks
+        self.interval = interval
+        self.watermark = None
+        self.seen = set()  # watermark - COMMIT_LOOKBACK 之后已经回放过的 id
+        self.failing = False
+        self.thread = None
+        self.stats = {"replayed": 0, "errors": 0}
+
+    def poll(self):
+        conn = None
+        try:
+            conn = self.conn_factory()
+            if not conn: return 0
+            with conn.cursor() as c:
+                if self.watermark is None:
+                    c.execute("SELECT MAX(id) AS id FROM commit_log")
+                    row = c.fetchone()
+                    self.watermark = (row['id'] if row else None) or 0
+                    return 0
+                c.execute("SELECT id, kind, entity_id, league_id, origin FROM commit_log WHERE id > %s ORDER BY id",
+                          (self.watermark - COMMIT_LOOKBACK,))
+                rows = c.fetchall()
+            self.failing = False
+        except Exception as e:
+            self.stats["errors"] += 1
+            if not self.failing: print(f"提交日志读取失败: {e}")  # 表没建/库挂了，别每次都刷屏
+            self.failing = True
+            return 0
+        finally:
+            if conn: conn.close()
+
+        count = 0
+        for r in rows:
+            if r['id'] in self.seen: continue
+            self.seen.add(r['id'])
+            self.watermark = max(self.watermark, r['id'])
+            if r['origin'] == ORIGIN: continue
+            count += 1
+            for hook in self.hooks:
+                try:
+                    hook(r['kind'], r['entity_id'], r['league_id'])
+                except Exception as e:
+                    print(f"提交回放出错 [{r['kind']} {r['entity_id']}]: {e}")
+        floor = self.watermark - COMMIT_LOOKBACK
+        self.seen = {i for i in self.seen if i > floor}
+        self.stats["replayed"] += count
+        return count
+
+    def start(self):
+        def loop():
+            while True:
+                try:
+                    self.poll()
+                except Exception as e:
+                    print(f"提交日志回放出错: {e}")
+                time.sleep(self.interval)
+
+        if COMMIT_LOG:
+            self.thread = threading.Thread(target=loop, name="commit-feed", daemon=True)
+            self.thread.start()
+        return self
+
+
+def get_conn():
+    # 和 API 共用一个连接池，close() 即归还
+    return db_pool.get_conn()
+
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS leagues (
+        id INT PRIMARY KEY, name VARCHAR(32))""",
+    """CREATE TABLE IF NOT EXISTS standings (
+        league_id INT, team_id VARCHAR(16) PRIMARY KEY, `rank` INT, matches INT, won INT, draw INT, lost INT,
+        goals_pro INT, goals_against INT, points INT)""",
+    """CREATE TABLE IF NOT EXISTS rankings (
+        id INT AUTO_INCREMENT PRIMARY KEY, league_id INT, type VARCHAR(16), `rank` INT, person_id VARCHAR(16),
+        name VARCHAR(64), team VARCHAR(64), count INT, KEY idx_league_type (league_id, type))""",
+    """CREATE TABLE IF NOT EXISTS teams (
+        team_id VARCHAR(16) PRIMARY KEY, league_id INT, name_cn VARCHAR(64), name_en VARCHAR(128),
+        founded VARCHAR(32), country VARCHAR(64), city VARCHAR(64), stadium VARCHAR(128), capacity VARCHAR(32),
+        phone VARCHAR(64), email VARCHAR(128), address VARCHAR(255), logo_url VARCHAR(255), KEY idx_league (league_id))""",
+    """CREATE TABLE IF NOT EXISTS honors (
+        id INT AUTO_INCREMENT PRIMARY KEY, team_id VARCHAR(16), name VARCHAR(128), count VARCHAR(16),
+        seasons TEXT, KEY idx_team (team_id))""",
+    """CREATE TABLE IF NOT EXISTS players (
+        person_id VARCHAR(16) PRIMARY KEY, team_id VARCHAR(16), name VARCHAR(64), position VARCHAR(32),
+        number VARCHAR(8), avatar_url VARCHAR(255), nationality_url VARCHAR(255), KEY idx_team (team_id))""",
+    """CREATE TABLE IF NOT EXISTS player_profiles (
+        person_id VARCHAR(16) PRIMARY KEY, name_cn VARCHAR(64), name_en VARCHAR(128), club VARCHAR(64),
+        nationality VARCHAR(64), height VARCHAR(16), weight VARCHAR(16), age VARCHAR(16), birth_date VARCHAR(32),
+        number VARCHAR(8), foot VARCHAR(16), photo_url VARCHAR(255), ability_total INT, speed INT, shooting INT,
+        passing INT, dribbling INT, defense INT, power INT)""",
+    """CREATE TABLE IF NOT EXISTS player_stats (
+        id INT AUTO_INCREMENT PRIMARY KEY, person_id VARCHAR(16), season VARCHAR(32), club VARCHAR(64),
+        matches INT, starts INT, goals INT, assists INT, yellow INT, red INT, KEY idx_person (person_id))""",
+    """CREATE TABLE IF NOT EXISTS refresh_state (
+        cache_key VARCHAR(64) PRIMARY KEY, refreshed_at DOUBLE)""",
+    # singleflight.MySQLSingleFlight：抢到锁的 worker 爬完记一笔成没成，等锁的 worker 据此决定算不算刷新过
+    """CREATE TABLE IF NOT EXISTS flight_results (
+        name VARCHAR(64) PRIMARY KEY, ok TINYINT, finished_at DOUBLE)""",
+    """CREATE TABLE IF NOT EXISTS page_fingerprints (
+        url VARCHAR(255) PRIMARY KEY, etag VARCHAR(128), last_modified VARCHAR(64), digest CHAR(40),
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP)""",
+    # planner.py 的刷新队列：每个实体的访问热度、失败退避
+    """CREATE TABLE IF NOT EXISTS refresh_queue (
+        cache_key VARCHAR(64) PRIMARY KEY, kind VARCHAR(8), entity_id VARCHAR(16), league_id INT,
+        hits DOUBLE DEFAULT 0, last_access DOUBLE, failures INT DEFAULT 0, retry_at DOUBLE DEFAULT 0)""",
+    # image_store.py：远程图片地址 -> 本地按内容哈希存的文件
+    """CREATE TABLE IF NOT EXISTS images (
+        url VARCHAR(255) PRIMARY KEY, hash CHAR(40), ext VARCHAR(8), fetched_at DOUBLE, KEY idx_fetched (fetched_at))""",
+    # 跨进程的提交通知，见上面 CommitFeed
+    """CREATE TABLE IF NOT EXISTS commit_log (
+        id INT AUTO_INCREMENT PRIMARY KEY, kind VARCHAR(8), entity_id VARCHAR(16), league_id INT, origin CHAR(16),
+        created_at DOUBLE, KEY idx_created (created_at))""",
+]
+
+
+def init_db():
+    conn = get_conn()
+    c = conn.cursor()
+    for sql in SCHEMA: c.execute(sql)
+    c.executemany("INSERT IGNORE INTO leagues (id, name) VALUES (%s,%s)", list(LEAGUE_NAMES.items()))
+    conn.commit()
+    conn.close()
+    committed("leagues", None)
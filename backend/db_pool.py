@@ -0,0 +1,204 @@
+import os
+import time
+import threading
+import pymysql
+
+import metrics
+
+# === MySQL 连接池 ===
+# API 和爬虫共用，省掉每个请求/每次抓取的 TCP + 认证握手。
+# 借出时做健康检查，超过 MAX_LIFETIME 的连接直接换新；池满后允许少量溢出，再满就排队等 WAIT_TIMEOUT 秒
+
+# 默认值还是原来的本机库，部署/压测时用环境变量覆盖
+DB_CONFIG = {
+    "host": os.environ.get("DQD_DB_HOST", "localhost"), "user": os.environ.get("DQD_DB_USER", "root"),
+    "password": os.environ.get("DQD_DB_PASSWORD", "20041217"), "database": os.environ.get("DQD_DB_NAME", "football_data"),
+    "charset": "utf8mb4", "cursorclass": pymysql.cursors.DictCursor
+}
+
+POOL_SIZE = 8
+MAX_OVERFLOW = 4
+WAIT_TIMEOUT = 5
+MAX_LIFETIME = 3600
+ASYNC_POOL_SIZE = 20  # aiomysql 连接数 (asgi_api)，协程排队等连接不占线程，不用开很大
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class PooledConnection:
+    """包一层 pymysql 连接：close() 不真的关，而是还回池里，原来的 conn.close() 写法不用改"""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._created = time.time()
+        self._closed = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def close(self):
+        if self._closed: return
+        self._closed = True
+        self._pool.release(self)
+
+    def __del__(self):
+        # 爬虫里解析抛异常时可能没走到 close()，兜底还回去，免得 in_use 一直涨
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    def __init__(self, config=None, size=POOL_SIZE, max_overflow=MAX_OVERFLOW, wait_timeout=WAIT_TIMEOUT,
+                 max_lifetime=MAX_LIFETIME, connect=None):
+        self.config = config or DB_CONFIG
+        self.connect = connect or (lambda: pymysql.connect(**self.config))  # 压测时换成本地替身
+        self.size = size
+        self.max_overflow = max_overflow
+        self.wait_timeout = wait_timeout
+        self.max_lifetime = max_lifetime
+        self.idle = []  # [(raw, created)]
+        self.in_use = 0
+        self.cond = threading.Condition()
+        self.stats = {"created": 0, "recycled": 0, "broken": 0, "waits": 0, "wait_time": 0.0, "timeouts": 0}
+
+    def _connect(self):
+        raw = self.connect()
+        self.stats["created"] += 1
+        return raw
+
+    def _healthy(self, raw, created):
+        if time.time() - created > self.max_lifetime:
+            self.stats["recycled"] += 1
+            return False
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Exception:
+            self.stats["broken"] += 1
+            return False
+
+    def get(self):
+        with metrics.span("db_connect"):
+            return self._get()
+
+    def _get(self):
+        with self.cond:
+            start = None
+            while not self.idle and self.in_use >= self.size + self.max_overflow:
+                if start is None:
+                    start = time.time()
+                    self.stats["waits"] += 1
+                left = self.wait_timeout - (time.time() - start)
+                if left <= 0:
+                    self.stats["wait_time"] += time.time() - start
+                    self.stats["timeouts"] += 1
+                    raise PoolTimeout(f"连接池已满 ({self.in_use} 个在用)，等待 {self.wait_timeout}s 超时")
+                self.cond.wait(left)
+            if start is not None: self.stats["wait_time"] += time.time() - start
+            self.in_use += 1
+            item = self.idle.pop() if self.idle else None
+
+        # 握手和 ping 都放在锁外面做
+        try:
+            while item:
+                raw, created = item
+                if self._healthy(raw, created): break
+                self._close_quietly(raw)
+                with self.cond:
+                    item = self.idle.pop() if self.idle else None
+            if not item: item = (self._connect(), time.time())
+        except Exception:
+            with self.cond:
+                self.in_use -= 1
+                self.cond.notify()
+            raise
+        conn = PooledConnection(self, item[0])
+        conn._created = item[1]
+        return conn
+
+    def release(self, conn):
+        raw = conn._raw
+        try:
+            raw.rollback()  # 没提交的事务不能带给下一个借用者
+            keep = True
+        except Exception:
+            keep = False
+        with self.cond:
+            self.in_use -= 1
+            if keep and len(self.idle) < self.size:
+                self.idle.append((raw, conn._created))
+                raw = None
+            self.cond.notify()
+        if raw: self._close_quietly(raw)
+
+    @staticmethod
+    def _close_quietly(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def metrics(self):
+        with self.cond:
+            return dict(self.stats, size=self.size, max_overflow=self.max_overflow, in_use=self.in_use,
+                        idle=len(self.idle), wait_time=round(self.stats["wait_time"], 4))
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_pool():
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None: _POOL = ConnectionPool()
+    return _POOL
+
+
+def set_pool(pool):
+    """换掉全局连接池 (离线压测换成 bench/sqlite_db 的本地库)"""
+    global _POOL
+    _POOL = pool
+
+
+def get_conn():
+    return get_pool().get()
+
+
+def dedicated_conn():
+    """不走池子的独立连接 (close 就真关)：给 GET_LOCK 这种要一直占着、会话级的用，免得锁住一次爬取的工夫
+    池里就少一个连接。连不上返回 None"""
+    try:
+        return get_pool().connect()
+    except Exception as e:
+        print(f"数据库连接失败: {e}")
+        return None
+
+
+async def create_async_pool(config=None, maxsize=ASYNC_POOL_SIZE):
+    """asgi_api 用的 aiomysql 连接池；aiomysql 只有 ASGI 进程要，用到才 import"""
+    import aiomysql
+    cfg = dict(config or DB_CONFIG)
+    cfg.pop("cursorclass", None)
+    return await aiomysql.create_pool(
+        minsize=1, maxsize=maxsize, host=cfg["host"], user=cfg["user"], password=cfg["password"],
+        db=cfg["database"], charset=cfg.get("charset", "utf8mb4"), cursorclass=aiomysql.DictCursor,
+        pool_recycle=MAX_LIFETIME, autocommit=True)  # 读不留事务；写的时候显式 begin
+
+
+@metrics.collector
+def _pool_metrics():
+    if _POOL is None: return []
+    m = _POOL.metrics()
+    return [
+        ("dqd_db_pool_connections", "gauge", "连接池连接数", [({"state": "in_use"}, m["in_use"]), ({"state": "idle"}, m["idle"])]),
+        ("dqd_db_pool_events_total", "counter", "连接池事件",
+         [({"event": k}, m[k]) for k in ("created", "recycled", "broken", "waits", "timeouts")]),
+        ("dqd_db_pool_wait_seconds_total", "counter", "借连接累计等待时间", [({}, m["wait_time"])]),
+    ]
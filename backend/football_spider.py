@@ -1,222 +1,338 @@
-import requests, pymysql, re, time
-from bs4 import BeautifulSoup
+import requests, time, hashlib, json, os, threading
+from urllib.parse import urlencode
+from requests.adapters import HTTPAdapter
+import db_pool
+import metrics
+import page_parser
+import bulk_writer
+from page_parser import clean_text
+# 表结构/提交回调/连接 在 datastore 里 (API 只读进程不用 import 爬虫)，这里照旧能 football_spider.X 用
+from datastore import LEAGUE_NAMES, COMMIT_HOOKS, SCHEMA, committed, get_conn, init_db
+from rate_limit import TokenBucket
 
 # === 配置 ===
-DB_PASSWORD = "20041217"
-DB_CONFIG = {"host": "localhost", "user": "root", "password": DB_PASSWORD, "db": "football_data", "charset": "utf8mb4"}
+DB_CONFIG = db_pool.DB_CONFIG
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"}
 
-LEAGUE_NAMES = {24646: "英超", 24651: "西甲", 24596: "意甲", 24648: "德甲", 24652: "法甲"}
+# 站点地址：回放/压测时指向本地假站 (bench/fake_site.py)
+BASE_URL = os.environ.get("DQD_BASE_URL", "https://www.dongqiudi.com").rstrip("/")
 
+RATE_PER_SEC = 5  # 全局限速：每秒最多发几个请求 (所有线程共享)
+RATE_BURST = 10
+MAX_RETRIES = 3
+BACKOFF = 0.5  # 重试间隔 0.5s, 1s, 2s ...
+HTTP_POOL_SIZE = 32
 
-def get_conn():
-    return pymysql.connect(host=DB_CONFIG["host"], user=DB_CONFIG["user"], password=DB_CONFIG["password"],
-                           database=DB_CONFIG["db"], cursorclass=pymysql.cursors.DictCursor)
+RATE_LIMIT = TokenBucket(RATE_PER_SEC, RATE_BURST)
+FETCH_STATS = {"requests": 0, "pages": 0, "not_modified": 0, "unchanged": 0, "retries": 0, "failed": 0}
+STATS_LOCK = threading.Lock()  # 爬虫线程一起加，+= 不是原子的
+THREAD_STATS = threading.local()  # 当前线程发了几个请求：planner 按它给每次刷新记账
 
+# 共享 Session：keep-alive 连接池，多线程爬取时复用 TCP/TLS 连接
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE))
 
-def fetch(url, params=None):
+
+metrics.collector(lambda: [("dqd_fetch_total", "counter", "爬虫请求结果",
+                             [({"result": k}, v) for k, v in stats().items()])])
+
+
+def count(name):
+    with STATS_LOCK: FETCH_STATS[name] += 1
+
+
+def stats():
+    with STATS_LOCK: return dict(FETCH_STATS)
+
+
+def thread_requests(): return getattr(THREAD_STATS, "requests", 0)
+
+
+# === 写库 ===
+STANDING_COLS = ("league_id", "team_id", "rank", "matches", "won", "draw", "lost", "goals_pro", "goals_against", "points")
+RANKING_COLS = ("league_id", "type", "rank", "person_id", "name", "team", "count")
+TEAM_COLS = ("team_id", "league_id", "name_cn", "name_en", "founded", "country", "city", "stadium", "capacity", "phone",
+             "email", "address", "logo_url")
+HONOR_COLS = ("team_id", "name", "count", "seasons")
+PLAYER_COLS = ("person_id", "team_id", "name", "position", "number", "avatar_url", "nationality_url")
+PROFILE_COLS = ("person_id", "name_cn", "name_en", "club", "nationality", "height", "weight", "age", "birth_date",
+                "number", "foot", "photo_url", "ability_total", "speed", "shooting", "passing", "dribbling", "defense",
+                "power")
+STAT_COLS = ("person_id", "season", "club", "matches", "starts", "goals", "assists", "yellow", "red")
+FP_COLS = ("url", "etag", "last_modified", "digest")
+
+
+def write_batch(batch, writer=None):
+    """有 writer (批量爬取) 就交给它攒批；没有 (API 触发的单个刷新) 就当场一个事务写掉"""
+    if writer: return writer.submit(batch)
+    if not batch: return
+    conn = get_conn()
     try:
-        if __name__ == "__main__": time.sleep(0.3)
-        res = requests.get(url, headers=HEADERS, params=params, timeout=10)
-        res.raise_for_status()
-        res.encoding = 'utf-8'
-        return res
-    except:
-        return None
+        with metrics.span("db_write", entity=batch.entity, rows=batch.rows):
+            with conn.cursor() as c:
+                bulk_writer.apply(c, [batch])
+            conn.commit()
+    except Exception:
+        metrics.scrape_failed("db_write")
+        raise
+    finally:
+        conn.close()
+    committed(*batch.entity)
 
 
-def clean_text(text): return text.replace(" ", "").strip() if text else ""
+def fetch(url, params=None, headers=None):
+    cause = None
+    for attempt in range(MAX_RETRIES + 1):
+        RATE_LIMIT.acquire()
+        count("requests")  # 每次真发出去的都算，重试也算
+        THREAD_STATS.requests = thread_requests() + 1
+        try:
+            with metrics.span("fetch", url=url, attempt=attempt):
+                res = SESSION.get(url, params=params, headers=headers, timeout=10)
+            if res.status_code == 304:
+                count("not_modified")
+                return res
+            # 429/5xx 值得重试，其它 4xx 直接放弃
+            if res.status_code == 429 or res.status_code >= 500: raise requests.HTTPError(res.status_code)
+            res.raise_for_status()
+            res.encoding = 'utf-8'
+            count("pages")
+            return res
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else e.args[0]
+            cause = "http_429" if status == 429 else f"http_{str(status)[0]}xx"
+            if e.response is not None: break
+        except requests.Timeout:
+            cause = "timeout"
+        except requests.ConnectionError:
+            cause = "connection"
+        except requests.RequestException:
+            cause = "other"
+        if attempt < MAX_RETRIES:
+            count("retries")
+            time.sleep(BACKOFF * 2 ** attempt)
+    count("failed")
+    metrics.scrape_failed(cause)
+    return None
+
+
+# === 增量检测：每个 URL 存一份指纹 (ETag / Last-Modified / 相关片段的哈希) ===
+# 服务器给了 ETag/Last-Modified 就发条件请求，304 连下载都省了；否则对真正用到的 JSON/HTML 片段算哈希，
+# 没变就跳过解析和所有写库
+
+
+def fp_key(url, params=None):
+    return url + ("?" + urlencode(sorted(params.items())) if params else "")
+
+
+def load_fingerprint(c, key):
+    c.execute("SELECT etag, last_modified, digest FROM page_fingerprints WHERE url = %s", (key,))
+    return c.fetchone() or {}
+
+
+def conditional_headers(fp):
+    h = {}
+    if fp.get('etag'): h['If-None-Match'] = fp['etag']
+    if fp.get('last_modified'): h['If-Modified-Since'] = fp['last_modified']
+    return h
+
+
+def save_fingerprint(batch, key, res, digest):
+    # 和数据放在同一个 batch 里，数据写成功指纹才算数
+    batch.upsert("page_fingerprints", FP_COLS, [(key, res.headers.get('ETag'), res.headers.get('Last-Modified'), digest)])
+
+
+def json_digest(data): return hashlib.sha1(json.dumps(data, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+def unchanged(fp, digest):
+    if fp.get('digest') != digest: return False
+    count("unchanged")
+    return True
 
 
 # === 核心功能 1：刷新联赛榜单 (积分/射手/助攻) ===
-def update_league_data(lid):
+# 每个 update_* 拆成两步：取页面 (fetch + 读指纹) 和 process_* (解析成 EntityBatch，不碰网络和数据库)，
+# 同步爬虫和 async_spider 共用 process_*，两边写进库里的东西完全一样
+STANDING_URL = f"{BASE_URL}/sport-data/soccer/biz/data/standing"
+RANKING_URL = f"{BASE_URL}/sport-data/soccer/biz/data/person_ranking"
+
+
+def league_pages(lid):
+    """联赛要抓的接口: [(part, url, params)]，part 是 standing / goals / assists"""
+    base = {"season_id": lid, "app": "dqd", "version": "0", "platform": "web"}
+    return [("standing", STANDING_URL, base)] + [(t, RANKING_URL, dict(base, type=t)) for t in ['goals', 'assists']]
+
+
+def process_league_page(batch, lid, part, key, fp, res):
+    """把一个榜单接口的返回加进 batch；没取到/304/内容没变都什么也不加"""
+    if not res or res.status_code == 304: return
+    lname = LEAGUE_NAMES.get(lid, "未知联赛")
+    try:
+        with metrics.span("parse", page=part, league=lid):
+            digest = _league_rows(batch, lid, part, fp, res)
+        if digest: save_fingerprint(batch, key, res, digest)
+    except Exception as e:
+        metrics.scrape_failed("parse")
+        print(f"❌ [自动爬虫] {lname} {'积分' if part == 'standing' else part} 榜解析失败: {e!r}")
+
+
+def _league_rows(batch, lid, part, fp, res):
+    # 返回这次内容的摘要；内容没变返回 None (什么也不加)
+    if part == "standing":
+        items = res.json()['content']['rounds'][0]['content']['data']
+        digest = json_digest(items)
+        if unchanged(fp, digest): return None
+        batch.upsert("standings", STANDING_COLS, [
+            (lid, i['team_id'], i['rank'], i['matches_total'], i['matches_won'], i['matches_draw'],
+             i['matches_lost'], i['goals_pro'], i['goals_against'], i['points']) for i in items])
+    else:
+        rows = res.json()['content']['data']
+        digest = json_digest(rows)
+        if unchanged(fp, digest): return None
+        batch.replace("rankings", ("league_id", "type"), (lid, part), RANKING_COLS, [
+            (lid, part, p['rank'], p['person_id'], p['person_name'], p['team_name'], p.get('goal', p.get('count')))
+            for p in rows])
+    return digest
+
+
+def update_league_data(lid, writer=None):
     lname = LEAGUE_NAMES.get(lid, "未知联赛")
     print(f"🔄 [自动爬虫] 正在刷新 {lname} 榜单数据...")
     conn = get_conn()
     c = conn.cursor()
-
-    # 1. 积分榜
-    res = fetch("https://www.dongqiudi.com/sport-data/soccer/biz/data/standing",
-                {"season_id": lid, "app": "dqd", "version": "0", "platform": "web"})
-    if res:
-        try:
-            items = res.json()['content']['rounds'][0]['content']['data']
-            for i in items:
-                c.execute("REPLACE INTO standings VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)",
-                          (lid, i['team_id'], i['rank'], i['matches_total'], i['matches_won'], i['matches_draw'],
-                           i['matches_lost'], i['goals_pro'], i['goals_against'], i['points']))
-        except:
-            pass
-
-    # 2. 射手/助攻榜
-    for t in ['goals', 'assists']:
-        res = fetch("https://www.dongqiudi.com/sport-data/soccer/biz/data/person_ranking",
-                    {"season_id": lid, "type": t, "app": "dqd", "version": "0", "platform": "web"})
-        if res:
-            try:
-                c.execute("DELETE FROM rankings WHERE league_id=%s AND type=%s", (lid, t))
-                data = [
-                    (lid, t, p['rank'], p['person_id'], p['person_name'], p['team_name'], p.get('goal', p.get('count')))
-                    for p in res.json()['content']['data']]
-                c.executemany(
-                    "INSERT INTO rankings (league_id, type, `rank`, person_id, name, team, count) VALUES (%s,%s,%s,%s,%s,%s,%s)",
-                    data)
-            except:
-                pass
-
-    conn.commit()
+    batch = bulk_writer.EntityBatch(("league", lid))
+    for part, url, params in league_pages(lid):
+        key = fp_key(url, params)
+        fp = load_fingerprint(c, key)
+        process_league_page(batch, lid, part, key, fp, fetch(url, params, conditional_headers(fp)))
     conn.close()
+    write_batch(batch, writer)
     return True
 
 
 # === 核心功能 2：刷新单个球队 (资料+阵容) ===
-def update_team_data(tid):
+def team_url(tid): return f"{BASE_URL}/team/{tid}.html"
+
+
+def team_fingerprint(fp, lid, stored):
+    """库里的 league_id 和这次不一样 (比如先从接口爬到、还不知道联赛，存成了 0)：
+    页面没变也得重写 teams 这行，所以不发条件请求、不比指纹"""
+    return fp if stored == lid else {}
+
+
+def process_team_page(tid, lid, url, fp, res):
+    """球队页 -> EntityBatch；304 或页面没变返回 None (不解析、不写库)"""
+    if res.status_code == 304: return None
+    try:
+        with metrics.span("parse", page="team", id=tid):
+            soup = page_parser.make_soup(res.text, page_parser.TEAM_SECTIONS)
+            digest = page_parser.sections_digest(soup, page_parser.TEAM_SECTIONS,
+                                                 ",".join(page_parser.PERSON_ID_RE.findall(res.text)))
+            if unchanged(fp, digest): return None
+            info, honors, players = page_parser.parse_team(soup, res.text, tid)
+    except Exception:
+        metrics.scrape_failed("parse")
+        raise
+
+    batch = bulk_writer.EntityBatch(("team", tid, lid))
+    batch.upsert("teams", TEAM_COLS, [
+        (tid, lid, info['name_cn'], info['name_en'], info['founded'], info['country'], info['city'],
+         info['stadium'], info['capacity'], info['phone'], info['email'], info['address'], info['logo'])])
+    batch.replace("honors", ("team_id",), (tid,), HONOR_COLS, honors)
+    batch.upsert("players", PLAYER_COLS, players)
+    save_fingerprint(batch, url, res, digest)
+    return batch
+
+
+def update_team_data(tid, lid=None, writer=None):
     print(f"🔄 [自动爬虫] 正在刷新球队: {tid} ...")
     conn = get_conn()
     c = conn.cursor()
 
-    # 先查一下 league_id，防止覆盖时丢失
+    # 先查一下 league_id，防止覆盖时丢失 (批量爬取时由调用方直接传入)
     c.execute("SELECT league_id FROM teams WHERE team_id = %s", (tid,))
     res = c.fetchone()
-    lid = res['league_id'] if res else 0
+    stored = res['league_id'] if res else None
+    if lid is None: lid = stored or 0
 
-    res = fetch(f"https://www.dongqiudi.com/team/{tid}.html")
-    if not res:
-        conn.close()
-        return False
-
-    soup = BeautifulSoup(res.text, 'html.parser')
-
-    # 解析球队信息
-    info = {"name_cn": "", "name_en": "", "founded": "", "country": "", "city": "", "stadium": "", "capacity": "",
-            "phone": "", "email": "", "address": "", "logo": ""}
-    con = soup.find('div', class_='info-con')
-    if con:
-        if con.find('p', class_='team-name'): info['name_cn'] = con.find('p', class_='team-name').get_text(strip=True)
-        if con.find('p', class_='en-name'): info['name_en'] = con.find('p', class_='en-name').get_text(strip=True)
-        map_ = {"成立": "founded", "国家": "country", "城市": "city", "主场": "stadium", "容纳": "capacity",
-                "电话": "phone", "邮箱": "email", "地址": "address"}
-        for tag in con.find_all(['span', 'p']):
-            txt = tag.get_text(" ", strip=True)
-            for k, v in map_.items():
-                if k in clean_text(txt): info[v] = re.split(r'[:：]', txt)[-1].strip()
-
-    img = soup.find('div', class_='team-info').find('img', class_='team-logo')
-    if img: info['logo'] = img['src']
-
-    c.execute("REPLACE INTO teams VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)",
-              (tid, lid, info['name_cn'], info['name_en'], info['founded'], info['country'], info['city'],
-               info['stadium'], info['capacity'], info['phone'], info['email'], info['address'], info['logo']))
-
-    # 解析荣誉
-    c.execute("DELETE FROM honors WHERE team_id=%s", (tid,))
-    honors = []
-    if soup.find('div', class_='hornor-record'):
-        for h in soup.find('div', class_='hornor-record').find_all('div', class_='hornor-list'):
-            raw = h.find('p', class_='header').get_text(strip=True)
-            name, cnt = raw.split("X") if "X" in raw else (raw, "1")
-            honors.append(
-                (tid, name.strip(), cnt.strip(), h.find('span', class_='during-time').get_text(" ", strip=True)))
-    if honors: c.executemany("INSERT INTO honors (team_id, name, count, seasons) VALUES (%s,%s,%s,%s)", honors)
-
-    # 解析阵容
-    p_ids = re.findall(r'person_id:\s*"(\d+)"', res.text)
-    players = []
-    if soup.find('div', class_='team-player-data'):
-        for i, r in enumerate(soup.find('div', class_='team-player-data').find_all('p', class_='analysis-list-item')):
-            pid = p_ids[i] if i < len(p_ids) else ""
-            if pid:
-                avt = r.find('span', class_='item3').find('img')['src'] if r.find('span', class_='item3').find(
-                    'img') else ""
-                nat = r.find('span', class_='item6').find('img')['src'] if r.find('span', class_='item6').find(
-                    'img') else ""
-                players.append((pid, tid, r.find('span', class_='item3').get_text(strip=True),
-                                r.find('span', class_='item2').get_text(strip=True),
-                                r.find('span', class_='item1').get_text(strip=True), avt, nat))
-
-    if players: c.executemany("REPLACE INTO players VALUES (%s,%s,%s,%s,%s,%s,%s)", players)
-
-    conn.commit()
+    url = team_url(tid)
+    fp = team_fingerprint(load_fingerprint(c, url), lid, stored)
     conn.close()
+    res = fetch(url, headers=conditional_headers(fp))
+    if not res: return False
+    batch = process_team_page(tid, lid, url, fp, res)
+    if batch: write_batch(batch, writer)
     return True
 
 
 # === 核心功能 3：刷新单个球员 ===
-def update_player_data(pid):
+def player_url(pid): return f"{BASE_URL}/player/{pid}.html"
+
+
+def process_player_page(pid, url, fp, res):
+    """球员页 -> EntityBatch；304 或页面没变返回 None"""
+    if res.status_code == 304: return None
+    try:
+        with metrics.span("parse", page="player", id=pid):
+            soup = page_parser.make_soup(res.text, page_parser.PLAYER_SECTIONS)
+            digest = page_parser.sections_digest(soup, page_parser.PLAYER_SECTIONS)
+            if unchanged(fp, digest): return None
+            prof, stats = page_parser.parse_player(soup, pid)
+    except Exception:
+        metrics.scrape_failed("parse")
+        raise
+
+    batch = bulk_writer.EntityBatch(("player", pid))
+    batch.upsert("player_profiles", PROFILE_COLS, [
+        (pid, prof['cn'], prof['en'], prof['club'], prof['nat'], prof['h'], prof['w'], prof['age'], prof['birth'],
+         prof['num'], prof['foot'], prof['pic'], prof['abil'], prof['spd'], prof['sht'], prof['pas'], prof['dri'],
+         prof['def'], prof['pwr'])])
+    batch.replace("player_stats", ("person_id",), (pid,), STAT_COLS, stats)
+    save_fingerprint(batch, url, res, digest)
+    return batch
+
+
+def update_player_data(pid, writer=None):
     print(f"🔄 [自动爬虫] 正在实时抓取球员: {pid} ...")
-    res = fetch(f"https://www.dongqiudi.com/player/{pid}.html")
-    if not res: return False
-    soup = BeautifulSoup(res.text, 'html.parser')
+    url = player_url(pid)
     conn = get_conn()
     c = conn.cursor()
-
-    prof = {"cn": "", "en": "", "club": "", "nat": "", "h": "", "w": "", "age": "", "birth": "", "num": "", "foot": "",
-            "pic": "", "abil": 0, "spd": 0, "sht": 0, "pas": 0, "dri": 0, "def": 0, "pwr": 0}
-    left = soup.find('div', class_='info-left')
-    if left:
-        if left.find('p', class_='china-name'): prof['cn'] = left.find('p', class_='china-name').get_text(strip=True)
-        if left.find('p', class_='en-name'): prof['en'] = left.find('p', class_='en-name').get_text(strip=True)
-        map_ = {"俱乐部": "club", "国籍": "nat", "身高": "h", "年龄": "age", "体重": "w", "号码": "num",
-                "生日": "birth", "惯用脚": "foot"}
-        for li in left.find_all('li'):
-            for k, v in map_.items():
-                if k in clean_text(li.get_text()): prof[v] = re.split(r'[:：]', li.get_text(" ", strip=True))[-1].strip()
-
-    if soup.find('img', class_='player-photo'): prof['pic'] = soup.find('img', class_='player-photo')['src']
-    if soup.find('p', class_='average'):
-        try:
-            prof['abil'] = int(soup.find('p', class_='average').find('b').get_text())
-        except:
-            pass
-
-    chart = soup.find('div', class_='box_chart')
-    if chart:
-        amap = {"速度": "spd", "射门": "sht", "传球": "pas", "盘带": "dri", "防守": "def", "力量": "pwr"}
-        for it in chart.find_all('div', class_='item'):
-            txt = it.get_text()
-            scr = int(re.search(r'\d+', txt).group()) if re.search(r'\d+', txt) else 0
-            for k, v in amap.items():
-                if k in txt: prof[v] = scr
-
-    c.execute("REPLACE INTO player_profiles VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)",
-              (pid, prof['cn'], prof['en'], prof['club'], prof['nat'], prof['h'], prof['w'], prof['age'], prof['birth'],
-               prof['num'], prof['foot'], prof['pic'], prof['abil'], prof['spd'], prof['sht'], prof['pas'], prof['dri'],
-               prof['def'], prof['pwr']))
-
-    c.execute("DELETE FROM player_stats WHERE person_id=%s", (pid,))
-    stats = []
-    wrap = soup.find('div', class_='total-con-wrap')
-    if wrap:
-        for row in wrap.find_all('p', class_='td'):
-            cols = row.find_all('span')
-            if len(cols) >= 9:
-                try:
-                    stats.append((pid, cols[0].get_text(strip=True), cols[1].get_text(strip=True),
-                                  int(cols[2].get_text(strip=True)), int(cols[3].get_text(strip=True)),
-                                  int(cols[4].get_text(strip=True)), int(cols[5].get_text(strip=True)),
-                                  int(cols[6].get_text(strip=True)), int(cols[7].get_text(strip=True))))
-                except:
-                    continue
-    if stats: c.executemany(
-        "INSERT INTO player_stats (person_id, season, club, matches, starts, goals, assists, yellow, red) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)",
-        stats)
-
-    conn.commit()
+    fp = load_fingerprint(c, url)
     conn.close()
+    res = fetch(url, headers=conditional_headers(fp))
+    if not res: return False
+    batch = process_player_page(pid, url, fp, res)
+    if batch: write_batch(batch, writer)
     return True
 
 
-def init_db(): pass
-
-
-def parse_league(name, lid): return []
+# === 批量爬取用：刷新一层，顺便返回下一层要爬的 id ===
+def parse_league(name, lid, writer=None):
+    update_league_data(lid, writer)
+    if writer: writer.flush()  # 下面要从库里读球队列表
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("SELECT team_id FROM standings WHERE league_id = %s", (lid,))
+    tids = [r['team_id'] for r in c.fetchall()]
+    conn.close()
+    return tids
 
 
-def parse_team(tid, lid): return []
+def parse_team(tid, lid, writer=None):
+    if not update_team_data(tid, lid, writer): return []
+    if writer: writer.flush()
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("SELECT person_id FROM players WHERE team_id = %s", (tid,))
+    pids = [r['person_id'] for r in c.fetchall()]
+    conn.close()
+    return pids
 
 
-def parse_player(pid): update_player_data(pid)
+def parse_player(pid, writer=None): return update_player_data(pid, writer)
 
 
-if __name__ == "__main__": pass
\ No newline at end of file
+if __name__ == "__main__": pass
@@ -0,0 +1,235 @@
+import io
+import os
+import re
+import time
+import hashlib
+import threading
+import importlib.util
+
+import datastore
+import metrics
+from rate_limit import TokenBucket
+
+# 没装 Pillow 就只存原图，各个尺寸都回原图
+HAS_PIL = importlib.util.find_spec("PIL") is not None
+
+# === 图片本地化 (队徽/头像/国旗/球员照) ===
+# 接口原来直接把懂球帝 CDN 的图片地址吐给前端，页面加载看第三方 CDN 脸色，一张榜单就要扇出几十个外链请求。
+# 现在爬虫提交球队/球员后，后台线程把相关图片下载下来：
+#   按内容 sha1 存盘 (IMAGE_DIR/orig/ab/<sha1>.png)，同一张默认头像只存一份
+#   顺手缩成前端实际用的几个尺寸 (需要 Pillow)
+#   images 表记 远程 url -> 本地文件，接口格式化时用 local_url() 改写成 /img/<尺寸>/<sha1>.<ext>
+# 文件名就是内容哈希，永不变，所以 /img/* 可以给一年的 immutable 缓存。还没下载到的图片照旧返回原地址
+
+IMAGE_DIR = os.environ.get("DQD_IMAGE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "images"))
+# 前端是跨域直接打 http://localhost:5000/api 的，图片地址也得是绝对的
+IMAGE_BASE = os.environ.get("DQD_IMAGE_BASE", "http://localhost:5000").rstrip("/") + "/img"
+
+# 前端组件里的显示尺寸 (按 2 倍屏)：国旗 w-5 / 列表头像 w-10~w-12 / 队徽 w-8~w-16 / 球员详情大头像 w-36
+SIZES = {"xs": 48, "s": 96, "m": 128, "l": 288}
+EXTS = {"image/png": "png", "image/jpeg": "jpg", "image/gif": "gif", "image/webp": "webp"}
+MIME = {v: k for k, v in EXTS.items()}
+NAME_RE = re.compile(r"^[0-9a-f]{40}\.(png|jpg|gif|webp)$")
+MAX_BYTES = 2 * 1024 * 1024
+RELOAD_INTERVAL = 30  # 秒，API 进程隔这么久从 images 表捡别的进程 (批量爬虫/planner) 新下的图
+CACHE_MAX_AGE = 365 * 24 * 3600
+
+IMAGE_RATE = TokenBucket(20, 20)  # 图片走 CDN，单独限速，不占爬页面的额度
+
+KNOWN = {}  # 远程 url -> "<sha1>.<ext>"，所有格式化函数共用
+
+
+def local_url(url, size="s"):
+    """已经下载过的图片换成本地地址，没有的原样返回"""
+    name = KNOWN.get(url) if url else None
+    return f"{IMAGE_BASE}/{size}/{name}" if name else url
+
+
+def _normalize(url):
+    return "https:" + url if url.startswith("//") else url
+
+
+class ImageStore:
+    def __init__(self, conn_factory, directory=IMAGE_DIR):
+        self.conn_factory = conn_factory
+        self.directory = directory
+        self.pending = {}  # (kind, eid) -> lid，同一个实体连续提交多次只处理一次
+        self.cond = threading.Condition()
+        self.busy = False
+        self.worker = None
+        self.reloader = None
+        self.watermark = 0  # images.fetched_at 读到哪了
+        self.stats = {"downloaded": 0, "deduped": 0, "failed": 0, "thumbnails": 0}
+
+    def path(self, size, name):
+        return os.path.join(self.directory, size, name[:2], name)
+
+    def file_for(self, size, name):
+        """/img/<size>/<name> 对应的文件；没有这个尺寸 (没装 Pillow 或原图比它还小) 就给原图"""
+        if not NAME_RE.match(name) or (size not in SIZES and size != "orig"): return None
+        for p in (self.path(size, name), self.path("orig", name)):
+            if os.path.exists(p): return p
+        return None
+
+    # --- url -> 文件 映射 ---
+    def load(self):
+        """增量读 images 表 (只读 watermark 之后新下的；往回多看几秒，别的进程晚提交的也捡得到)"""
+        conn = None
+        try:
+            conn = self.conn_factory()
+            if not conn: return 0
+            with conn.cursor() as c:
+                c.execute("SELECT url, hash, ext, fetched_at FROM images WHERE fetched_at > %s", (self.watermark - 5,))
+                rows = c.fetchall()
+        except Exception as e:
+            print(f"图片索引读取失败: {e}")
+            return 0
+        finally:
+            if conn: conn.close()
+        for r in rows:
+            KNOWN[r['url']] = f"{r['hash']}.{r['ext']}"
+            self.watermark = max(self.watermark, r['fetched_at'])
+        return len(rows)
+
+    def start_reloader(self):
+        def loop():
+            while True:
+                try:
+                    self.load()
+                except Exception as e:  # 线程死了别的进程下的图就再也捡不到了
+                    print(f"图片索引重读出错: {e}")
+                time.sleep(RELOAD_INTERVAL)
+
+        self.reloader = threading.Thread(target=loop, name="image-reload", daemon=True)
+        self.reloader.start()
+        return self
+
+    # --- 下载 ---
+    def urls_for(self, kind, eid):
+        """实体关联的、还没下载过的图片地址"""
+        conn = None
+        try:
+            conn = self.conn_factory()
+            if not conn: return []
+            with conn.cursor() as c:
+                if kind == "team":
+                    c.execute("SELECT logo_url FROM teams WHERE team_id = %s", (eid,))
+                    urls = [r['logo_url'] for r in c.fetchall()]
+                    c.execute("SELECT avatar_url, nationality_url FROM players WHERE team_id = %s", (eid,))
+                    urls += [u for r in c.fetchall() for u in (r['avatar_url'], r['nationality_url'])]
+                else:
+                    c.execute("SELECT photo_url FROM player_profiles WHERE person_id = %s", (eid,))
+                    urls = [r['photo_url'] for r in c.fetchall()]
+        finally:
+            if conn: conn.close()
+        return list(dict.fromkeys(u for u in urls if u and u not in KNOWN))
+
+    def download(self, url):
+        """下载、按内容存盘、出缩略图、记进 images 表；返回文件名，失败返回 None"""
+        import football_spider  # 用爬虫的 Session，延迟 import 的道理同 refresh.lazy
+        IMAGE_RATE.acquire()
+        try:
+            with metrics.span("fetch", url=url, page="image"):
+                res = football_spider.SESSION.get(_normalize(url), timeout=10)
+            res.raise_for_status()
+        except Exception as e:
+            self.stats["failed"] += 1
+            metrics.scrape_failed("image")
+            print(f"❌ [图片] 下载失败 {url}: {e}")
+            return None
+        ext = EXTS.get(res.headers.get("Content-Type", "").split(";")[0].strip()) or \
+            {"jpeg": "jpg"}.get(url.rsplit(".", 1)[-1].lower(), url.rsplit(".", 1)[-1].lower())
+        if ext not in MIME or len(res.content) > MAX_BYTES:
+            self.stats["failed"] += 1
+            return None
+
+        name = f"{hashlib.sha1(res.content).hexdigest()}.{ext}"
+        if os.path.exists(self.path("orig", name)):
+            self.stats["deduped"] += 1
+        else:
+            self._write(self.path("orig", name), res.content)
+            self._thumbnails(res.content, name)
+            self.stats["downloaded"] += 1
+        self._record(url, name)
+        return name
+
+    def _write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f: f.write(data)
+        os.replace(tmp, path)
+
+    def _thumbnails(self, data, name):
+        if not HAS_PIL: return
+        from PIL import Image
+        try:
+            src = Image.open(io.BytesIO(data))
+            src.load()
+        except Exception as e:
+            print(f"❌ [图片] 无法解析 {name}: {e}")
+            return
+        fmt = {"jpg": "JPEG", "png": "PNG", "webp": "WEBP"}.get(name.rsplit(".", 1)[1])
+        if not fmt: return  # gif 不缩，直接回原图
+        for size, px in SIZES.items():
+            if max(src.size) <= px: continue  # 原图已经够小，直接回原图
+            img = src.copy()
+            img.thumbnail((px, px), Image.LANCZOS)
+            if fmt == "JPEG" and img.mode not in ("RGB", "L"): img = img.convert("RGB")
+            buf = io.BytesIO()
+            img.save(buf, fmt, optimize=True)
+            self._write(self.path(size, name), buf.getvalue())
+            self.stats["thumbnails"] += 1
+
+    def _record(self, url, name):
+        h, ext = name.split(".")
+        now = time.time()
+        conn = self.conn_factory()
+        if conn:
+            try:
+                with conn.cursor() as c:
+                    c.execute("INSERT INTO images (url, hash, ext, fetched_at) VALUES (%s,%s,%s,%s) "
+                              "ON DUPLICATE KEY UPDATE hash = VALUES(hash), ext = VALUES(ext), "
+                              "fetched_at = VALUES(fetched_at)", (url, h, ext, now))
+                conn.commit()
+            except Exception as e:
+                print(f"图片索引写入失败 [{url}]: {e}")
+            finally:
+                conn.close()
+        KNOWN[url] = name
+
+    # --- 提交钩子 / 后台线程 ---
+    def on_commit(self, kind, eid, lid=None):
+        if kind not in ("team", "player"): return
+        with self.cond:
+            self.pending[(kind, eid)] = lid
+            self.cond.notify_all()  # drain() 也在等这个条件，只 notify 一个可能叫醒的是它
+            if self.worker is None:
+                self.worker = threading.Thread(target=self._loop, name="images", daemon=True)
+                self.worker.start()
+
+    def _loop(self):
+        while True:
+            with self.cond:
+                while not self.pending: self.cond.wait()
+                (kind, eid), lid = self.pending.popitem()
+                self.busy = True
+            try:
+                got = [u for u in self.urls_for(kind, eid) if self.download(u)]
+                # 地址变了：响应缓存/快照/搜索结果都要跟着换 (再进来一次时都已下载过，不会循环)
+                if got: datastore.committed(kind, eid, lid)
+            except Exception as e:
+                print(f"❌ [图片] {kind} {eid} 处理失败: {e}")
+            finally:
+                with self.cond:
+                    self.busy = False
+                    self.cond.notify_all()
+
+    def drain(self, timeout=None):
+        """等排队的图片都下完 (批量爬虫结束前调)"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self.cond:
+            while self.pending or self.busy:
+                left = None if deadline is None else deadline - time.time()
+                if left is not None and left <= 0: return False
+                self.cond.wait(left)
+        return True
@@ -0,0 +1,197 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+import threading
+
+import datastore
+import queries
+
+try:
+    import brotli
+
+    HAS_BROTLI = True
+except ImportError:  # 没装 brotli 就只出 gzip
+    HAS_BROTLI = False
+
+# === 联赛快照 ===
+# 看板要的 积分榜+球队资料 / 射手榜 / 助攻榜 原来是三个请求三次 JOIN，每次还要逐行重新拼球队资料。
+# 现在爬虫每次提交联赛 (或该联赛的球队) 后，后台线程把这三样拼成一个带版本号的文档，
+# 序列化好、压缩好，放内存并落盘到 SNAPSHOT_DIR；/api/league/<id>/snapshot 直接吐，不查库。
+# 批量爬虫是另一个进程，API 靠文件 mtime 发现新快照
+
+SNAPSHOT_DIR = os.environ.get("DQD_SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots"))
+RANKING_TYPES = ("goals", "assists")
+DISK_CHECK_INTERVAL = 1.0  # 秒，最多隔这么久看一眼磁盘上有没有别的进程写的新版本
+
+
+class Snapshot:
+    def __init__(self, league_id, version, bodies, mtime):
+        self.league_id = league_id
+        self.version = version
+        self.bodies = bodies  # 编码 -> 字节串，"identity" 一定有
+        self.etag = hashlib.sha1(bodies["identity"]).hexdigest()
+        self.mtime = mtime
+
+    def negotiate(self, accept_encoding):
+        """按 Accept-Encoding 挑一份：br > gzip > 不压缩；返回 (编码或 None, body, etag)"""
+        accepted = {e.split(";")[0].strip() for e in (accept_encoding or "").lower().split(",")}
+        for enc in ("br", "gzip"):
+            if enc in accepted and enc in self.bodies: return enc, self.bodies[enc], f"{self.etag}-{enc}"
+        return None, self.bodies["identity"], self.etag
+
+
+def build_document(conn, league_id, version):
+    with conn.cursor() as c:
+        c.execute(queries.TEAMS_SQL, (league_id,))
+        teams = c.fetchall()
+        rankings = {}
+        for t in RANKING_TYPES:
+            c.execute(queries.RANKINGS_SQL, (league_id, t))
+            rankings[t] = queries.format_rankings(c.fetchall())
+    meta = queries.LEAGUES_META.get(league_id, {})
+    name = datastore.LEAGUE_NAMES.get(league_id, meta.get('cn', ""))
+    return {
+        'league': {'id': league_id, 'name': name, 'cn': meta.get('cn', name),
+                   'fullName': meta.get('fullName', name), 'logo': meta.get('logo', '/default.png')},
+        'version': version, 'generated_at': int(time.time()),
+        'teams': queries.format_teams(teams, league_id),
+        'rankings': rankings,
+    }
+
+
+class SnapshotStore:
+    def __init__(self, conn_factory, directory=SNAPSHOT_DIR, compress=True):
+        self.conn_factory = conn_factory
+        self.directory = directory
+        self.compress = compress
+        self.snapshots = {}  # league_id -> Snapshot
+        self.checked = {}  # league_id -> 上次看磁盘的时间
+        self.pending = set()  # 等着重建的联赛，同一个联赛连续提交多次只建一次
+        self.cond = threading.Condition()
+        self.building = None  # 后台线程正在建的联赛
+        self.worker = None
+        self.stats = {"builds": 0, "build_time": 0.0, "failed": 0, "disk_loads": 0}
+
+    def path(self, league_id, enc=None):
+        suffix = {"gzip": ".gz", "br": ".br"}.get(enc, "")
+        return os.path.join(self.directory, f"league_{league_id}.json{suffix}")
+
+    def get(self, league_id):
+        snap = self.snapshots.get(league_id)
+        now = time.time()
+        if snap and now - self.checked.get(league_id, 0) < DISK_CHECK_INTERVAL: return snap
+        self.checked[league_id] = now
+        try:
+            mtime = os.stat(self.path(league_id)).st_mtime
+        except OSError:
+            return snap
+        if snap is None or mtime > snap.mtime: snap = self._load(league_id, mtime) or snap
+        return snap
+
+    def _load(self, league_id, mtime):
+        bodies = {}
+        try:
+            for enc in ("identity", "gzip", "br"):
+                p = self.path(league_id, enc)
+                if enc == "identity" or os.path.exists(p):
+                    with open(p, "rb") as f: bodies[enc] = f.read()
+            version = json.loads(bodies["identity"])['version']
+        except (OSError, ValueError, KeyError) as e:
+            print(f"读取联赛快照失败 [{league_id}]: {e}")
+            return None
+        self.stats["disk_loads"] += 1
+        snap = self.snapshots[league_id] = Snapshot(league_id, version, bodies, mtime)
+        return snap
+
+    def rebuild(self, league_id):
+        """查三次库拼出新版本，落盘后换掉内存里的；失败返回 None"""
+        start = time.time()
+        prev = self.get(league_id)
+        conn = None
+        try:
+            conn = self.conn_factory()
+            if not conn: return None
+            doc = build_document(conn, league_id, (prev.version if prev else 0) + 1)
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"生成联赛快照失败 [{league_id}]: {e}")
+            return None
+        finally:
+            if conn: conn.close()
+
+        bodies = {"identity": queries.dumps(doc)}
+        if self.compress:
+            bodies["gzip"] = gzip.compress(bodies["identity"], 9, mtime=0)
+            if HAS_BROTLI: bodies["br"] = brotli.compress(bodies["identity"], quality=11)
+        mtime = self._save(league_id, bodies)
+        snap = self.snapshots[league_id] = Snapshot(league_id, doc['version'], bodies, mtime)
+        self.stats["builds"] += 1
+        self.stats["build_time"] += time.time() - start
+        return snap
+
+    def _save(self, league_id, bodies):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # 压缩版先写，不压缩的那份最后写：别的进程看到它的 mtime 变了时其它文件已经就位
+            for enc in sorted(bodies, key=lambda e: e == "identity"):
+                p = self.path(league_id, enc)
+                with open(p + ".tmp", "wb") as f: f.write(bodies[enc])
+                os.replace(p + ".tmp", p)
+            return os.stat(self.path(league_id)).st_mtime
+        except OSError as e:
+            print(f"联赛快照落盘失败 [{league_id}]: {e}")
+            return time.time()
+
+    # --- 爬虫提交后在后台重建 ---
+
+    def on_commit(self, kind, eid, lid=None):
+        # 挂到 datastore.COMMIT_HOOKS：联赛榜单或者该联赛的球队资料变了都要重建
+        if kind == "league": self.schedule(eid)
+        elif kind == "team" and lid: self.schedule(lid)
+
+    def schedule(self, league_id):
+        with self.cond: self._enqueue(int(league_id))
+
+    def _enqueue(self, league_id):
+        self.pending.add(league_id)
+        if self.worker is None:
+            self.worker = threading.Thread(target=self._work, daemon=True, name="league-snapshot")
+            self.worker.start()
+        # drain / get_or_build 也在等这个条件，notify() 可能只叫醒它们，后台线程就一直睡着
+        self.cond.notify_all()
+
+    def get_or_build(self, league_id, timeout=10):
+        """冷启动时接口用：交给后台线程建，并发的请求都等同一次，不各自查一遍库；建不出来返回 None"""
+        snap = self.get(league_id)
+        if snap: return snap
+        league_id = int(league_id)
+        deadline = time.time() + timeout
+        with self.cond:
+            # 正在建的就等它，不再排一次
+            if league_id not in self.snapshots and self.building != league_id: self._enqueue(league_id)
+            while league_id not in self.snapshots and time.time() < deadline and \
+                    (league_id in self.pending or self.building == league_id):
+                self.cond.wait(0.1)
+        return self.snapshots.get(league_id)
+
+    def _work(self):
+        while True:
+            with self.cond:
+                while not self.pending: self.cond.wait()
+                league_id = self.pending.pop()
+                self.building = league_id
+            try:
+                self.rebuild(league_id)
+            finally:
+                with self.cond:
+                    self.building = None
+                    self.cond.notify_all()
+
+    def drain(self, timeout=60):
+        """等排队的快照都建完 (批量爬虫退出前调)"""
+        deadline = time.time() + timeout
+        with self.cond:
+            while (self.pending or self.building is not None) and time.time() < deadline:
+                self.cond.wait(0.1)
@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import threading
+import contextvars
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# === 指标和分阶段耗时 ===
+# 原来只有 print，慢在哪一步 (连库/查询/抓取/解析/写库/序列化) 看不出来。现在:
+#   span("fetch") 之类包住每个阶段，耗时进 dqd_stage_seconds 直方图，开了 trace 还会写一行 JSON
+#   inc()/observe() 记计数器和直方图，collector() 注册导出时现算的值 (连接池、缓存命中等)
+#   render() 输出 Prometheus 文本格式，API 挂在 /metrics
+# 只用标准库，不依赖 prometheus_client
+# trace: 设 DQD_TRACE_FILE=/path/trace.jsonl，或者调 enable_trace(path)
+
+BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+
+# 当前请求/刷新任务的 trace id，同一个请求里的 span 在 trace 里能串起来
+TRACE_ID = contextvars.ContextVar("dqd_trace_id", default=None)
+
+
+def _escape(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(key):
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}" if key else ""
+
+
+def _num(v):
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class Registry:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self.counters = {}  # name -> {labels: value}
+        self.histograms = {}  # name -> {labels: [各桶计数..., +Inf 桶, sum]}
+        self.help = {}  # name -> 说明
+        self.collectors = []
+
+    def describe(self, name, text):
+        self.help[name] = text
+
+    def inc(self, name, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            h = series.get(key)
+            if h is None: h = series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            h[bisect_left(self.buckets, value)] += 1
+            h[-1] += value
+
+    def collector(self, func):
+        """func() -> [(name, 'counter'|'gauge', 说明, [(labels dict, value)])]，导出时才调"""
+        self.collectors.append(func)
+        return func
+
+    def value(self, name, **labels):
+        return self.counters.get(name, {}).get(tuple(sorted(labels.items())), 0)
+
+    def render(self):
+        out = []
+
+        def head(name, kind, text=None):
+            text = text or self.help.get(name)
+            if text: out.append(f"# HELP {name} {text}")
+            out.append(f"# TYPE {name} {kind}")
+
+        with self.lock:
+            counters = {n: dict(s) for n, s in self.counters.items()}
+            histograms = {n: {k: list(h) for k, h in s.items()} for n, s in self.histograms.items()}
+        for name in sorted(counters):
+            head(name, "counter")
+            for key, v in sorted(counters[name].items()): out.append(f"{name}{_labels(key)} {_num(v)}")
+        for name in sorted(histograms):
+            head(name, "histogram")
+            for key, h in sorted(histograms[name].items()):
+                cum = 0
+                for i, b in enumerate(self.buckets):
+                    cum += h[i]
+                    out.append(f"{name}_bucket{_labels(key + (('le', _num(b)),))} {cum}")
+                cum += h[len(self.buckets)]
+                out.append(f"{name}_bucket{_labels(key + (('le', '+Inf'),))} {cum}")
+                out.append(f"{name}_sum{_labels(key)} {_num(round(h[-1], 6))}")
+                out.append(f"{name}_count{_labels(key)} {cum}")
+        for func in self.collectors:
+            try:
+                for name, kind, text, samples in func():
+                    head(name, kind, text)
+                    for labels, v in samples:
+                        out.append(f"{name}{_labels(tuple(sorted(labels.items())))} {_num(v)}")
+            except Exception as e:
+                print(f"指标收集出错 [{getattr(func, '__name__', func)}]: {e}")
+        return "\n".join(out) + "\n"
+
+
+class Tracer:
+    """每个 span 一行 JSON: {"ts", "trace", "span", "ms", "error", ...额外字段}"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, stage, sec, fields, error=None):
+        rec = {"ts": round(time.time(), 3), "trace": TRACE_ID.get(), "span": stage, "ms": round(sec * 1000, 3)}
+        rec.update(fields)
+        if error: rec["error"] = error
+        line = json.dumps(rec, ensure_ascii=False, default=str) + "\n"
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()
+
+    def close(self):
+        with self.lock: self.file.close()
+
+
+REGISTRY = Registry()
+REGISTRY.describe("dqd_stage_seconds", "各阶段耗时 (fetch/parse/db_connect/db_write/query/serialize/analytics)")
+REGISTRY.describe("dqd_scrape_failures_total", "抓取失败次数，按原因")
+REGISTRY.describe("dqd_update_cache_total", "刷新时间戳 (UPDATE_CACHE) 查询结果: hit=没过期 stale=过期 miss=从没刷新过")
+REGISTRY.describe("dqd_http_request_seconds", "接口耗时，按路由")
+REGISTRY.describe("dqd_http_requests_total", "接口请求数，按路由和状态码")
+TRACER = Tracer(os.environ["DQD_TRACE_FILE"]) if os.environ.get("DQD_TRACE_FILE") else None
+
+inc = REGISTRY.inc
+observe = REGISTRY.observe
+collector = REGISTRY.collector
+render = REGISTRY.render
+
+
+def enable_trace(path):
+    global TRACER
+    if TRACER: TRACER.close()
+    TRACER = Tracer(path) if path else None
+
+
+@contextmanager
+def span(stage, **fields):
+    """计一个阶段的耗时；fields 只进 trace，不做指标标签 (免得标签基数爆炸)"""
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        sec = time.perf_counter() - start
+        REGISTRY.observe("dqd_stage_seconds", sec, stage=stage)
+        if TRACER: TRACER.write(stage, sec, fields, error)
+
+
+def scrape_failed(cause):
+    inc("dqd_scrape_failures_total", cause=cause)
@@ -0,0 +1,147 @@
+import re
+import hashlib
+from bs4 import BeautifulSoup, SoupStrainer
+
+# === 球队/球员页面解析 ===
+# 解析是纯 CPU 活，又占着 GIL，所以:
+#   1. 只建用得到的那几个区块的树 (SoupStrainer)，有 lxml 就用 lxml 分词
+#   2. 每个节点只 find 一次，循环里不再反复 find 同一个 span
+# 后端可切换，"full" 就是原来整页 html.parser 的做法，用来对拍和跑基准
+
+TEAM_SECTIONS = ['info-con', 'team-info', 'hornor-record', 'team-player-data']
+PLAYER_SECTIONS = ['info-left', 'player-photo', 'average', 'box_chart', 'total-con-wrap']
+
+TEAM_FIELDS = {"成立": "founded", "国家": "country", "城市": "city", "主场": "stadium", "容纳": "capacity",
+               "电话": "phone", "邮箱": "email", "地址": "address"}
+PLAYER_FIELDS = {"俱乐部": "club", "国籍": "nat", "身高": "h", "年龄": "age", "体重": "w", "号码": "num",
+                 "生日": "birth", "惯用脚": "foot"}
+ABILITY_FIELDS = {"速度": "spd", "射门": "sht", "传球": "pas", "盘带": "dri", "防守": "def", "力量": "pwr"}
+
+PERSON_ID_RE = re.compile(r'person_id:\s*"(\d+)"')
+SPLIT_RE = re.compile(r'[:：]')
+DIGIT_RE = re.compile(r'\d+')
+
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+BACKENDS = ["full", "strainer", "lxml"]
+BACKEND = "lxml" if HAS_LXML else "strainer"
+
+
+def clean_text(text): return text.replace(" ", "").strip() if text else ""
+
+
+def make_soup(html, sections, backend=None):
+    backend = backend or BACKEND
+    if backend == "full": return BeautifulSoup(html, 'html.parser')
+    builder = 'lxml' if backend == "lxml" and HAS_LXML else 'html.parser'
+    return BeautifulSoup(html, builder, parse_only=SoupStrainer(class_=sections))
+
+
+def sections_digest(soup, sections, extra=""):
+    # 指纹只看用得到的区块，和用哪个解析后端无关
+    body = "".join(str(t) for t in soup.find_all(class_=sections))
+    return hashlib.sha1((body + extra).encode()).hexdigest()
+
+
+def _text(node): return node.get_text(strip=True) if node else ""
+
+
+def _src(node):
+    img = node.find('img') if node else None
+    return img['src'] if img else ""
+
+
+def parse_team(soup, html, tid):
+    """返回 (info, honors, players)，和原来 update_team_data 里的解析结果一致"""
+    info = {"name_cn": "", "name_en": "", "founded": "", "country": "", "city": "", "stadium": "", "capacity": "",
+            "phone": "", "email": "", "address": "", "logo": ""}
+    con = soup.find('div', class_='info-con')
+    if con:
+        info['name_cn'] = _text(con.find('p', class_='team-name'))
+        info['name_en'] = _text(con.find('p', class_='en-name'))
+        for tag in con.find_all(['span', 'p']):
+            txt = tag.get_text(" ", strip=True)
+            key = clean_text(txt)
+            for k, v in TEAM_FIELDS.items():
+                if k in key: info[v] = SPLIT_RE.split(txt)[-1].strip()
+
+    head = soup.find('div', class_='team-info')
+    img = head.find('img', class_='team-logo') if head else None
+    if img: info['logo'] = img['src']
+
+    honors = []
+    record = soup.find('div', class_='hornor-record')
+    if record:
+        for h in record.find_all('div', class_='hornor-list'):
+            raw = h.find('p', class_='header').get_text(strip=True)
+            name, cnt = raw.split("X") if "X" in raw else (raw, "1")
+            honors.append(
+                (tid, name.strip(), cnt.strip(), h.find('span', class_='during-time').get_text(" ", strip=True)))
+
+    p_ids = PERSON_ID_RE.findall(html)
+    players = []
+    squad = soup.find('div', class_='team-player-data')
+    if squad:
+        for i, r in enumerate(squad.find_all('p', class_='analysis-list-item')):
+            pid = p_ids[i] if i < len(p_ids) else ""
+            if not pid: continue
+            # 一行里的 span 一次性按 class 收集，不再每个字段 find 一遍
+            cols = {}
+            for sp in r.find_all('span'):
+                for cls in sp.get('class') or ():
+                    cols.setdefault(cls, sp)
+            name = cols.get('item3')
+            players.append((pid, tid, _text(name), _text(cols.get('item2')), _text(cols.get('item1')),
+                            _src(name), _src(cols.get('item6'))))
+    return info, honors, players
+
+
+def parse_player(soup, pid):
+    """返回 (prof, stats)，和原来 update_player_data 里的解析结果一致"""
+    prof = {"cn": "", "en": "", "club": "", "nat": "", "h": "", "w": "", "age": "", "birth": "", "num": "", "foot": "",
+            "pic": "", "abil": 0, "spd": 0, "sht": 0, "pas": 0, "dri": 0, "def": 0, "pwr": 0}
+    left = soup.find('div', class_='info-left')
+    if left:
+        prof['cn'] = _text(left.find('p', class_='china-name'))
+        prof['en'] = _text(left.find('p', class_='en-name'))
+        for li in left.find_all('li'):
+            key = clean_text(li.get_text())
+            hits = [v for k, v in PLAYER_FIELDS.items() if k in key]
+            if hits:
+                val = SPLIT_RE.split(li.get_text(" ", strip=True))[-1].strip()
+                for v in hits: prof[v] = val
+
+    photo = soup.find('img', class_='player-photo')
+    if photo: prof['pic'] = photo['src']
+    avg = soup.find('p', class_='average')
+    if avg:
+        try:
+            prof['abil'] = int(avg.find('b').get_text())
+        except (AttributeError, ValueError):
+            pass  # 没有能力值 (比如刚转会) 就保持默认
+
+    chart = soup.find('div', class_='box_chart')
+    if chart:
+        for it in chart.find_all('div', class_='item'):
+            txt = it.get_text()
+            m = DIGIT_RE.search(txt)
+            scr = int(m.group()) if m else 0
+            for k, v in ABILITY_FIELDS.items():
+                if k in txt: prof[v] = scr
+
+    stats = []
+    wrap = soup.find('div', class_='total-con-wrap')
+    if wrap:
+        for row in wrap.find_all('p', class_='td'):
+            cols = row.find_all('span')
+            if len(cols) >= 9:
+                try:
+                    vals = [c.get_text(strip=True) for c in cols[:8]]
+                    stats.append((pid, vals[0], vals[1], *(int(v) for v in vals[2:8])))
+                except ValueError:
+                    continue  # 数字列是 "-" 之类的行跳过
+    return prof, stats
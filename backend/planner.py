@@ -0,0 +1,368 @@
+import os
+import sys
+import math
+import time
+import argparse
+import threading
+from datetime import datetime, timezone
+
+import datastore
+import db_pool
+import image_store
+import league_snapshot
+import metrics
+import state_store
+from refresh import MAX_WORKERS, RefreshScheduler, lazy
+from singleflight import MySQLSingleFlight
+
+# === 刷新计划 (按优先级定时刷新，取代"有人看才爬") ===
+# 原来数据新不新全看有没有人点开：热门球队 5 分钟爬一次，冷门的永远不爬，比赛日没人看积分榜就一直是旧的。
+# 现在由 planner 统一安排：
+#   refresh_queue 表里记着每个联赛/球队/球员 (爬下来的自动登记)、访问热度 (接口攒着批量写)、失败退避
+#   优先级 = 过期程度 (年龄/ttl) × (1 + log(1 + 访问热度)) × 比赛日加成；没过 ttl 的不排
+#   每分钟固定的请求预算，按优先级从高往低花，花完等下一轮；排的时候按 COST 预估占着，
+#   跑完按爬虫真正发出去的请求数扣 (重试也算)，超支了欠着，下一分钟先还
+# 热门的到点就刷，冷门的过期越久优先级越高，迟早轮得到；比赛时段联赛/球队的 ttl 缩短并加权
+# 运行方式 (DQD_PLANNER):
+#   off      : 默认，和以前一样看的时候过期就刷
+#   embedded : API 进程里起一个 planner 线程 (只适合单进程部署，多个 worker 会各花一份预算)
+#   external : API 只记访问、只在库里完全没有时当场爬；另起 python planner.py 常驻
+#              (刷新时间戳要放共享的地方：DQD_REFRESH_STORE 不配时两边默认都是 mysql，也可以配 redis)
+
+REQUEST_BUDGET = int(os.environ.get("DQD_PLANNER_BUDGET", 60))  # 每分钟最多发多少个请求
+TICK = 5  # 几秒排一次
+RELOAD_INTERVAL = 60  # 几秒从库里重读一次队列 (接口那边攒的访问热度、新登记的实体)
+DISCOVER_INTERVAL = 600  # 几秒从 standings/players 登记一次新实体
+HALF_LIFE = 6 * 3600  # 访问热度半衰期
+NEVER_REFRESHED = 10  # 从没刷新过的，当作已经过期了 10 个 ttl
+MAX_BACKOFF = 6 * 3600  # 连续失败的退避上限
+
+COST = {"league": 3, "team": 1, "player": 1}  # 排的时候的预估：联赛一次要抓 积分榜+射手榜+助攻榜 (football_spider.league_pages)
+
+# 比赛时段 (UTC)：(星期几 0=周一, 开始小时, 结束小时)。五大联赛周五晚到周一晚，外加周二/三晚的补赛
+DEFAULT_MATCH_WINDOWS = [(4, 18, 24), (5, 11, 24), (6, 11, 24), (0, 0, 2), (0, 17, 24), (1, 17, 24), (2, 17, 24)]
+MATCH_WINDOWS = {}  # league_id -> 窗口列表，没配的用默认
+MATCHDAY_TTL = {"league": 60, "team": 600}  # 比赛时段里的 ttl；球员不加速
+MATCHDAY_BOOST = 4
+
+UPDATE_LEAGUE = lazy("football_spider", "update_league_data")
+UPDATE_TEAM = lazy("football_spider", "update_team_data")
+UPDATE_PLAYER = lazy("football_spider", "update_player_data")
+UPDATERS = {
+    "league": lambda e: (UPDATE_LEAGUE, int(e["entity_id"])),
+    "team": lambda e: (UPDATE_TEAM, e["entity_id"], e["league_id"]),
+    "player": lambda e: (UPDATE_PLAYER, e["entity_id"]),
+}
+
+UPSERT_ACCESS_SQL = ("INSERT INTO refresh_queue (cache_key, kind, entity_id, hits, last_access) VALUES (%s,%s,%s,%s,%s) "
+                     "ON DUPLICATE KEY UPDATE hits = VALUES(hits), last_access = VALUES(last_access)")
+REGISTER_SQL = ("INSERT INTO refresh_queue (cache_key, kind, entity_id, league_id) VALUES (%s,%s,%s,%s) "
+                "ON DUPLICATE KEY UPDATE league_id = VALUES(league_id)")
+
+
+def thread_requests():
+    """当前线程里爬虫真正发出去的请求数；爬虫还没 import 过就是一个都没发"""
+    spider = sys.modules.get("football_spider")
+    return spider.thread_requests() if spider else 0
+
+
+def split_key(key):
+    """'team_50000513' -> ('team', '50000513')；不是 planner 管的 key 返回 None"""
+    kind, _, eid = key.partition("_")
+    return (kind, eid) if kind in UPDATERS and eid else None
+
+
+def heat(hits, last_access, now):
+    """按半衰期衰减后的访问次数"""
+    if not hits or not last_access: return 0.0
+    return hits * 0.5 ** (max(0.0, now - last_access) / HALF_LIFE)
+
+
+def in_match_window(lid, now):
+    dt = datetime.fromtimestamp(now, timezone.utc)
+    return any(dt.weekday() == wd and start <= dt.hour < end for wd, start, end in MATCH_WINDOWS.get(lid, DEFAULT_MATCH_WINDOWS))
+
+
+def priority(age, ttl, hot, matchday):
+    staleness = NEVER_REFRESHED if age is None else age / ttl
+    return staleness * (1 + math.log1p(hot)) * (MATCHDAY_BOOST if matchday else 1)
+
+
+class AccessLog:
+    """接口这边记访问次数，攒 interval 秒合并写一次 refresh_queue。
+    多个进程同时合并同一个 key 会丢几次计数，热度只是个估计，不在乎"""
+
+    def __init__(self, conn_factory, interval=30):
+        self.conn_factory = conn_factory
+        self.interval = interval
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def touch(self, key):
+        if not split_key(key): return
+        with self.lock:
+            self.pending[key] = self.pending.get(key, 0) + 1
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._loop, name="access-log", daemon=True)
+                self.thread.start()
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:  # 线程死了 pending 就只进不出
+                print(f"访问记录写入出错: {e}")
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        if not pending: return 0
+        conn = None
+        try:
+            conn = self.conn_factory()
+            if not conn:
+                self._restore(pending)
+                return 0
+            keys = list(pending)
+            with conn.cursor() as c:
+                c.execute(f"SELECT cache_key, hits, last_access FROM refresh_queue WHERE cache_key IN "
+                          f"({','.join(['%s'] * len(keys))})", keys)
+                old = {r['cache_key']: r for r in c.fetchall()}
+                now = time.time()
+                rows = []
+                for key, n in pending.items():
+                    r = old.get(key) or {}
+                    rows.append((key, *split_key(key), heat(r.get('hits'), r.get('last_access'), now) + n, now))
+                c.executemany(UPSERT_ACCESS_SQL, rows)
+            conn.commit()
+            return len(rows)
+        except Exception as e:
+            print(f"访问记录写入失败 [{len(pending)} 个]: {e}")
+            self._restore(pending)
+            return 0
+        finally:
+            if conn: conn.close()
+
+    def _restore(self, pending):
+        # 没写进去的放回去下次再写
+        with self.lock:
+            for key, n in pending.items(): self.pending[key] = self.pending.get(key, 0) + n
+
+
+class Planner:
+    def __init__(self, scheduler, conn_factory, budget=REQUEST_BUDGET, clock=time.time, meter=thread_requests):
+        self.scheduler = scheduler  # RefreshScheduler：真正执行、单飞去重、写刷新时间戳都复用它
+        self.conn_factory = conn_factory
+        self.budget = budget
+        self.clock = clock
+        self.tokens = float(budget)  # 起步就给一分钟的量
+        self.last_tick = clock()
+        self.meter = meter  # 当前线程累计发了多少请求，刷新前后一减就是这次真花的
+        self.reserved = 0  # 排上了还没跑完的刷新按 COST 预估占着的预算
+        self.entries = {}  # cache_key -> refresh_queue 的一行，外加 refreshed_at
+        self.loaded_at = self.discovered_at = 0
+        self.due = 0  # 上一轮排出来的过期实体数
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    # --- 队列 ---
+    def discover(self):
+        """把库里已有的联赛/球队/球员登记进队列，顺便更新它们所属的联赛"""
+        conn = None
+        try:
+            conn = self.conn_factory()
+            if not conn: return 0
+            with conn.cursor() as c:
+                rows = [(f"league_{lid}", "league", str(lid), lid) for lid in datastore.LEAGUE_NAMES]
+                c.execute("SELECT team_id, league_id FROM standings")
+                rows += [(f"team_{r['team_id']}", "team", r['team_id'], r['league_id']) for r in c.fetchall()]
+                c.execute("SELECT p.person_id, s.league_id FROM players p LEFT JOIN standings s ON s.team_id = p.team_id")
+                rows += [(f"player_{r['person_id']}", "player", r['person_id'], r['league_id']) for r in c.fetchall()]
+                c.executemany(REGISTER_SQL, rows)
+            conn.commit()
+            self.discovered_at = self.clock()
+            return len(rows)
+        except Exception as e:
+            print(f"刷新队列登记失败: {e}")
+            return 0
+        finally:
+            if conn: conn.close()
+
+    def load(self):
+        """重读整个队列和每个 key 上次刷新的时间 (store 有 get_many 就一次读完)"""
+        conn = None
+        try:
+            conn = self.conn_factory()
+            if not conn: return False
+            with conn.cursor() as c:
+                c.execute("SELECT cache_key, kind, entity_id, league_id, hits, last_access, failures, retry_at "
+                          "FROM refresh_queue")
+                rows = {r['cache_key']: dict(r) for r in c.fetchall() if r['kind'] in UPDATERS}
+        except Exception as e:
+            print(f"刷新队列读取失败: {e}")
+            return False
+        finally:
+            if conn: conn.close()
+        store = self.scheduler.store
+        get_many = getattr(store, "get_many", None)
+        ts = get_many(list(rows)) if get_many else {k: store.get(k) for k in rows}
+        with self.lock:
+            for key, r in rows.items():
+                old = self.entries.get(key)
+                # 自己刚刷完、store 那边还没读到的，以自己的为准
+                r['refreshed_at'] = max(ts.get(key) or 0, old['refreshed_at'] if old else 0) or None
+            self.entries = rows
+        self.loaded_at = self.clock()
+        return True
+
+    # --- 排优先级 ---
+    def plan(self, now=None):
+        """返回 [(优先级, key, 复查用的 max_age)]，高的在前；没过期的、在跑的、退避中的不排"""
+        now = self.clock() if now is None else now
+        in_flight = self.scheduler.in_flight
+        out = []
+        with self.lock:
+            entries = list(self.entries.items())
+        for key, e in entries:
+            if key in in_flight or (e['retry_at'] or 0) > now: continue
+            kind = e['kind']
+            matchday = kind in MATCHDAY_TTL and bool(e['league_id']) and in_match_window(e['league_id'], now)
+            ttl = MATCHDAY_TTL[kind] if matchday else self.scheduler.ttl_for(key)
+            age = now - e['refreshed_at'] if e['refreshed_at'] else None
+            if age is not None and age < ttl: continue
+            out.append((priority(age, ttl, heat(e['hits'], e['last_access'], now), matchday), key, ttl))
+        out.sort(reverse=True)
+        return out
+
+    def tick(self):
+        """补预算、按需重读队列、从优先级最高的开始花预算；返回这一轮排上的 key"""
+        now = self.clock()
+        with self.lock:
+            self.tokens = min(float(self.budget), self.tokens + (now - self.last_tick) * self.budget / 60)
+        self.last_tick = now
+        if now - self.discovered_at >= DISCOVER_INTERVAL: self.discover()
+        if now - self.loaded_at >= RELOAD_INTERVAL: self.load()
+
+        plan = self.plan(now)
+        self.due = len(plan)
+        started = []
+        for _, key, ttl in plan:
+            e = self.entries[key]
+            cost = COST[e['kind']]
+            with self.lock:
+                if cost > self.tokens - self.reserved: break  # 严格按优先级，不让便宜的插队
+                self.reserved += cost
+            func, *args = UPDATERS[e['kind']](e)
+            fut = self.scheduler.submit(key, ttl, self._metered, func, *args)
+            fut.add_done_callback(lambda f, key=key, cost=cost: self._done(key, f, cost))
+            started.append(key)
+        return started
+
+    def _metered(self, func, *args):
+        # 在刷新线程里跑：前后数一下这个线程发了几个请求，有多少扣多少，可以扣成负的
+        before = self.meter()
+        try:
+            return func(*args)
+        finally:
+            with self.lock: self.tokens -= self.meter() - before
+
+    def _done(self, key, fut, cost):
+        with self.lock: self.reserved -= cost
+        ok = fut.result()  # RefreshScheduler._run 自己兜住了异常，这里只会是 True/False
+        e = self.entries.get(key)
+        metrics.inc("dqd_planner_refresh_total", kind=key.partition("_")[0], result="ok" if ok else "failed")
+        if not e: return
+        now = self.clock()
+        if ok:
+            e['refreshed_at'] = now
+            if not e['failures']: return
+            e['failures'], e['retry_at'] = 0, 0
+        else:
+            e['failures'] = (e['failures'] or 0) + 1
+            e['retry_at'] = now + min(MAX_BACKOFF, 60 * 2 ** e['failures'])
+        self._save_backoff(key, e['failures'], e['retry_at'])
+
+    def _save_backoff(self, key, failures, retry_at):
+        conn = None
+        try:
+            conn = self.conn_factory()
+            if not conn: return
+            with conn.cursor() as c:
+                c.execute("UPDATE refresh_queue SET failures = %s, retry_at = %s WHERE cache_key = %s",
+                          (failures, retry_at, key))
+            conn.commit()
+        except Exception as e:
+            print(f"刷新队列写入失败 [{key}]: {e}")
+        finally:
+            if conn: conn.close()
+
+    # --- 常驻 ---
+    def run(self):
+        print(f"🗓️ [刷新计划] 启动，每分钟预算 {self.budget} 个请求")
+        while not self.stop_event.is_set():
+            try:
+                started = self.tick()
+                if started: print(f"🗓️ [刷新计划] 排上 {len(started)} 个 (待刷 {self.due}, 剩余预算 {self.tokens:.0f})")
+            except Exception as e:
+                print(f"刷新计划出错: {e}")
+            self.stop_event.wait(TICK)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="planner", daemon=True)
+        self.thread.start()
+        metrics.collector(self._metrics)
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _metrics(self):
+        return [
+            ("dqd_planner_queue_size", "gauge", "刷新队列里的实体数", [({}, len(self.entries))]),
+            ("dqd_planner_due", "gauge", "上一轮排出来已过期待刷的实体数", [({}, self.due)]),
+            ("dqd_planner_tokens", "gauge", "这一分钟剩余的请求预算", [({}, round(self.tokens, 2))]),
+        ]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="按优先级定时刷新 (和 API 分开跑)")
+    ap.add_argument("--budget", type=int, default=REQUEST_BUDGET, help="每分钟最多发多少个请求")
+    ap.add_argument("--workers", type=int, default=MAX_WORKERS)
+    ap.add_argument("--show", type=int, metavar="N", help="只打印当前优先级最高的 N 个，不刷新")
+    ap.add_argument("--init-db", action="store_true", help="先建表")
+    args = ap.parse_args(argv)
+
+    if args.init_db: datastore.init_db()
+    # 单独跑时刷新时间戳默认放 MySQL，和 API 共用
+    kind = state_store.default_kind("external")
+    if kind == "memory": print("⚠️ DQD_REFRESH_STORE=memory：planner 和 API 各记各的刷新时间，API 看不到这边刷过")
+    redis_config = {"host": os.environ.get("DQD_REDIS_HOST", "127.0.0.1"), "port": int(os.environ.get("DQD_REDIS_PORT", 6379))}
+    scheduler = RefreshScheduler(max_workers=args.workers, flight=MySQLSingleFlight(db_pool.dedicated_conn),
+                                 store=state_store.make_store(kind, datastore.get_conn, redis_config))
+    # 单独跑时提交钩子也得自己挂：快照落盘给 API 捡，图片下载到本地
+    snapshots = league_snapshot.SnapshotStore(datastore.get_conn)
+    images = image_store.ImageStore(datastore.get_conn)
+    datastore.COMMIT_HOOKS.extend([snapshots.on_commit, images.on_commit])
+    planner = Planner(scheduler, datastore.get_conn, args.budget)
+    planner.discover()
+    planner.load()
+
+    if args.show:
+        now = time.time()
+        for score, key, ttl in planner.plan(now)[:args.show]:
+            e = planner.entries[key]
+            age = f"{now - e['refreshed_at']:.0f}s" if e['refreshed_at'] else "从没刷过"
+            print(f"{score:10.2f}  {key:<24} 年龄 {age:<10} ttl {ttl:<5} 热度 {heat(e['hits'], e['last_access'], now):.1f}")
+        return
+
+    try:
+        planner.run()
+    except KeyboardInterrupt:
+        planner.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+import os
+import re
+import sys
+import time
+import threading
+from bisect import bisect_left, bisect_right
+
+from image_store import local_url
+
+# === 球员搜索 ===
+# 原来每敲一个字就是一次三表 JOIN + LIKE '%xx%' 全表扫描。现在:
+#   1. MIGRATIONS: 给筛选/排序/JOIN 用到的列补上索引 (SQL 兜底路径和建索引时的全量读取用)
+#   2. SearchIndex: 爬完把球员全量读进内存，建中英文名字的 1/2-gram 倒排 (代替 ngram 全文索引，
+#      LIKE '%xx%' 的语义不变) + 联赛/球队/惯用脚倒排，
+#      结果按 (能力值降序, person_id) 预排好，筛选全用位图，keyset 翻页，顺带算联赛/位置/惯用脚分面计数
+# 爬虫每次提交只标脏，查询时发现脏了就在后台线程重建，查询期间一直用旧索引。
+# 别的进程写的库：commit_log 回放过来一样标脏 (见 datastore.CommitFeed)；再兜个底，索引超过 MAX_AGE 也重建
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+REBUILD_INTERVAL = 30  # 秒，两次重建之间至少隔这么久
+MAX_AGE = int(os.environ.get("DQD_SEARCH_MAX_AGE", 600))  # 秒，没标脏也最多隔这么久重建一次
+NAME_FIELDS = ('name', 'name_cn', 'name_en')  # 名字搜索匹配这几列
+
+MIGRATIONS = [
+    ("teams", "idx_league", "ALTER TABLE teams ADD INDEX idx_league (league_id)"),
+    ("players", "idx_team_pos", "ALTER TABLE players ADD INDEX idx_team_pos (team_id, position)"),
+    ("player_profiles", "idx_ability", "ALTER TABLE player_profiles ADD INDEX idx_ability (ability_total, person_id)"),
+    ("player_profiles", "idx_foot_ability", "ALTER TABLE player_profiles ADD INDEX idx_foot_ability (foot, ability_total)"),
+    ("player_profiles", "idx_nationality", "ALTER TABLE player_profiles ADD INDEX idx_nationality (nationality)"),
+]
+
+SEARCH_SQL = """
+    SELECT p.person_id, p.name, p.team_id, p.position, p.avatar_url, t.league_id,
+           t.name_cn AS team_name, t.logo_url AS team_logo, pp.name_cn, pp.name_en,
+           pp.age, pp.nationality, pp.ability_total, pp.foot, pp.number
+    FROM players p
+             JOIN teams t ON p.team_id = t.team_id
+             LEFT JOIN player_profiles pp ON p.person_id = pp.person_id
+"""
+
+AGE_RE = re.compile(r'\d+')
+
+
+def migrate(conn):
+    """补索引，已经有的跳过，可以反复跑"""
+    with conn.cursor() as c:
+        for table, name, sql in MIGRATIONS:
+            c.execute("SELECT 1 FROM information_schema.statistics WHERE table_schema = DATABASE() "
+                      "AND table_name = %s AND index_name = %s LIMIT 1", (table, name))
+            if c.fetchone(): continue
+            print(f"🔧 [搜索] {sql}")
+            c.execute(sql)
+    conn.commit()
+
+
+def _num(v):
+    if v is None or v == "": return None
+    if isinstance(v, (int, float)): return v
+    m = AGE_RE.search(str(v))
+    return int(m.group()) if m else None
+
+
+def _grams(text):
+    text = text.lower()
+    out = set(text)
+    out.update(text[i:i + 2] for i in range(len(text) - 1))
+    out.discard(" ")
+    return out
+
+
+def _query_grams(q):
+    return [q] if len(q) == 1 else [q[i:i + 2] for i in range(len(q) - 1)]
+
+
+def _intersect(lists):
+    lists = sorted(lists, key=len)
+    result = lists[0]
+    for other in lists[1:]:
+        s = set(other)
+        result = [i for i in result if i in s]
+        if not result: break
+    return result
+
+
+def _mask(idxs, nbits):
+    # 行号列表 -> 位图 (Python 大整数)，第 i 位为 1 表示第 i 行命中
+    buf = bytearray((nbits >> 3) + 1)
+    for i in idxs: buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _bits(mask, limit):
+    # 从低位开始取前 limit 个为 1 的位，也就是排序最靠前的 limit 行
+    out = []
+    while mask and len(out) < limit:
+        low = mask & -mask
+        out.append(low.bit_length() - 1)
+        mask ^= low
+    return out
+
+
+def _haystack(r):
+    # 几个名字小写后用 \0 拼起来，子串确认时查一次就行，也不会跨列匹配
+    return "\0".join((r.get(f) or "").lower() for f in NAME_FIELDS)
+
+
+def format_row(r):
+    # 和原来 /api/search/players 每条结果的形状一致
+    return {
+        'id': r['person_id'], 'name': r['name'], 'team': r['team_name'],
+        'team_logo': local_url(r['team_logo'], 'm'), 'pos': r['position'], 'avatar': local_url(r['avatar_url']),
+        'rating': r['ability_total'] or '-', 'age': r['age'] or '-',
+        'nationality': r['nationality'] or '-', 'foot': r['foot'] or '-'
+    }
+
+
+class _State:
+    """一次建好的整套索引，建完不再改；重建时整个换掉，查询开头取一次引用就一直用同一套"""
+    __slots__ = ('rows', 'keys', 'names', 'grams', 'masks', 'neg_ability', 'all', 'built_at')
+
+    def __init__(self, rows=(), keys=(), grams=None, masks=None, neg_ability=(), built_at=0):
+        self.rows = rows
+        self.names = [_haystack(r) for r in rows]  # 和 rows 对齐，长名字回表确认子串用
+        self.keys = keys  # 和 rows 对齐的排序键，keyset 翻页时二分用
+        self.grams = grams or {}  # gram -> [row_idx] (稀疏，查询时再转位图)
+        self.masks = masks or {}  # (字段, 值) -> 位图
+        self.neg_ability = neg_ability  # -能力值，升序，能力值范围查询二分用
+        self.all = (1 << len(rows)) - 1
+        self.built_at = built_at
+
+
+class SearchIndex:
+    """所有筛选条件都换成位图，组合查询就是几次大整数 AND，计数用 bit_count，2 万行也只要几十微秒"""
+
+    def __init__(self):
+        self.state = _State()
+        self.dirty = True
+        self.lock = threading.Lock()
+        self.rebuilding = False
+
+    @property
+    def ready(self): return self.state.built_at > 0
+
+    @property
+    def built_at(self): return self.state.built_at
+
+    @property
+    def rows(self): return self.state.rows
+
+    @staticmethod
+    def sort_key(r):
+        return -(r['ability_total'] if r['ability_total'] is not None else -1), str(r['person_id'])
+
+    def build(self, rows):
+        rows = sorted(rows, key=self.sort_key)
+        n = len(rows)
+        grams, postings = {}, {}
+        for i, r in enumerate(rows):
+            for g in set().union(*(_grams(r.get(f) or "") for f in NAME_FIELDS)): grams.setdefault(g, []).append(i)
+            for field in ('league_id', 'team_id', 'foot', 'position', 'nationality'):
+                postings.setdefault((field, str(r[field] or "")), []).append(i)
+            postings.setdefault(('age', _num(r['age'])), []).append(i)
+        keys = [self.sort_key(r) for r in rows]
+        masks = {k: _mask(v, n) for k, v in postings.items()}
+        # 只换一个引用，正在查询的线程继续用旧的那套，不会看到新 rows 配旧 masks
+        self.state = _State(rows, keys, grams, masks, [k[0] for k in keys], time.time())
+
+    def load(self, conn_factory):
+        conn = conn_factory()
+        if not conn: return False
+        try:
+            with conn.cursor() as c:
+                c.execute(SEARCH_SQL)
+                rows = c.fetchall()
+        finally:
+            conn.close()
+        self.build(list(rows))
+        return True
+
+    def mark_dirty(self, *_):
+        self.dirty = True
+
+    def due(self):
+        """脏了并且离上次重建够久，或者太久没重建了"""
+        age = time.time() - self.built_at
+        return (self.dirty and age >= REBUILD_INTERVAL) or age >= MAX_AGE
+
+    def maybe_rebuild(self, conn_factory):
+        """该重建了就后台重建；第一次(还没索引)同步建"""
+        if not self.due(): return
+        with self.lock:
+            if self.rebuilding: return
+            self.rebuilding = True
+            self.dirty = False
+
+        def run():
+            try:
+                self.load(conn_factory)
+            except Exception as e:
+                self.dirty = True
+                print(f"搜索索引重建失败: {e}")
+            finally:
+                self.rebuilding = False
+
+        if self.ready: threading.Thread(target=run, daemon=True).start()
+        else: run()
+
+    @staticmethod
+    def _values(state, field, pred):
+        m = 0
+        for (f, v), mask in state.masks.items():
+            if f == field and pred(v): m |= mask
+        return m
+
+    @staticmethod
+    def _name_mask(state, name):
+        names = state.names
+        idxs = _intersect([state.grams.get(g, []) for g in _query_grams(name)])
+        # 1~2 个字的 gram 本身就是精确匹配；更长的要回表确认确实是连续子串
+        if len(name) > 2: idxs = [i for i in idxs if name in names[i]]
+        return _mask(idxs, len(names))
+
+    def search(self, f, cursor=None, limit=PAGE_SIZE, facets=True):
+        """f 和原接口的请求体一样；cursor 是上一页返回的 next_cursor"""
+        state = self.state
+        rows, keys, masks = state.rows, state.keys, state.masks
+        m = state.all
+        name = (f.get('name') or "").strip().lower()
+        if name: m &= self._name_mask(state, name)
+        for field in ('league_id', 'team_id', 'foot'):
+            if f.get(field): m &= masks.get((field, str(f[field])), 0)
+        for field in ('position', 'nationality'):
+            q = (f.get(field) or "").lower()
+            if q: m &= self._values(state, field, lambda v: q in v.lower())
+
+        # 行按能力值降序排好，能力值范围就是一段连续的行
+        rmin, rmax = _num(f.get('rating_min') or None), _num(f.get('rating_max') or None)
+        if rmin is not None or rmax is not None:
+            lo = bisect_left(state.neg_ability, -rmax) if rmax is not None else 0
+            hi = bisect_right(state.neg_ability, -rmin) if rmin is not None else bisect_left(state.neg_ability, 1)
+            m &= ((1 << hi) - 1) & ~((1 << lo) - 1)
+        amin, amax = _num(f.get('age_min') or None), _num(f.get('age_max') or None)
+        if amin is not None or amax is not None:
+            m &= self._values(state, 'age', lambda v: v is not None and (amin is None or v >= amin)
+                                               and (amax is None or v <= amax))
+
+        page = m
+        if cursor: page &= ~((1 << bisect_right(keys, self.decode_cursor(cursor))) - 1)
+        items = _bits(page, limit + 1)
+        has_more = len(items) > limit
+        items = items[:limit]
+        result = {
+            'items': [format_row(rows[i]) for i in items],
+            'next_cursor': self.encode_cursor(keys[items[-1]]) if has_more else None,
+        }
+        if facets:
+            result['total'] = m.bit_count()
+            result['facets'] = {label: {v: c for (fd, v), mask in masks.items()
+                                        if fd == field and (c := (m & mask).bit_count())}
+                                for label, field in (('league', 'league_id'), ('position', 'position'), ('foot', 'foot'))}
+        return result
+
+    @staticmethod
+    def encode_cursor(key): return f"{-key[0]}:{key[1]}"
+
+    @staticmethod
+    def decode_cursor(cursor):
+        rating, _, pid = str(cursor).partition(":")
+        return -int(rating), pid
+
+
+def clamp_limit(v):
+    try:
+        return max(1, min(int(v), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return PAGE_SIZE
+
+
+if __name__ == "__main__":
+    # python player_search.py migrate
+    if sys.argv[1:] == ["migrate"]:
+        import db_pool
+        c = db_pool.get_conn()
+        migrate(c)
+        c.close()
@@ -0,0 +1,182 @@
+# === 各读接口的 SQL 和「行 -> JSON」格式化 ===
+# Flask (backend_api) 和 ASGI (asgi_api) 两种服务模式共用，保证两边返回的 JSON 一模一样
+
+import json
+
+from image_store import local_url
+
+LEAGUES_META = {
+    24646: {'cn': '英超', 'fullName': '英格兰足球超级联赛', 'logo': '/pl.png'},
+    24651: {'cn': '西甲', 'fullName': '西班牙足球甲级联赛', 'logo': '/laliga.png'},
+    24596: {'cn': '意甲', 'fullName': '意大利足球甲级联赛', 'logo': '/seriea.png'},
+    24648: {'cn': '德甲', 'fullName': '德国足球甲级联赛', 'logo': '/bundesliga.png'},
+    24652: {'cn': '法甲', 'fullName': '法国足球甲级联赛', 'logo': '/ligue1.png'},
+}
+
+LEAGUES_SQL = "SELECT id, name FROM leagues"
+TEAMS_SQL = "SELECT t.*, s.`rank`, s.matches, s.won, s.draw, s.lost, s.goals_pro, s.goals_against, s.points FROM teams t LEFT JOIN standings s ON t.team_id = s.team_id WHERE t.league_id = %s ORDER BY s.`rank` ASC"
+SQUAD_SQL = "SELECT p.*, pp.ability_total FROM players p LEFT JOIN player_profiles pp ON p.person_id = pp.person_id WHERE p.team_id = %s"
+RANKINGS_SQL = "SELECT r.*, p.avatar_url FROM rankings r LEFT JOIN players p ON r.person_id = p.person_id WHERE r.league_id = %s AND r.type = %s ORDER BY r.`rank` ASC"
+# 🔥 修改点：关联 players 表获取 nationality_url
+PLAYER_SQL = """
+             SELECT pp.*, p.nationality_url
+             FROM player_profiles pp
+                      LEFT JOIN players p ON pp.person_id = p.person_id
+             WHERE pp.person_id = %s \
+             """
+HISTORY_SQL = "SELECT season, club, matches, starts, goals, assists, yellow, red FROM player_stats WHERE person_id=%s ORDER BY season DESC"
+
+# 批量球员详情：一次 IN 查完，{ids} 换成占位符
+MAX_BATCH = 100
+PLAYERS_BATCH_SQL = """
+                    SELECT pp.*, p.nationality_url
+                    FROM player_profiles pp
+                             LEFT JOIN players p ON pp.person_id = p.person_id
+                    WHERE pp.person_id IN ({ids})
+                    """
+HISTORY_BATCH_SQL = "SELECT person_id, season, club, matches, starts, goals, assists, yellow, red FROM player_stats WHERE person_id IN ({ids}) ORDER BY person_id, season DESC"
+
+SEARCH_SQL = """
+             SELECT p.person_id, \
+                    p.name, \
+                    p.team_id, \
+                    p.position, \
+                    p.avatar_url,
+                    t.name_cn  as team_name, \
+                    t.logo_url as team_logo,
+                    pp.age, \
+                    pp.nationality, \
+                    pp.ability_total, \
+                    pp.foot, \
+                    pp.number
+             FROM players p
+                      JOIN teams t ON p.team_id = t.team_id
+                      LEFT JOIN player_profiles pp ON p.person_id = pp.person_id
+             WHERE 1 = 1 \
+             """
+
+
+def dumps(data):
+    # 和 Flask jsonify 的输出一致：紧凑、键排序、ASCII 转义、末尾换行
+    return (json.dumps(data, separators=(",", ":"), sort_keys=True, default=str) + "\n").encode()
+
+
+def format_leagues(leagues):
+    result = []
+    for l in leagues:
+        meta = LEAGUES_META.get(l['id'], {})
+        result.append({
+            'id': l['id'], 'name': l['name'], 'fullName': meta.get('fullName', l['name']),
+            'cn': meta.get('cn', l['name']), 'logo': meta.get('logo', '/default.png')
+        })
+    return result
+
+
+def format_teams(teams, league_id):
+    formatted = []
+    for t in teams:
+        formatted.append({
+            'id': t['team_id'], 'leagueId': league_id, 'name': t['name_cn'], 'en': t['name_en'], 'logo': local_url(t['logo_url'], 'm'),
+            'stats': {'rank': t['rank'], 'played': t['matches'], 'won': t['won'], 'draw': t['draw'], 'lost': t['lost'],
+                      'gf': t['goals_pro'], 'ga': t['goals_against'], 'pts': t['points']},
+            'info': {
+                'founded': t.get('founded'), 'stadium': t.get('stadium') or t.get('venue'),
+                'city': t.get('city'), 'country': t.get('country'), 'capacity': t.get('capacity'),
+                'phone': t.get('phone'), 'email': t.get('email'), 'address': t.get('address')
+            }
+        })
+    return formatted
+
+
+def format_squad(players):
+    return [{'id': p['person_id'], 'name': p['name'], 'number': p['number'], 'pos': p['position'],
+             'avatar': local_url(p['avatar_url']), 'rating': p.get('ability_total') or '-'} for p in players]
+
+
+def format_rankings(data):
+    return [{'id': item['person_id'], 'rank': item['rank'], 'name': item['name'], 'team': item['team'],
+             'count': item['count'], 'avatar': local_url(item.get('avatar_url'))} for item in data]
+
+
+def format_player(profile, history):
+    radar = [
+        {'subject': '速度', 'A': profile['speed'] or 0, 'fullMark': 100},
+        {'subject': '射门', 'A': profile['shooting'] or 0, 'fullMark': 100},
+        {'subject': '传球', 'A': profile['passing'] or 0, 'fullMark': 100},
+        {'subject': '盘带', 'A': profile['dribbling'] or 0, 'fullMark': 100},
+        {'subject': '防守', 'A': profile['defense'] or 0, 'fullMark': 100},
+        {'subject': '力量', 'A': profile['power'] or 0, 'fullMark': 100},
+    ]
+    return {
+        'id': profile['person_id'], 'name_cn': profile['name_cn'], 'name_en': profile['name_en'],
+        'club': profile['club'], 'number': profile['number'], 'pos': '球员',
+        'age': profile['age'], 'height': profile['height'], 'weight': profile['weight'],
+        'foot': profile['foot'], 'birth_date': profile['birth_date'],
+        'country': profile['nationality'], 'avatar': local_url(profile['photo_url'], 'l'),
+        'nationality_logo': local_url(profile.get('nationality_url'), 'xs'),  # 🔥 新增字段
+        'ability_total': profile['ability_total'],
+        'radar': radar, 'history': history
+    }
+
+
+def batch_ids(data):
+    """批量接口的请求体 {"person_ids": [...]} -> 去重后的 id 列表 (保持顺序)，不合法抛 ValueError"""
+    ids = data.get('person_ids') if isinstance(data, dict) else None
+    if not isinstance(ids, list) or not ids: raise ValueError("person_ids 必须是非空数组")
+    ids = list(dict.fromkeys(str(i) for i in ids))
+    if len(ids) > MAX_BATCH: raise ValueError(f"一次最多 {MAX_BATCH} 个球员")
+    return ids
+
+
+def in_sql(sql, ids):
+    return sql.format(ids=",".join(["%s"] * len(ids))), tuple(ids)
+
+
+def format_players_batch(ids, profiles, history):
+    """按请求顺序返回 {'players': [...和 /api/player 一样的结构], 'missing': [库里没有的 id]}"""
+    by_id = {str(p['person_id']): p for p in profiles}
+    seasons = {}
+    for h in history:
+        h = dict(h)
+        seasons.setdefault(str(h.pop('person_id')), []).append(h)
+    return {'players': [format_player(by_id[i], seasons.get(i, [])) for i in ids if i in by_id],
+            'missing': [i for i in ids if i not in by_id]}
+
+
+def build_search_sql(data):
+    """索引没建好时的 SQL 兜底，条件和原接口一样"""
+    sql = SEARCH_SQL
+    params = []
+    if data.get('name'):
+        sql += " AND (p.name LIKE %s OR pp.name_cn LIKE %s)"
+        params.extend([f"%{data['name']}%", f"%{data['name']}%"])
+    if data.get('league_id'):
+        sql += " AND t.league_id = %s"
+        params.append(data['league_id'])
+    if data.get('team_id'):
+        sql += " AND p.team_id = %s"
+        params.append(data['team_id'])
+    if data.get('position'):
+        sql += " AND p.position LIKE %s"
+        params.append(f"%{data['position']}%")
+    if data.get('nationality'):
+        sql += " AND pp.nationality LIKE %s"
+        params.append(f"%{data['nationality']}%")
+    if data.get('foot'):
+        sql += " AND pp.foot = %s"
+        params.append(data['foot'])
+    if data.get('rating_min'):
+        sql += " AND pp.ability_total >= %s"
+        params.append(data['rating_min'])
+    if data.get('rating_max'):
+        sql += " AND pp.ability_total <= %s"
+        params.append(data['rating_max'])
+    if data.get('age_min'):
+        sql += " AND pp.age >= %s"
+        params.append(data['age_min'])
+    if data.get('age_max'):
+        sql += " AND pp.age <= %s"
+        params.append(data['age_max'])
+
+    sql += " ORDER BY pp.ability_total DESC LIMIT 50"
+    return sql, tuple(params)
@@ -0,0 +1,149 @@
+import time
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+
+import metrics
+from singleflight import SingleFlight, FOLLOWED
+from state_store import MemoryStore
+
+# === 后台刷新调度 (stale-while-revalidate) ===
+# 请求线程只负责读库，过期的 key 丢到后台线程池里去爬，同一个 key 同一时间只跑一次
+# 开了刷新计划 (planner.py) 以后 view_refresh=False：接口只记访问次数，只有库里完全没有的才当场爬 (fill)，
+# 其余什么时候刷由 planner 按热度/过期程度/比赛日排优先级、在每分钟的请求预算里安排。
+# 「库里有没有」由接口读库判断，不看 store：memory store 重启后全是空的，按 store 判断就全成了 miss，绕过 planner 的预算
+
+MAX_WORKERS = 4
+
+# 不同实体过期时间不一样：积分榜比赛日变化快，球队资料/球员资料很少变
+REFRESH_TTL = {"league": 300, "team": 1800, "player": 3600}
+
+
+def lazy(module, name):
+    """刷新回调的延迟版：第一次真要刷新时才 import module 取 name。
+    football_spider 带着 requests/bs4 一整套，只读库、不自己刷新的 worker 就一直不用加载它"""
+
+    def call(*args, **kwargs):
+        return getattr(importlib.import_module(module), name)(*args, **kwargs)
+
+    call.__name__ = call.__qualname__ = f"{module}.{name}"
+    return call
+
+
+def _count(key, age, ttl, view_refresh=True):
+    # UPDATE_CACHE 的命中情况：hit=没过期，stale=过期要刷，miss=store 里没记录；返回要不要当场排队刷新。
+    # view_refresh=False 时一律不排：库里真没有的由接口读完库再 fill
+    result = "miss" if age is None else "stale" if age > ttl else "hit"
+    metrics.inc("dqd_update_cache_total", kind=key.split("_", 1)[0], result=result)
+    return view_refresh and result != "hit"
+
+
+class RefreshScheduler:
+    def __init__(self, timeout=300, max_workers=MAX_WORKERS, flight=None, store=None, ttls=None,
+                 access_log=None, view_refresh=True):
+        self.timeout = timeout  # ttls 里没配的 key 用这个
+        self.ttls = REFRESH_TTL if ttls is None else ttls
+        self.flight = flight or SingleFlight()  # 真正执行刷新时再按 key 去重 (可换成跨进程的 MySQLSingleFlight)
+        self.store = store or MemoryStore()  # key -> 上次成功刷新的时间戳，可换成 MySQL/Redis 让多个 worker 共用
+        self.access_log = access_log  # planner.AccessLog，记每个 key 被看了几次
+        self.view_refresh = view_refresh  # False: 过期了也不当场刷，交给 planner
+        self.in_flight = {}  # key -> Future
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="refresh")
+
+    def ttl_for(self, key):
+        return self.ttls.get(key.split("_", 1)[0], self.timeout)
+
+    def age(self, key):
+        ts = self.store.get(key)
+        return time.time() - ts if ts else None
+
+    def is_stale(self, key, age=None):
+        age = self.age(key) if age is None else age
+        return age is None or age > self.ttl_for(key)
+
+    def check(self, key, update_func, *args):
+        """返回数据年龄(秒)，过期就顺便排队后台刷新；只读一次 store"""
+        age = self.age(key)
+        if self.access_log: self.access_log.touch(key)
+        if _count(key, age, self.ttl_for(key), self.view_refresh): self.schedule(key, update_func, *args)
+        return age
+
+    def ages(self, keys):
+        """一次拿多个 key 的数据年龄，store 有 get_many 就只读一次"""
+        get_many = getattr(self.store, "get_many", None)
+        ts = get_many(keys) if get_many else {k: self.store.get(k) for k in keys}
+        now = time.time()
+        return {k: now - ts[k] if ts.get(k) else None for k in keys}
+
+    def check_many(self, items):
+        """items: [(key, update_func, *args)]；过期的全部排队，由线程池并行刷新，返回 {key: 年龄}"""
+        ages = self.ages([i[0] for i in items])
+        for key, update_func, *args in items:
+            if self.access_log: self.access_log.touch(key)
+            if _count(key, ages[key], self.ttl_for(key), self.view_refresh): self.schedule(key, update_func, *args)
+        return ages
+
+    def schedule(self, key, update_func, *args):
+        """排队后台刷新，返回 Future；已经在跑的 key 直接复用同一个 Future"""
+        return self.submit(key, None, update_func, *args)
+
+    def submit(self, key, max_age, update_func, *args):
+        """同 schedule，只是真正开爬前的复查用 max_age (秒) 而不是 ttl：planner 比赛日会提前刷"""
+        with self.lock:
+            fut = self.in_flight.get(key)
+            if fut: return fut
+            fut = self.pool.submit(self._run, key, max_age, update_func, *args)
+            self.in_flight[key] = fut
+            return fut
+
+    def wait(self, key, timeout=10):
+        """库里完全没数据时(冷启动)才用：等正在跑的那次刷新，最多 timeout 秒"""
+        fut = self.in_flight.get(key)
+        if not fut: return False
+        try:
+            return fut.result(timeout=timeout)
+        except Exception:
+            return False
+
+    def wait_all(self, keys, timeout=10):
+        """一起等多个 key 的刷新，等到全部跑完或超时 (总共最多 timeout 秒)；至少一个跑完就返回 True"""
+        futs = [f for f in (self.in_flight.get(k) for k in keys) if f]
+        if not futs: return False
+        done, _ = wait_futures(futs, timeout)
+        return bool(done)
+
+    def fill(self, key, update_func, *args, timeout=10):
+        """接口读库发现这行完全没有：排上刷新 (已经在跑就复用) 并等它，最多 timeout 秒"""
+        self.schedule(key, update_func, *args)
+        return self.wait(key, timeout)
+
+    def fill_all(self, items, timeout=10):
+        """fill 的批量版，items: [(key, update_func, *args)]"""
+        for key, update_func, *args in items: self.schedule(key, update_func, *args)
+        return self.wait_all([i[0] for i in items], timeout)
+
+    def _run(self, key, max_age, update_func, *args):
+        metrics.TRACE_ID.set(f"refresh:{key}")
+        try:
+            success = self.flight.do(key, self._refresh_if_stale, key, max_age, update_func, *args)
+            # 别的 worker 刚刚爬成功 (失败的话 flight 返回 False)：自己没写 store，store 不共享 (memory) 时
+            # 不记一笔，下次访问又会当成没爬过
+            if success is FOLLOWED:
+                self.store.set(key, time.time())
+                return True
+            return success
+        except Exception as e:
+            print(f"更新失败 [{key}]: {e}")
+            return False
+        finally:
+            with self.lock:
+                self.in_flight.pop(key, None)
+
+    def _refresh_if_stale(self, key, max_age, update_func, *args):
+        # 拿到锁之后再看一眼：别的 worker 可能刚刷新完，store 是共享的就不用再爬一遍
+        age = self.age(key)
+        if age is not None and age <= (self.ttl_for(key) if max_age is None else max_age): return True
+        success = update_func(*args)
+        if success: self.store.set(key, time.time())
+        return success
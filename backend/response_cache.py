@@ -0,0 +1,81 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+# === 读接口的响应缓存 ===
+# 缓存的是序列化好的 JSON 字节串 + ETag，按路由和参数做 key，LRU + TTL 双重上限。
+# 每条缓存挂几个 tag (league_24646 / team_50000513 / player_xxx)，爬虫提交后按 tag 精确失效。
+# 「读库时刚好被失效」的旧数据不能写回缓存：路由读库前先拿 version (逻辑时钟)，put 时只看自己那几个 tag
+# 在这之后有没有失效过。以前是一个全局版本号，爬虫一跑起来几乎每次回填都被别的球员的提交作废
+
+CHANGED_MAX = 50000
+
+
+class ResponseCache:
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (body, etag, expires, tags)
+        self.by_tag = {}  # tag -> {key}
+        self.version = 0  # 逻辑时钟，每次失效 +1
+        self.changed = {}  # tag -> 最近一次失效时的 version
+        self.cleared = 0  # 最近一次整体清空时的 version
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[2] > time.time():
+                self.entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry
+            if entry: self._drop(key)
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key, body, tags, version):
+        etag = hashlib.sha1(body).hexdigest()
+        with self.lock:
+            if self._stale(tags, version): return body, etag  # 读的过程中数据变了，这份不缓存
+            if key in self.entries: self._drop(key)
+            self.entries[key] = (body, etag, time.time() + self.ttl, tags)
+            for t in tags: self.by_tag.setdefault(t, set()).add(key)
+            while len(self.entries) > self.maxsize:
+                self._drop(next(iter(self.entries)))
+        return body, etag
+
+    def invalidate(self, *tags):
+        with self.lock:
+            self.version += 1
+            for t in tags:
+                self.changed[t] = self.version
+                for key in self.by_tag.pop(t, ()):
+                    if key in self.entries:
+                        self._drop(key)
+                        self.stats["invalidations"] += 1
+
+            if len(self.changed) > CHANGED_MAX:  # 记太多了就收成一次整体清空的时间点，宁可少缓存几份
+                self.changed.clear()
+                self.cleared = self.version
+
+    def clear(self):
+        with self.lock:
+            self.version += 1
+            self.cleared = self.version
+            self.changed.clear()
+            self.entries.clear()
+            self.by_tag.clear()
+
+    def _stale(self, tags, version):
+        if self.cleared > version: return True
+        return any(self.changed.get(t, 0) > version for t in tags)
+
+    def _drop(self, key):
+        _, _, _, tags = self.entries.pop(key)
+        for t in tags:
+            keys = self.by_tag.get(t)
+            if keys:
+                keys.discard(key)
+                if not keys: del self.by_tag[t]
@@ -0,0 +1,128 @@
+import threading
+import time
+
+# === 单飞 (single-flight) ===
+# 同一个 key 同一时间只允许一个调用真正干活，其它调用等它的结果，避免 N 个请求同时爬同一个页面、
+# 同时 DELETE/REPLACE 同一批行
+
+FOLLOWED = object()  # MySQLSingleFlight 里等别的 worker 做完、自己没执行时的返回值 (真值)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """进程内版本：Flask 多线程下同一个 key 只跑一次"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, func, *args):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error: raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args)
+        except Exception as e:
+            call.error = e
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+            call.done.set()
+        if call.error: raise call.error
+        return call.result
+
+
+class MySQLSingleFlight(SingleFlight):
+    """跨进程版本：先在进程内去重，再用 MySQL 的 GET_LOCK 在多个 gunicorn worker 之间去重。
+    抢到锁的 worker 去爬，放锁前把成没成记进 flight_results；没抢到的等锁释放后看这条记录：
+    别人刚刚成功写好了库才返回 FOLLOWED (调用方自己决定要不要记一笔)，失败/超时/没记上都返回 False。
+    锁是会话级的，要在整次爬取期间占着连接，conn_factory 最好给独立连接 (db_pool.dedicated_conn) 而不是池里借的"""
+
+    def __init__(self, conn_factory, prefix="dqd:", timeout=30):
+        super().__init__()
+        self.conn_factory = conn_factory
+        self.prefix = prefix
+        self.timeout = timeout
+
+    def do(self, key, func, *args):
+        return super().do(key, self._locked, key, func, *args)
+
+    def _locked(self, key, func, *args):
+        conn, name = self._connect(key)
+        if not conn: return func(*args)  # 连不上库就退化成只做进程内去重
+        try:
+            if self._try_lock(conn, name):
+                result = False
+                try:
+                    result = func(*args)
+                    return result
+                finally:
+                    self._finish(conn, name, result)
+            # 别的 worker 正在爬：等它做完，再看它记下的结果 (finished_at 变了才是这一次的)
+            before = self._outcome(conn, name)
+            with conn.cursor() as c:
+                c.execute("SELECT GET_LOCK(%s, %s) AS ok", (name, self.timeout))
+                if not self._ok(c.fetchone()): return False
+            self._unlock(conn, name)
+            return self._verdict(before, self._outcome(conn, name))
+        finally:
+            conn.close()
+
+    # 下面几个是单条阻塞调用，async_refresh 的异步版放到线程里逐个调
+
+    def _connect(self, key):
+        try:
+            conn = self.conn_factory()
+        except Exception as e:
+            print(f"跨进程锁连接失败 [{key}]: {e}")
+            conn = None
+        return conn, (self.prefix + key)[:64]
+
+    def _try_lock(self, conn, name):
+        with conn.cursor() as c:
+            c.execute("SELECT GET_LOCK(%s, 0) AS ok", (name,))
+            return self._ok(c.fetchone())
+
+    @staticmethod
+    def _unlock(conn, name):
+        with conn.cursor() as c: c.execute("SELECT RELEASE_LOCK(%s)", (name,))
+
+    def _finish(self, conn, name, result):
+        """leader 放锁前记下成没成"""
+        try:
+            with conn.cursor() as c:
+                c.execute("INSERT INTO flight_results (name, ok, finished_at) VALUES (%s,%s,%s) "
+                          "ON DUPLICATE KEY UPDATE ok = VALUES(ok), finished_at = VALUES(finished_at)",
+                          (name, 1 if result else 0, time.time()))
+            conn.commit()
+        except Exception as e:
+            print(f"记录刷新结果失败 [{name}]: {e}")
+        self._unlock(conn, name)
+
+    @staticmethod
+    def _outcome(conn, name):
+        with conn.cursor() as c:
+            c.execute("SELECT ok, finished_at FROM flight_results WHERE name = %s", (name,))
+            return c.fetchone()
+
+    @classmethod
+    def _verdict(cls, before, after):
+        return FOLLOWED if after and cls._ok(after) and after != before else False
+
+    @staticmethod
+    def _ok(row):
+        val = row['ok'] if isinstance(row, dict) else row[0]
+        return val == 1
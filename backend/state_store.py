@@ -0,0 +1,177 @@
+import os
+import socket
+import threading
+
+# === 刷新时间戳存储 (原来的 UPDATE_CACHE) ===
+# 原来是进程内 dict：每个 gunicorn worker 各记各的，重启就全丢，一发版就所有 key 同时过期一起爬。
+# 现在可以换成放在 MySQL / Redis 里，所有 worker 共用一份，重启也不丢
+#   memory : 进程内 dict，和以前一样
+#   mysql  : refresh_state 表 (init_db 会建)
+#   redis  : 任何说 Redis 协议的服务，自带一个极简 RESP 客户端，不依赖 redis 包
+# DQD_REFRESH_STORE 没配时 API 和 planner.py 用同一个默认 (default_kind)：开了刷新计划就是 mysql，
+# planner 刷过什么 API 才看得到；没开就是 memory，和以前一样
+
+
+class MemoryStore:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key): return self.data.get(key)
+
+    def get_many(self, keys): return {k: self.data.get(k) for k in keys}
+
+    def set(self, key, ts): self.data[key] = ts
+
+
+class MySQLStore:
+    def __init__(self, conn_factory):
+        self.conn_factory = conn_factory
+
+    def get(self, key):
+        conn = None
+        try:
+            conn = self.conn_factory()
+            if not conn: return None
+            with conn.cursor() as c:
+                c.execute("SELECT refreshed_at FROM refresh_state WHERE cache_key = %s", (key,))
+                row = c.fetchone()
+                return row['refreshed_at'] if row else None
+        except Exception as e:
+            print(f"读取刷新状态失败 [{key}]: {e}")
+            return None
+        finally:
+            if conn: conn.close()
+
+    def get_many(self, keys):
+        # 批量接口一次要几十个 key，一条 IN 查完
+        keys = list(keys)
+        if not keys: return {}
+        conn = None
+        try:
+            conn = self.conn_factory()
+            if not conn: return {}
+            with conn.cursor() as c:
+                c.execute(f"SELECT cache_key, refreshed_at FROM refresh_state WHERE cache_key IN "
+                          f"({','.join(['%s'] * len(keys))})", keys)
+                return {r['cache_key']: r['refreshed_at'] for r in c.fetchall()}
+        except Exception as e:
+            print(f"读取刷新状态失败 [{len(keys)} 个]: {e}")
+            return {}
+        finally:
+            if conn: conn.close()
+
+    def set(self, key, ts):
+        conn = None
+        try:
+            conn = self.conn_factory()
+            if not conn: return
+            with conn.cursor() as c:
+                c.execute("INSERT INTO refresh_state (cache_key, refreshed_at) VALUES (%s,%s) "
+                          "ON DUPLICATE KEY UPDATE refreshed_at = VALUES(refreshed_at)", (key, ts))
+            conn.commit()
+        except Exception as e:
+            print(f"写入刷新状态失败 [{key}]: {e}")
+        finally:
+            if conn: conn.close()
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisClient:
+    """够用就行的 RESP 客户端，每个线程一条连接"""
+
+    def __init__(self, host="127.0.0.1", port=6379, db=0, timeout=2):
+        self.host, self.port, self.db, self.timeout = host, port, db, timeout
+        self.local = threading.local()
+
+    def _sock(self):
+        s = getattr(self.local, "sock", None)
+        if s is None:
+            s = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            self.local.sock, self.local.buf = s, s.makefile("rb")
+            if self.db: self._send("SELECT", self.db)
+        return s
+
+    def _send(self, *args):
+        out = [f"*{len(args)}\r\n".encode()]
+        for a in args:
+            a = str(a).encode()
+            out.append(b"$%d\r\n%s\r\n" % (len(a), a))
+        self.local.sock.sendall(b"".join(out))
+        return self._read()
+
+    def _read(self):
+        line = self.local.buf.readline()
+        if not line: raise RedisError("连接被关闭")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+": return rest.decode()
+        if kind == b"-": raise RedisError(rest.decode())
+        if kind == b":": return int(rest)
+        if kind == b"$":
+            n = int(rest)
+            if n < 0: return None
+            data = self.local.buf.read(n + 2)
+            return data[:-2].decode()
+        if kind == b"*":
+            n = int(rest)
+            return None if n < 0 else [self._read() for _ in range(n)]
+        raise RedisError(f"无法解析的回复: {line!r}")
+
+    def execute(self, *args):
+        try:
+            self._sock()
+            return self._send(*args)
+        except (OSError, RedisError):
+            self.close()  # 连接坏了下次重连
+            raise
+
+    def close(self):
+        s = getattr(self.local, "sock", None)
+        if s:
+            try:
+                s.close()
+            except OSError:
+                pass
+        self.local.sock = self.local.buf = None
+
+
+class RedisStore:
+    def __init__(self, client=None, prefix="dqd:refresh:"):
+        self.client = client or RedisClient()
+        self.prefix = prefix
+
+    def get(self, key):
+        try:
+            val = self.client.execute("GET", self.prefix + key)
+            return float(val) if val is not None else None
+        except Exception as e:
+            print(f"读取刷新状态失败 [{key}]: {e}")
+            return None
+
+    def get_many(self, keys):
+        keys = list(keys)
+        if not keys: return {}
+        try:
+            vals = self.client.execute("MGET", *(self.prefix + k for k in keys))
+            return {k: float(v) for k, v in zip(keys, vals) if v is not None}
+        except Exception as e:
+            print(f"读取刷新状态失败 [{len(keys)} 个]: {e}")
+            return {}
+
+    def set(self, key, ts):
+        try:
+            self.client.execute("SET", self.prefix + key, repr(ts))
+        except Exception as e:
+            print(f"写入刷新状态失败 [{key}]: {e}")
+
+
+def default_kind(planner_mode="off"):
+    return os.environ.get("DQD_REFRESH_STORE") or ("memory" if planner_mode == "off" else "mysql")
+
+
+def make_store(kind, conn_factory=None, redis_config=None):
+    if kind == "mysql": return MySQLStore(conn_factory)
+    if kind == "redis": return RedisStore(RedisClient(**(redis_config or {})))
+    return MemoryStore()
@@ -0,0 +1,69 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH = os.path.join(BACKEND, "bench")
+sys.path.insert(0, BACKEND)
+sys.path.insert(0, BENCH)
+# image_store 在 import 时定目录 (league_snapshot 收集阶段就会带进来)，得赶在所有测试模块前面
+os.environ["DQD_IMAGE_DIR"] = tempfile.mkdtemp(prefix="dqd-images-")
+
+# === 测试公共件 ===
+# 和 bench 一样不连真库、不碰真站：sqlite_db 冒充 MySQL，fake_site 回放录好的页面，fake_redis 冒充 Redis
+# 用法 (在 backend 目录下): python -m pytest -q tests
+
+E2E_LEAGUE = 24646
+
+
+@pytest.fixture
+def sqlite_pool(tmp_path):
+    """全局连接池换成临时 sqlite 库并建好表，用完换回来"""
+    import datastore
+    import db_pool
+    import sqlite_db
+    old = db_pool._POOL
+    pool = db_pool.ConnectionPool(connect=sqlite_db.connector(str(tmp_path / "test.db")))
+    db_pool.set_pool(pool)
+    datastore.init_db()
+    yield pool
+    datastore.flush_commits()  # 攒着的 commit_log 写进这个库，别留给下一个
+    db_pool.set_pool(old)
+
+
+@pytest.fixture(scope="session")
+def crawled(tmp_path_factory):
+    """假站爬一个联赛进 sqlite (和 bench/run_bench.py 一样，之后才 import 业务模块)，整个测试会话共用；返回库文件路径"""
+    import run_bench
+    tmp = str(tmp_path_factory.mktemp("e2e"))
+    site = run_bench.setup(tmp)
+    import crawler
+    stats = crawler.Crawler(4).run([E2E_LEAGUE])
+    assert not stats['failed'] and not stats['write_failed']
+    yield os.path.join(tmp, "bench.db")
+    site.shutdown()  # 连接池不换回去：API 模块的后台线程 (commit_log、图片索引) 还会用到
+
+
+@pytest.fixture(scope="session")
+def crawled_keys(crawled):
+    """爬进库的所有刷新 key：API 测试把它们标成刚刷新，免得触发后台爬取"""
+    import db_pool
+    conn = db_pool.get_conn()
+    with conn.cursor() as c:
+        c.execute("SELECT team_id FROM teams")
+        keys = [f"team_{r['team_id']}" for r in c.fetchall()]
+        c.execute("SELECT person_id FROM players")
+        keys += [f"player_{r['person_id']}" for r in c.fetchall()]
+    conn.close()
+    return keys + [f"league_{E2E_LEAGUE}"]
+
+
+@pytest.fixture
+def fake_redis():
+    from fake_redis import FakeRedis
+    srv = FakeRedis(port=0).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
@@ -0,0 +1,125 @@
+import pytest
+
+import analytics
+from analytics import Analytics
+
+pytestmark = pytest.mark.skipif(not analytics.HAS_NUMPY, reason="没装 numpy")
+
+
+def profile(pid, name, league, club, age, ability, position="前锋", nationality="巴西"):
+    return {'person_id': pid, 'name_cn': name, 'club': club, 'nationality': nationality, 'age': f"{age}岁",
+            'ability_total': ability, 'speed': None, 'shooting': None, 'passing': None, 'dribbling': None,
+            'defense': None, 'power': None, 'position': position, 'team_id': club, 'league_id': league}
+
+
+def stat(pid, season, matches, goals, assists=0, starts=None):
+    return {'person_id': pid, 'season': season, 'matches': matches, 'starts': matches if starts is None else starts,
+            'goals': goals, 'assists': assists, 'yellow': 0, 'red': 0}
+
+
+PROFILES = [
+    profile("1", "甲", 1, "t1", 25, 90),
+    profile("2", "乙", 1, "t1", 25, 80, position="后卫"),
+    profile("3", "丙", 2, "t2", 31, 85, nationality="阿根廷"),
+]
+STATS = [
+    stat("1", "2022", 30, 10, 5), stat("1", "2023", 20, 12),
+    stat("2", "2023", 10, 1, 3),
+    stat("3", "2022", 25, 20),
+]
+
+
+class Conn:
+    """只认 analytics 的两条查询：带 WHERE 的按参数里的 person_id / team_id 过滤"""
+
+    def __init__(self, profiles, stats):
+        self.profiles, self.stats, self.queries = profiles, stats, []
+
+    def cursor(self): return self
+
+    def __enter__(self): return self
+
+    def __exit__(self, *exc): pass
+
+    def execute(self, sql, params=()):
+        self.queries.append(sql)
+        params = {str(p) for p in params}
+        if sql.startswith(analytics.STATS_SQL):
+            self.rows = [r for r in self.stats if "WHERE" not in sql or r['person_id'] in params]
+        else:
+            self.rows = [r for r in self.profiles
+                         if "WHERE" not in sql or r['person_id'] in params or r['team_id'] in params]
+
+    def fetchall(self): return list(self.rows)
+
+    def close(self): pass
+
+
+def make():
+    a = Analytics()
+    assert a.refresh(lambda: Conn(PROFILES, STATS))
+    return a
+
+
+def ids(res): return [i['id'] for i in res['items']]
+
+
+def test_leaderboard_latest_season_career_and_filters():
+    a = make()
+    assert a.query("meta", {})['seasons'] == ["2022", "2023"]
+    res = a.query("leaderboard", {})
+    assert res['season'] == "2023" and ids(res) == ["1", "2"]  # 丙 2023 没有数据，不上榜
+    assert res['items'][0]['value'] == 12
+    assert ids(a.query("leaderboard", {'season': "all"})) == ["1", "3", "2"]
+    assert ids(a.query("leaderboard", {'season': "all", 'league': "2"})) == ["3"]
+    assert ids(a.query("leaderboard", {'metric': "assists_per_match", 'season': "2023"})) == ["2", "1"]
+    assert ids(a.query("leaderboard", {'season': "all", 'min_matches': 40})) == ["1"]
+    assert ids(a.query("leaderboard", {'season': "all", 'order': "asc", 'limit': 1})) == ["2"]
+    with pytest.raises(ValueError):
+        a.query("leaderboard", {'metric': "nope"})
+    with pytest.raises(ValueError):
+        a.query("leaderboard", {'season': "1999"})
+    with pytest.raises(LookupError):
+        a.query("nope", {})
+
+
+def test_top_keeps_ties_in_index_order():
+    import numpy as np
+    values = np.array([5., 7., 7., 7., 1.])
+    assert list(analytics.Columns.top(values, np.arange(5), 2)) == [1, 2]
+    assert list(analytics.Columns.top(values, np.arange(5), 2, ascending=True)) == [4, 0]
+
+
+def test_distribution_and_groups():
+    a = make()
+    dist = a.query("distribution", {'x': "age", 'y': "ability_total", 'bins': 5})
+    assert [(g['x'], g['count'], g['mean'], g['median']) for g in dist['groups']] == [(25, 2, 85, 85), (30, 1, 85, 85)]
+    groups = a.query("groups", {'by': "league", 'season': "all"})
+    assert [(g['group'], g['players'], g['value']) for g in groups['items']] == [(1, 2, 23), (2, 1, 20)]
+    per = a.query("groups", {'by': "league", 'season': "all", 'agg': "per_player"})
+    assert [(g['group'], g['value']) for g in per['items']] == [(2, 20), (1, 11.5)]
+
+
+def test_commit_marks_dirty_and_refresh_rereads_only_changed_players():
+    a = make()
+    assert not a.dirty
+    a.on_commit("player", "2")
+    assert a.dirty
+    stats = STATS + [stat("2", "2023", 5, 30)]  # 重爬之后的新赛季行
+    conn = Conn(PROFILES, stats)
+    assert a.refresh(lambda: conn)
+    assert "WHERE" in conn.queries[0] and not a.dirty
+    assert ids(a.query("leaderboard", {})) == ["2", "1"]
+    assert len(a.stats["2"]) == 2 and len(a.stats["1"]) == 2  # 旧行换掉，没变的球员不动
+
+
+def test_failed_refresh_keeps_the_dirty_set():
+    a = make()
+    a.on_commit("team", "t1")
+
+    def boom(): raise RuntimeError("连不上")
+
+    with pytest.raises(RuntimeError):
+        a.refresh(boom)
+    assert a.dirty_teams == {"t1"}
+    assert not a.refresh(lambda: None) and a.dirty_teams == {"t1"}
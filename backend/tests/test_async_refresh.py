@@ -0,0 +1,79 @@
+import asyncio
+
+from async_refresh import AsyncMySQLSingleFlight, AsyncRefreshScheduler
+from test_singleflight import LockConn
+
+
+def updater(calls, result=True, delay=0):
+    async def update(*args):
+        calls.append(args)
+        await asyncio.sleep(delay)
+        return result
+    return update
+
+
+def test_concurrent_checks_refresh_once():
+    async def main():
+        sched, calls = AsyncRefreshScheduler(), []
+        update = updater(calls, delay=0.05)
+        ages = await asyncio.gather(*(sched.check("team_1", update, "1") for _ in range(10)))
+        assert ages == [None] * 10
+        assert await sched.wait("team_1") is True
+        assert calls == [("1",)]
+        assert await sched.check("team_1", update, "1") < 1 and sched.in_flight == {}
+    asyncio.run(main())
+
+
+def test_fill_all_waits_and_failures_are_not_recorded():
+    async def main():
+        sched, calls = AsyncRefreshScheduler(view_refresh=False), []
+        assert await sched.fill_all([("player_1", updater(calls), "1"), ("player_2", updater(calls, False), "2")])
+        await asyncio.sleep(0)
+        assert sorted(calls) == [("1",), ("2",)]
+        assert await sched.age("player_1") is not None and await sched.age("player_2") is None
+    asyncio.run(main())
+
+
+def test_cross_process_leader_runs_and_records():
+    conn, calls = LockConn(), []
+    sched = AsyncRefreshScheduler(flight=AsyncMySQLSingleFlight(lambda: conn))
+    assert asyncio.run(sched.fill("team_1", updater(calls), "1")) is True
+    assert calls == [("1",)] and conn.results["dqd:team_1"]["ok"] == 1 and conn.closed
+
+
+def test_cross_process_follower_waits_for_other_worker(monkeypatch):
+    import async_refresh
+    monkeypatch.setattr(async_refresh, "FOLLOW_POLL", 0.01)
+
+    class Busy(LockConn):
+        """别的 worker 占着锁，试三次以后放锁，放之前记下成没成"""
+
+        def __init__(self, ok):
+            super().__init__()
+            self.ok, self.tries = ok, 0
+
+        def fetchone(self):
+            sql, args = self.sql[-1]
+            if "GET_LOCK(%s, 0)" in sql:
+                self.tries += 1
+                if self.tries == 3: self.results[args[0]] = {"ok": self.ok, "finished_at": 1.0}
+                return {"ok": int(self.tries >= 3)}
+            return super().fetchone()
+
+    async def run(ok):
+        calls = []
+        sched = AsyncRefreshScheduler(flight=AsyncMySQLSingleFlight(lambda: Busy(ok)))
+        result = await sched.fill("team_1", updater(calls), "1")
+        return result, calls, await sched.age("team_1")
+
+    result, calls, age = asyncio.run(run(1))
+    assert result is True and calls == [] and age is not None  # 别人刷成功了：自己不爬，记一笔
+    result, calls, age = asyncio.run(run(0))
+    assert result is False and calls == [] and age is None  # 别人失败了：不当成刷新过
+
+
+def test_flight_falls_back_without_database():
+    def boom(): raise RuntimeError("连不上")
+    calls = []
+    sched = AsyncRefreshScheduler(flight=AsyncMySQLSingleFlight(boom))
+    assert asyncio.run(sched.fill("team_1", updater(calls), "1")) is True and calls == [("1",)]
@@ -0,0 +1,65 @@
+import bulk_writer
+from bulk_writer import BulkWriter, EntityBatch, statements
+
+
+def test_upserts_with_same_columns_are_merged():
+    a, b = EntityBatch(("player", "1")), EntityBatch(("player", "2"))
+    a.upsert("player_profiles", ("person_id", "name_cn"), [("1", "甲")])
+    b.upsert("player_profiles", ("person_id", "name_cn"), [("2", "乙")])
+    (sql, args), = list(statements([a, b]))
+    assert sql == ("INSERT INTO player_profiles (`person_id`,`name_cn`) VALUES (%s,%s),(%s,%s) "
+                   "ON DUPLICATE KEY UPDATE `person_id`=VALUES(`person_id`),`name_cn`=VALUES(`name_cn`)")
+    assert args == ["1", "甲", "2", "乙"]
+
+
+def test_replace_deletes_then_inserts_and_last_write_wins():
+    a, b = EntityBatch(("player", "1")), EntityBatch(("player", "1"))
+    a.replace("player_stats", ("person_id",), ("1",), ("person_id", "season"), [("1", "2023")])
+    b.replace("player_stats", ("person_id",), ("1",), ("person_id", "season"), [("1", "2024"), ("1", "2025")])
+    c = EntityBatch(("player", "2"))
+    c.replace("player_stats", ("person_id",), ("2",), ("person_id", "season"), [])  # 清空也要删
+    out = list(statements([a, b, c]))
+    assert out[0] == ("DELETE FROM player_stats WHERE `person_id` IN (%s,%s)", ["1", "2"])
+    assert out[1] == ("INSERT INTO player_stats (`person_id`,`season`) VALUES (%s,%s),(%s,%s)",
+                      ["1", "2024", "1", "2025"])
+    assert len(out) == 2
+
+
+def test_composite_key_delete_and_chunking(monkeypatch):
+    monkeypatch.setattr(bulk_writer, "CHUNK", 2)
+    batches = []
+    for i in range(3):
+        b = EntityBatch(("team", str(i)))
+        b.replace("players", ("team_id", "season"), (str(i), "2024"), ("team_id", "person_id"), [(str(i), f"p{i}")])
+        batches.append(b)
+    out = list(statements(batches))
+    deletes = [s for s in out if s[0].startswith("DELETE")]
+    assert deletes[0] == ("DELETE FROM players WHERE (`team_id`,`season`) IN ((%s,%s),(%s,%s))",
+                          ["0", "2024", "1", "2024"])
+    assert len(deletes) == 2 and len(out) == 4
+
+
+def test_empty_batch_is_ignored():
+    assert not EntityBatch(("team", "1"))
+    assert list(statements([EntityBatch(("team", "1"))])) == []
+
+
+def test_writer_commits_through_sqlite_and_reports_entities(sqlite_pool):
+    import db_pool
+    committed = []
+    w = BulkWriter(db_pool.get_conn, on_commit=committed.append)
+    for pid in ("1", "2"):
+        b = EntityBatch(("player", pid))
+        b.upsert("player_profiles", ("person_id", "name_cn"), [(pid, f"球员{pid}")])
+        w.submit(b)
+    bad = EntityBatch(("player", "3"))
+    bad.upsert("no_such_table", ("x",), [(1,)])
+    w.submit(bad)
+    w.close()
+    assert sorted(committed) == [("player", "1"), ("player", "2")]
+    assert [e for e, _ in w.errors] == [("player", "3")]
+    conn = db_pool.get_conn()
+    with conn.cursor() as c:
+        c.execute("SELECT person_id, name_cn FROM player_profiles ORDER BY person_id")
+        assert [(r["person_id"], r["name_cn"]) for r in c.fetchall()] == [("1", "球员1"), ("2", "球员2")]
+    conn.close()
@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+import db_pool
+import sqlite_db
+
+
+def make_pool(tmp_path, **kw):
+    return db_pool.ConnectionPool(connect=sqlite_db.connector(str(tmp_path / "pool.db")), **kw)
+
+
+def test_close_returns_connection_for_reuse(tmp_path):
+    pool = make_pool(tmp_path, size=2, max_overflow=0)
+    conn = pool.get()
+    raw = conn._raw
+    conn.close()
+    conn.close()  # 重复 close 不能还两次
+    assert pool.in_use == 0 and len(pool.idle) == 1
+    again = pool.get()
+    assert again._raw is raw
+    again.close()
+    assert pool.stats["created"] == 1
+
+
+def test_full_pool_times_out(tmp_path):
+    pool = make_pool(tmp_path, size=1, max_overflow=1, wait_timeout=0.2)
+    held = [pool.get(), pool.get()]
+    with pytest.raises(db_pool.PoolTimeout):
+        pool.get()
+    assert pool.stats["timeouts"] == 1
+    for c in held: c.close()
+    assert pool.in_use == 0
+
+
+def test_waiter_gets_connection_released_by_another_thread(tmp_path):
+    pool = make_pool(tmp_path, size=1, max_overflow=0, wait_timeout=2)
+    first = pool.get()
+    threading.Timer(0.1, first.close).start()
+    start = time.time()
+    second = pool.get()
+    assert time.time() - start < 1.5
+    second.close()
+    assert pool.stats["waits"] == 1
+
+
+def test_overflow_connections_are_closed_not_kept(tmp_path):
+    pool = make_pool(tmp_path, size=1, max_overflow=2)
+    conns = [pool.get() for _ in range(3)]
+    for c in conns: c.close()
+    assert len(pool.idle) == 1 and pool.in_use == 0
+
+
+def test_expired_and_broken_connections_are_replaced(tmp_path):
+    pool = make_pool(tmp_path, size=2, max_overflow=0, max_lifetime=0.05)
+    pool.get().close()
+    time.sleep(0.1)
+    pool.get().close()
+    assert pool.stats["recycled"] == 1
+
+    pool.max_lifetime = 3600
+    conn = pool.get()
+    raw = conn._raw
+    conn.close()
+    raw.raw.close()  # 模拟服务端断开，ping 失败
+    fresh = pool.get()
+    assert fresh._raw is not raw and pool.stats["broken"] == 1
+    fresh.close()
+
+
+def test_uncommitted_work_is_rolled_back_on_release(tmp_path):
+    pool = make_pool(tmp_path, size=1, max_overflow=0)
+    conn = pool.get()
+    with conn.cursor() as c:
+        c.execute("CREATE TABLE IF NOT EXISTS t (x INT)")
+    conn.commit()
+    with conn.cursor() as c:
+        c.execute("INSERT INTO t VALUES (%s)", (1,))
+    conn.close()
+    conn = pool.get()
+    with conn.cursor() as c:
+        c.execute("SELECT COUNT(*) AS n FROM t")
+        assert c.fetchone()["n"] == 0
+    conn.close()
+
+
+def test_failed_connect_frees_the_slot():
+    def boom(): raise OSError("拒绝连接")
+
+    pool = db_pool.ConnectionPool(connect=boom, size=1, max_overflow=0, wait_timeout=0.1)
+    for _ in range(2):
+        with pytest.raises(OSError):
+            pool.get()
+    assert pool.in_use == 0
@@ -0,0 +1,103 @@
+import json
+import time
+
+import pytest
+
+LEAGUE = 24646
+
+
+@pytest.fixture(scope="module")
+def api(crawled_keys):
+    import backend_api
+    for key in crawled_keys: backend_api.REFRESHER.store.set(key, time.time())
+    return backend_api
+
+
+@pytest.fixture(scope="module")
+def client(api): return api.app.test_client()
+
+
+def standing():
+    import fake_site
+    return json.loads(fake_site._read("standing.json"))["content"]["rounds"][0]["content"]["data"]
+
+
+def test_leagues(client):
+    import datastore
+    assert [l['id'] for l in client.get("/api/leagues").get_json()] == list(datastore.LEAGUE_NAMES)
+
+
+def test_teams_match_the_site(client):
+    teams = client.get(f"/api/teams/{LEAGUE}").get_json()
+    expected = {str(r['team_id']): r for r in standing()}
+    assert {t['id'] for t in teams} == set(expected)
+    for t in teams:
+        assert t['stats']['pts'] == expected[t['id']]['points']
+        assert t['stats']['rank'] == expected[t['id']]['rank']
+
+
+def test_squad_player_and_batch(client):
+    tid = str(standing()[0]['team_id'])
+    squad = client.get(f"/api/squad/{tid}").get_json()
+    assert sorted(p['id'] for p in squad) == [f"{tid}{i:02d}" for i in range(30)]  # 假站按球队 id 编的球员号
+
+    player = client.get(f"/api/player/{squad[0]['id']}").get_json()
+    assert player and player.get('history') is not None
+
+    ids = [p['id'] for p in squad[:5]]
+    batch = client.post("/api/players/batch", json={"person_ids": ids}).get_json()
+    assert [p['id'] for p in batch['players']] == ids and batch['missing'] == []
+
+
+def test_rankings_sorted(client):
+    goals = client.get(f"/api/rankings/{LEAGUE}/goals").get_json()
+    assert goals and [g['count'] for g in goals] == sorted((g['count'] for g in goals), reverse=True)
+
+
+def test_search(api, client):
+    api.SEARCH_INDEX.load(api.get_db_connection)
+    tid = str(standing()[0]['team_id'])
+    player = client.get(f"/api/squad/{tid}").get_json()[-1]
+    res = client.post("/api/players/search", json={"name": player['name'], "team_id": tid, "limit": 50}).get_json()
+    assert player['id'] in [i['id'] for i in res['items']]
+    assert all(i['team'] == res['items'][0]['team'] for i in res['items'])
+
+
+def test_local_commit_invalidates_cached_response(api, client):
+    tid = str(standing()[1]['team_id'])
+    client.get(f"/api/squad/{tid}")
+    assert api.RESPONSE_CACHE.get(f"squad:{tid}") is not None
+    api.datastore.committed("team", tid, LEAGUE)
+    assert api.RESPONSE_CACHE.get(f"squad:{tid}") is None
+
+
+def test_commit_from_other_process_invalidates_via_commit_log(api, client):
+    import datastore
+    tid = str(standing()[2]['team_id'])
+    squad = client.get(f"/api/squad/{tid}").get_json()
+    assert api.RESPONSE_CACHE.get(f"squad:{tid}") is not None
+    api.COMMIT_FEED.poll()  # 先把 watermark 定下来
+    # 别的进程 (比如批量爬虫) 提交了这支球队的一个球员
+    conn = api.get_db_connection()
+    with conn.cursor() as c:
+        c.execute("INSERT INTO commit_log (kind, entity_id, league_id, origin, created_at) VALUES (%s,%s,%s,%s,%s)",
+                  ("player", squad[0]['id'], LEAGUE, "another-worker", time.time()))
+    conn.commit()
+    conn.close()
+    assert datastore.ORIGIN != "another-worker"
+    api.COMMIT_FEED.poll()
+    assert api.RESPONSE_CACHE.get(f"squad:{tid}") is None
+
+
+def test_team_first_seen_without_league_gets_league_on_next_crawl(api, client):
+    # 先从接口单独爬到 (league_id 存成 0)，之后联赛爬取的时候页面没变也要把 league_id 补上
+    import football_spider
+    tid = str(standing()[3]['team_id'])
+    conn = api.get_db_connection()
+    with conn.cursor() as c:
+        c.execute("UPDATE teams SET league_id = 0 WHERE team_id = %s", (tid,))
+    conn.commit()
+    conn.close()
+    assert tid not in {t['id'] for t in client.get(f"/api/teams/{LEAGUE}").get_json()}
+    assert football_spider.update_team_data(tid, LEAGUE)
+    assert api.requery("SELECT league_id FROM teams WHERE team_id = %s", (tid,), one=True)['league_id'] == LEAGUE
@@ -0,0 +1,11 @@
+import threading
+
+
+def test_fetch_stats_count_is_thread_safe():
+    import football_spider  # 别在收集阶段 import：test_end_to_end 要先把 DQD_BASE_URL 指到假站
+    before = football_spider.stats()["retries"]
+    threads = [threading.Thread(target=lambda: [football_spider.count("retries") for _ in range(20000)])
+               for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert football_spider.stats()["retries"] - before == 8 * 20000
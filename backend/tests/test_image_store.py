@@ -0,0 +1,73 @@
+import io
+import json
+import os
+
+import pytest
+
+
+@pytest.fixture
+def images(crawled, tmp_path, monkeypatch):
+    """爬好的库 + 空的图片目录和 url 映射；图片从假站 /fastdfs/ 下"""
+    import db_pool
+    import image_store
+    monkeypatch.setattr(image_store, "KNOWN", {})
+    monkeypatch.setattr(image_store.IMAGE_RATE, "rate", 1e9)
+    monkeypatch.setattr(image_store.IMAGE_RATE, "burst", 1e9)
+    return image_store, image_store.ImageStore(db_pool.get_conn, str(tmp_path))
+
+
+def team_id():
+    import fake_site
+    return str(json.loads(fake_site._read("standing.json"))["content"]["rounds"][0]["content"]["data"][0]['team_id'])
+
+
+def test_team_commit_downloads_dedups_and_rewrites_urls(images):
+    image_store, store = images
+    tid = team_id()
+    urls = store.urls_for("team", tid)
+    assert urls and len(urls) == len(set(urls))
+    store.on_commit("team", tid)
+    assert store.drain(30)
+    assert store.stats["failed"] == 0 and store.stats["deduped"] > 0  # 国旗都是同一张图，只存一份
+    assert store.urls_for("team", tid) == []
+    for url in urls:
+        name = image_store.KNOWN[url]
+        assert image_store.local_url(url, "xs") == f"{image_store.IMAGE_BASE}/xs/{name}"
+        # 1x1 的图比哪个尺寸都小，各尺寸都回原图
+        assert store.file_for("xs", name) == store.file_for("orig", name) == store.path("orig", name)
+    assert image_store.local_url("http://elsewhere/a.png") == "http://elsewhere/a.png"
+
+
+def test_other_process_downloads_are_picked_up_by_load(images):
+    image_store, store = images
+    tid = team_id()
+    store.on_commit("team", tid)
+    assert store.drain(30)
+    known = dict(image_store.KNOWN)
+    image_store.KNOWN.clear()
+    reader = image_store.ImageStore(store.conn_factory, store.directory)
+    assert reader.load() >= len(known)
+    assert all(image_store.KNOWN[u] == n for u, n in known.items())
+
+
+def test_file_for_rejects_bad_names_and_sizes(tmp_path):
+    import image_store
+    store = image_store.ImageStore(lambda: None, str(tmp_path))
+    name = "a" * 40 + ".png"
+    store._write(store.path("orig", name), b"x")
+    assert store.file_for("s", name) == store.path("orig", name)
+    assert store.file_for("huge", name) is None
+    assert store.file_for("orig", "../../etc/passwd") is None
+    assert store.file_for("orig", "b" * 40 + ".png") is None
+
+
+def test_thumbnails_with_pillow(tmp_path):
+    image = pytest.importorskip("PIL.Image")
+    import image_store
+    store = image_store.ImageStore(lambda: None, str(tmp_path))
+    buf = io.BytesIO()
+    image.new("RGB", (200, 100), "red").save(buf, "PNG")
+    name = "c" * 40 + ".png"
+    store._thumbnails(buf.getvalue(), name)
+    made = {s for s in image_store.SIZES if os.path.exists(store.path(s, name))}
+    assert made == {"xs", "s", "m"}  # l 是 288，原图 200 已经够小
@@ -0,0 +1,66 @@
+import gzip
+import json
+import threading
+import time
+
+import db_pool
+from league_snapshot import SnapshotStore
+
+
+def slow_conn(calls):
+    def factory():
+        calls.append(1)
+        time.sleep(0.05)  # 拉长建快照的时间，让并发的冷请求都撞上
+        return db_pool.get_conn()
+    return factory
+
+
+def test_rebuild_writes_versioned_compressed_snapshot(sqlite_pool, tmp_path):
+    store = SnapshotStore(db_pool.get_conn, str(tmp_path))
+    snap = store.rebuild(24646)
+    assert snap.version == 1 and store.rebuild(24646).version == 2
+    doc = json.loads(gzip.decompress(store.get(24646).bodies["gzip"]))
+    assert doc['league']['id'] == 24646 and doc['version'] == 2
+    enc, body, etag = snap.negotiate("gzip, deflate")
+    assert enc == "gzip" and etag.endswith("-gzip")
+    # 别的进程 (新的 SnapshotStore) 从磁盘读到同一个版本
+    assert SnapshotStore(db_pool.get_conn, str(tmp_path)).get(24646).version == 2
+
+
+def test_concurrent_cold_requests_build_once(sqlite_pool, tmp_path):
+    calls, results = [], []
+    store = SnapshotStore(slow_conn(calls), str(tmp_path))
+    threads = [threading.Thread(target=lambda: results.append(store.get_or_build(24646))) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert calls == [1] and store.stats["builds"] == 1
+    assert len(results) == 8 and all(r is results[0] for r in results)
+
+
+def test_cold_request_gives_up_when_build_fails(tmp_path):
+    store = SnapshotStore(lambda: None, str(tmp_path))
+    start = time.time()
+    assert store.get_or_build(1, timeout=5) is None
+    assert time.time() - start < 1
+
+
+def test_schedule_wakes_worker_while_drain_waits(sqlite_pool, tmp_path):
+    store = SnapshotStore(db_pool.get_conn, str(tmp_path))
+    store.schedule(1)
+    store.drain(5)
+    # drain 在等的时候又排进来的联赛也得有人建，不能只叫醒 drain
+    waiter = threading.Thread(target=store.drain, args=(5,))
+    waiter.start()
+    for lid in (2, 3, 4): store.schedule(lid)
+    waiter.join()
+    store.drain(5)
+    assert sorted(store.snapshots) == [1, 2, 3, 4]
+
+
+def test_on_commit_schedules_league_and_team_league(sqlite_pool, tmp_path):
+    store = SnapshotStore(db_pool.get_conn, str(tmp_path))
+    store.on_commit("league", 7)
+    store.on_commit("team", "100", 8)
+    store.on_commit("player", "1")
+    store.drain(5)
+    assert sorted(store.snapshots) == [7, 8]
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+import metrics
+from metrics import Registry
+
+
+def test_counters_and_histograms_render_prometheus_text():
+    reg = Registry(buckets=(.1, 1))
+    reg.describe("hits_total", "命中")
+    reg.inc("hits_total", route="/a")
+    reg.inc("hits_total", 2, route="/a")
+    reg.inc("hits_total", route='x"y')
+    for v in (.05, .1, .5, 3): reg.observe("lat_seconds", v, stage="fetch")
+    assert reg.value("hits_total", route="/a") == 3 and reg.value("hits_total") == 0
+    lines = reg.render().splitlines()
+    assert lines[:4] == ['# HELP hits_total 命中', '# TYPE hits_total counter',
+                         'hits_total{route="/a"} 3', 'hits_total{route="x\\"y"} 1']
+    assert lines[4:] == [
+        '# TYPE lat_seconds histogram',
+        'lat_seconds_bucket{stage="fetch",le="0.1"} 2',  # le 是 <=，0.1 落在 0.1 桶里
+        'lat_seconds_bucket{stage="fetch",le="1"} 3',
+        'lat_seconds_bucket{stage="fetch",le="+Inf"} 4',
+        'lat_seconds_sum{stage="fetch"} 3.65',
+        'lat_seconds_count{stage="fetch"} 4',
+    ]
+
+
+def test_collectors_run_at_render_and_errors_are_contained():
+    reg = Registry()
+    calls = []
+
+    @reg.collector
+    def pool():
+        calls.append(1)
+        return [("pool_in_use", "gauge", "在用连接", [({}, 2), ({"pool": "b"}, 1.5)])]
+
+    @reg.collector
+    def broken(): raise RuntimeError("坏了")
+
+    assert calls == []
+    text = reg.render()
+    assert calls == [1]
+    assert "# HELP pool_in_use 在用连接\n# TYPE pool_in_use gauge\npool_in_use 2\npool_in_use{pool=\"b\"} 1.5\n" in text
+
+
+def test_span_times_stage_and_writes_trace(tmp_path, monkeypatch):
+    reg = Registry()
+    monkeypatch.setattr(metrics, "REGISTRY", reg)
+    path = tmp_path / "trace.jsonl"
+    metrics.enable_trace(str(path))
+    try:
+        token = metrics.TRACE_ID.set("req-1")
+        with metrics.span("parse", page="team"): pass
+        with pytest.raises(KeyError):
+            with metrics.span("fetch"): raise KeyError("x")
+        metrics.TRACE_ID.reset(token)
+    finally:
+        metrics.enable_trace(None)
+    assert sum(reg.histograms["dqd_stage_seconds"][(("stage", "parse"),)][:-1]) == 1
+    assert sum(reg.histograms["dqd_stage_seconds"][(("stage", "fetch"),)][:-1]) == 1
+    recs = [json.loads(l) for l in path.read_text(encoding="utf-8").splitlines()]
+    assert [(r["span"], r["trace"], r.get("page"), r.get("error")) for r in recs] == [
+        ("parse", "req-1", "team", None), ("fetch", "req-1", None, "KeyError")]
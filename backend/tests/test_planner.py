@@ -0,0 +1,98 @@
+import threading
+import time
+
+import db_pool
+import planner
+from planner import AccessLog, Planner
+from refresh import RefreshScheduler
+
+
+class Clock:
+    def __init__(self): self.now = 1_000_000.0
+
+    def __call__(self): return self.now
+
+
+def entry(key, hits=0, league_id=0):
+    kind, _, eid = key.partition("_")
+    return {'cache_key': key, 'kind': kind, 'entity_id': eid, 'league_id': league_id, 'hits': hits,
+            'last_access': 1_000_000.0 if hits else None, 'failures': 0, 'retry_at': 0, 'refreshed_at': None}
+
+
+def make(monkeypatch, keys, budget, requests_per_refresh=1, ok=True, gate=None):
+    """不连库：队列直接塞进 entries；每次刷新在自己线程里 '发' requests_per_refresh 个请求 (多出来的当成重试)"""
+    clock, sent, calls = Clock(), threading.local(), []
+
+    def update(*args):
+        if gate: gate.wait(5)
+        sent.n = getattr(sent, "n", 0) + requests_per_refresh
+        calls.append(args)
+        return ok
+
+    monkeypatch.setattr(planner, "UPDATERS", {k: (lambda e: (update, e['entity_id'])) for k in planner.UPDATERS})
+    p = Planner(RefreshScheduler(ttls={}), lambda: None, budget, clock, lambda: getattr(sent, "n", 0))
+    p.entries = {e['cache_key']: e for e in (entry(k) if isinstance(k, str) else k for k in keys)}
+    p.loaded_at = p.discovered_at = clock.now
+    return p, clock, calls
+
+
+def settle(p, started):
+    p.scheduler.wait_all(started, 5)
+    deadline = time.time() + 5
+    while p.reserved and time.time() < deadline: time.sleep(0.01)
+
+
+def test_budget_charges_requests_actually_sent(monkeypatch):
+    gate = threading.Event()
+    p, clock, calls = make(monkeypatch, [f"player_{i}" for i in range(30)], budget=6, requests_per_refresh=3, gate=gate)
+    started = p.tick()
+    assert len(started) == 6 and p.reserved == 6  # 按预估排满一分钟
+    assert p.tick() == []  # 没跑完的按预估占着
+    gate.set()
+    settle(p, started)
+    assert p.reserved == 0 and p.tokens == -12  # 实际带重试发了 18 个，欠 12 个
+    clock.now += 60
+    assert p.tick() == [] and p.tokens == -6  # 补一分钟的量还不够还
+    clock.now += 120
+    assert len(p.tick()) == 6
+
+
+def test_refresh_that_sends_nothing_gives_estimate_back(monkeypatch):
+    p, clock, calls = make(monkeypatch, [f"player_{i}" for i in range(10)], budget=4, requests_per_refresh=0)
+    p.scheduler.in_flight["player_9"] = None  # 在跑的不排
+    started = p.tick()
+    assert "player_9" not in started
+    settle(p, started)
+    assert p.reserved == 0 and p.tokens == 4
+
+
+def test_strict_priority_and_league_cost(monkeypatch):
+    hot, cold = entry("player_1", hits=50), entry("player_2")
+    league = entry("league_7", hits=100)
+    p, clock, calls = make(monkeypatch, [hot, cold, league], budget=3)
+    # 联赛最热排第一，花掉 3 个；后面的球员等下一轮
+    assert p.tick() == ["league_7"]
+    p, clock, calls = make(monkeypatch, [hot, cold, league], budget=2)
+    assert p.tick() == []  # 联赛预算不够也不让球员插队
+
+
+def test_failure_backs_off(monkeypatch):
+    p, clock, calls = make(monkeypatch, ["team_1"], budget=10, ok=False)
+    settle(p, p.tick())
+    e = p.entries["team_1"]
+    assert e['failures'] == 1 and e['retry_at'] > clock.now
+    assert p.tick() == []  # 退避中
+    clock.now = e['retry_at'] + 1
+    assert p.tick() == ["team_1"]
+
+
+def test_access_log_and_queue_round_trip(sqlite_pool):
+    log = AccessLog(db_pool.get_conn, interval=3600)
+    for _ in range(3): log.touch("team_9")
+    log.touch("not_a_planner_key")
+    assert log.flush() == 1
+    p = Planner(RefreshScheduler(), db_pool.get_conn)
+    assert p.discover() >= 5  # 五大联赛总会登记
+    assert p.load()
+    assert p.entries["team_9"]['hits'] == 3
+    assert {e['kind'] for e in p.entries.values()} >= {"league", "team"}
@@ -0,0 +1,110 @@
+import threading
+
+import player_search
+from player_search import SearchIndex
+
+
+def row(pid, name, ability, **kw):
+    r = {'person_id': pid, 'name': name, 'name_cn': name, 'name_en': None, 'team_id': "t1", 'league_id': 1,
+         'team_name': "队", 'team_logo': '', 'position': "前锋", 'avatar_url': '', 'age': "25岁",
+         'nationality': "巴西", 'ability_total': ability, 'foot': "右脚", 'number': "9"}
+    r.update(kw)
+    return r
+
+
+ROWS = [
+    row("1", "内马尔", 90, name_en="Neymar Jr"),
+    row("2", "马塞洛", 85, name_en="Marcelo", position="后卫", foot="左脚"),
+    row("3", "梅西", 95, name_en="Lionel Messi", nationality="阿根廷", league_id=2, team_id="t2"),
+    row("4", "马内", None, name_en="Sadio Mane", nationality="塞内加尔", age="31岁"),
+]
+
+
+def ids(result): return [i['id'] for i in result['items']]
+
+
+def make():
+    idx = SearchIndex()
+    idx.build(ROWS)
+    return idx
+
+
+def test_chinese_and_english_names():
+    idx = make()
+    assert ids(idx.search({'name': "马"})) == ["1", "2", "4"]  # 能力值降序，没有能力值的排最后
+    assert ids(idx.search({'name': "马塞"})) == ["2"]
+    assert ids(idx.search({'name': "messi"})) == ["3"]
+    assert ids(idx.search({'name': "ymar j"})) == ["1"]  # 长查询回表确认连续子串
+    assert ids(idx.search({'name': "mar"})) == ["1", "2"]
+    assert ids(idx.search({'name': "mrl"})) == []
+
+
+def test_name_match_does_not_span_fields():
+    idx = SearchIndex()
+    idx.build([row("1", "abc", 80, name_cn="xyz", name_en=None)])
+    assert ids(idx.search({'name': "cxy"})) == []
+
+
+def test_filters_and_facets():
+    idx = make()
+    assert ids(idx.search({'nationality': "阿根"})) == ["3"]
+    assert ids(idx.search({'foot': "左脚"})) == ["2"]
+    assert ids(idx.search({'league_id': 1, 'rating_min': 86})) == ["1"]
+    assert ids(idx.search({'age_min': 30})) == ["4"]
+    res = idx.search({'league_id': 1})
+    assert res['total'] == 3
+    assert res['facets']['position'] == {"前锋": 2, "后卫": 1}
+
+
+def test_keyset_paging_covers_everything_once():
+    idx = make()
+    seen, cursor = [], None
+    while True:
+        res = idx.search({}, cursor, limit=1)
+        seen += ids(res)
+        cursor = res['next_cursor']
+        if not cursor: break
+    assert seen == ["3", "1", "2", "4"]
+
+
+def test_rebuild_swaps_whole_state():
+    idx = make()
+    old = idx.state
+    idx.build(ROWS[:1])
+    assert idx.state is not old and old.rows is not idx.state.rows
+    assert len(old.rows) == 4 and ids(idx.search({})) == ["1"]
+
+
+def test_searches_during_rebuilds_see_a_consistent_index():
+    idx, errors, stop = make(), [], threading.Event()
+    big = ROWS * 50
+    small = ROWS[:2]
+
+    def search():
+        while not stop.is_set():
+            try:
+                res = idx.search({'name': "马"}, limit=500)
+                assert res['total'] == len(res['items'])
+                assert all(i['name'].find("马") >= 0 for i in res['items'])
+            except Exception as e:
+                errors.append(e)
+                return
+
+    t = threading.Thread(target=search)
+    t.start()
+    for i in range(30): idx.build(big if i % 2 else small)
+    stop.set()
+    t.join()
+    assert errors == []
+
+
+def test_due_after_dirty_interval_or_max_age(monkeypatch):
+    idx = make()
+    assert not idx.due()
+    idx.mark_dirty("player", "1", 1)
+    assert not idx.due()  # 刚建完，等 REBUILD_INTERVAL
+    monkeypatch.setattr(player_search, "REBUILD_INTERVAL", 0)
+    assert idx.due()
+    idx.dirty = False
+    monkeypatch.setattr(player_search, "MAX_AGE", 0)
+    assert idx.due()  # 没人标脏，太久没建也要重建
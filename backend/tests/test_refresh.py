@@ -0,0 +1,50 @@
+import time
+
+import state_store
+from refresh import RefreshScheduler, lazy
+
+
+def updater(calls):
+    return lambda *args: calls.append(args) or True
+
+
+def test_view_refresh_schedules_stale_and_missing_keys():
+    sched, calls = RefreshScheduler(), []
+    assert sched.check("team_1", updater(calls), "1") is None
+    sched.wait("team_1")
+    assert calls == [("1",)]
+    assert sched.check("team_1", updater(calls), "1") < 1  # 刚刷过，不再排
+    sched.store.set("team_1", time.time() - 3600)
+    sched.check("team_1", updater(calls), "1")
+    sched.wait("team_1")
+    assert len(calls) == 2
+
+
+def test_planner_mode_ignores_empty_store_until_row_is_missing():
+    # memory store 重启后是空的：不能因此把所有看到的 key 都当场爬，绕过 planner 的预算
+    sched, calls = RefreshScheduler(view_refresh=False), []
+    sched.check("player_1", updater(calls), "1")
+    sched.check_many([("player_2", updater(calls), "2")])
+    assert sched.in_flight == {} and calls == []
+    # 接口读库发现确实没有这行，才当场爬并等它
+    assert sched.fill("player_1", updater(calls), "1") is True
+    assert sched.fill_all([("player_2", updater(calls), "2"), ("player_3", updater(calls), "3")]) is True
+    time.sleep(0.05)
+    assert sorted(calls) == [("1",), ("2",), ("3",)]
+
+
+def test_planner_mode_check_never_loads_the_spider():
+    # 只读 worker (DQD_PLANNER=external) 库里有数据时一直不 import 爬虫，不管 store 里有没有时间戳
+    sched = RefreshScheduler(view_refresh=False)
+    update = lazy("no_such_spider_module", "update_team_data")
+    assert sched.check("team_1", update, "1") is None
+    assert sched.check_many([("player_1", update, "1")]) == {"player_1": None}
+    assert sched.in_flight == {}
+
+
+def test_default_store_kind_follows_planner(monkeypatch):
+    monkeypatch.delenv("DQD_REFRESH_STORE", raising=False)
+    assert state_store.default_kind() == "memory"
+    assert state_store.default_kind("external") == state_store.default_kind("embedded") == "mysql"
+    monkeypatch.setenv("DQD_REFRESH_STORE", "redis")
+    assert state_store.default_kind("off") == state_store.default_kind("external") == "redis"
@@ -0,0 +1,69 @@
+import time
+
+import response_cache
+from response_cache import ResponseCache
+
+
+def test_put_get_and_etag():
+    cache = ResponseCache()
+    body, etag = cache.put("k", b'{"a":1}', ["team_1"], cache.version)
+    hit = cache.get("k")
+    assert hit[0] == body and hit[1] == etag
+    assert cache.stats["hits"] == 1
+
+
+def test_invalidate_drops_only_tagged_entries():
+    cache = ResponseCache()
+    cache.put("squad:1", b"1", ["team_1", "player_9"], cache.version)
+    cache.put("squad:2", b"2", ["team_2"], cache.version)
+    cache.invalidate("player_9")
+    assert cache.get("squad:1") is None
+    assert cache.get("squad:2") is not None
+    assert cache.by_tag == {"team_2": {"squad:2"}}
+
+
+def test_fill_rejected_only_when_own_tag_changed_during_read():
+    cache = ResponseCache()
+    version = cache.version  # 路由读库前拿的
+    cache.invalidate("player_2")  # 读库期间别的球员被爬虫提交了
+    cache.put("player:1", b"1", ["player_1"], version)
+    assert cache.get("player:1") is not None
+
+    version = cache.version
+    cache.invalidate("player_1")  # 读的正是这个球员
+    cache.put("player:1", b"old", ["player_1"], version)
+    assert cache.get("player:1") is None
+
+
+def test_clear_rejects_every_fill_started_before_it():
+    cache = ResponseCache()
+    version = cache.version
+    cache.clear()
+    cache.put("k", b"x", ["team_1"], version)
+    assert cache.get("k") is None
+    cache.put("k", b"x", ["team_1"], cache.version)
+    assert cache.get("k") is not None
+
+
+def test_changed_map_is_bounded(monkeypatch):
+    monkeypatch.setattr(response_cache, "CHANGED_MAX", 10)
+    cache = ResponseCache()
+    version = cache.version
+    for i in range(20): cache.invalidate(f"player_{i}")
+    assert len(cache.changed) <= 10
+    cache.put("k", b"x", ["team_1"], version)  # 收成整体清空了，宁可不缓存
+    assert cache.get("k") is None
+
+
+def test_lru_and_ttl_limits():
+    cache = ResponseCache(maxsize=2, ttl=60)
+    for k in ("a", "b"): cache.put(k, b"x", [f"t_{k}"], cache.version)
+    cache.get("a")  # a 变成最近用过
+    cache.put("c", b"x", ["t_c"], cache.version)
+    assert cache.get("b") is None and cache.get("a") is not None
+    assert "t_b" not in cache.by_tag
+
+    cache = ResponseCache(ttl=0.05)
+    cache.put("k", b"x", ["t"], cache.version)
+    time.sleep(0.1)
+    assert cache.get("k") is None and cache.by_tag == {}
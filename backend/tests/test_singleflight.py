@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pytest
+
+from refresh import RefreshScheduler
+from singleflight import FOLLOWED, MySQLSingleFlight, SingleFlight
+
+
+class LockConn:
+    """假的 MySQL 连接，只认 GET_LOCK / RELEASE_LOCK 和 flight_results；held 为真时第一次 GET_LOCK(name, 0)
+    拿不到 (别的 worker 占着)，leader 给了就在等锁的时候替那个 worker 记下结果"""
+
+    def __init__(self, held=False, leader=None):
+        self.held = held
+        self.leader = leader
+        self.results = {}
+        self.sql = []
+        self.closed = False
+
+    def cursor(self): return self
+
+    def __enter__(self): return self
+
+    def __exit__(self, *exc): pass
+
+    def execute(self, sql, args=None):
+        self.sql.append((sql, args))
+        if "GET_LOCK(%s, %s)" in sql and self.leader is not None:
+            self.results[args[0]] = {"ok": int(self.leader), "finished_at": time.time()}
+        if sql.startswith("INSERT INTO flight_results"):
+            self.results[args[0]] = {"ok": args[1], "finished_at": args[2]}
+
+    def fetchone(self):
+        sql, args = self.sql[-1]
+        if "flight_results" in sql: return self.results.get(args[0])
+        if "GET_LOCK(%s, 0)" in sql and self.held: return {"ok": 0}
+        return {"ok": 1}
+
+    def commit(self): pass
+
+    def close(self): self.closed = True
+
+
+def test_single_flight_runs_once_for_concurrent_callers():
+    flight, calls, gate = SingleFlight(), [], threading.Event()
+
+    def work():
+        calls.append(1)
+        gate.wait(2)
+        return "done"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", work))) for _ in range(8)]
+    for t in threads: t.start()
+    time.sleep(0.1)
+    gate.set()
+    for t in threads: t.join()
+    assert calls == [1]
+    assert results == ["done"] * 8
+    assert flight.calls == {}
+
+
+def test_single_flight_propagates_errors_and_forgets_key():
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do("k", lambda: (_ for _ in ()).throw(ValueError("boom")))
+    assert flight.do("k", lambda: 2) == 2
+
+
+def test_mysql_single_flight_leader_runs_records_and_releases():
+    conn = LockConn()
+    assert MySQLSingleFlight(lambda: conn).do("team_1", lambda: "ran") == "ran"
+    assert conn.results["dqd:team_1"]["ok"] == 1
+    assert any("RELEASE_LOCK" in sql for sql, _ in conn.sql)
+    assert conn.closed
+    MySQLSingleFlight(lambda: conn).do("team_1", lambda: False)
+    assert conn.results["dqd:team_1"]["ok"] == 0
+
+
+def test_mysql_single_flight_follower_does_not_run():
+    conn, calls = LockConn(held=True, leader=True), []
+    assert MySQLSingleFlight(lambda: conn).do("team_1", lambda: calls.append(1)) is FOLLOWED
+    assert calls == []
+
+
+def test_mysql_single_flight_follower_sees_failed_or_unrecorded_leader():
+    assert MySQLSingleFlight(lambda: LockConn(held=True, leader=False)).do("team_1", lambda: True) is False
+    assert MySQLSingleFlight(lambda: LockConn(held=True)).do("team_1", lambda: True) is False
+
+
+def test_mysql_single_flight_falls_back_when_factory_raises():
+    def boom(): raise RuntimeError("连接池已满")
+
+    assert MySQLSingleFlight(boom).do("team_1", lambda: "ran") == "ran"
+
+
+def test_follower_records_refresh_time_in_local_store():
+    # 别的 worker 刚爬完：自己不爬，但 store 不共享时也要记下来，不然下次访问又当成没爬过
+    calls = []
+    sched = RefreshScheduler(flight=MySQLSingleFlight(lambda: LockConn(held=True, leader=True)))
+    assert sched._run("team_1", None, lambda: calls.append(1) or True) is True
+    assert calls == []
+    assert sched.age("team_1") is not None and not sched.is_stale("team_1")
+
+
+def test_follower_of_failed_refresh_leaves_key_stale():
+    # 别的 worker 爬失败了：不能当成刷新过，不然一整个 TTL 都不会再试
+    sched = RefreshScheduler(flight=MySQLSingleFlight(lambda: LockConn(held=True, leader=False)))
+    assert sched._run("team_1", None, lambda: True) is False
+    assert sched.age("team_1") is None
@@ -0,0 +1,43 @@
+import sqlite_db
+from sqlite_db import translate
+
+
+def test_placeholders_and_insert_ignore():
+    assert translate("INSERT IGNORE INTO leagues (id, name) VALUES (%s,%s)") == [
+        "INSERT OR IGNORE INTO leagues (id, name) VALUES (?,?)"]
+
+
+def test_on_duplicate_key_update():
+    sql = "INSERT INTO t (`a`,`b`) VALUES (%s,%s) ON DUPLICATE KEY UPDATE `a`=VALUES(`a`),b = VALUES(b)"
+    assert translate(sql) == [
+        "INSERT INTO t (`a`,`b`) VALUES (?,?) ON CONFLICT DO UPDATE SET `a`=excluded.`a`,b = excluded.b"]
+
+
+def test_row_value_in_list():
+    assert translate("DELETE FROM t WHERE (`a`,`b`) IN ((%s,%s),(%s,%s))") == [
+        "DELETE FROM t WHERE (`a`,`b`) IN (VALUES (?,?),(?,?))"]
+
+
+def test_create_table_keys_and_auto_increment():
+    out = translate("""CREATE TABLE IF NOT EXISTS log (
+        id INT AUTO_INCREMENT PRIMARY KEY, k VARCHAR(8), at DOUBLE,
+        updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP, KEY idx_at (at, k))""")
+    assert "INTEGER PRIMARY KEY AUTOINCREMENT" in out[0]
+    assert "KEY idx_at" not in out[0] and "ON UPDATE" not in out[0]
+    assert out[1:] == ["CREATE INDEX IF NOT EXISTS log_idx_at ON log (at, k)"]
+
+
+def test_whole_schema_runs_and_upsert_works(tmp_path):
+    import datastore
+    conn = sqlite_db.Connection(str(tmp_path / "s.db"))
+    with conn.cursor() as c:
+        for sql in datastore.SCHEMA: c.execute(sql)
+        sql = "INSERT INTO refresh_state (cache_key, refreshed_at) VALUES (%s,%s) " \
+              "ON DUPLICATE KEY UPDATE refreshed_at = VALUES(refreshed_at)"
+        c.execute(sql, ("team_1", 1.0))
+        c.execute(sql, ("team_1", 2.0))
+        c.execute("SELECT cache_key, refreshed_at FROM refresh_state")
+        assert c.fetchall() == [{"cache_key": "team_1", "refreshed_at": 2.0}]
+        c.execute("SELECT GET_LOCK(%s, 0) AS ok", ("x",))
+        assert c.fetchone() == {"ok": 1}
+    conn.close()
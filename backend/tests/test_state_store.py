@@ -0,0 +1,71 @@
+import socket
+
+import pytest
+
+import state_store
+from state_store import MySQLStore, RedisClient, RedisError, RedisStore
+
+
+def test_redis_client_round_trip(fake_redis):
+    client = RedisClient(port=fake_redis.port)
+    assert client.execute("PING") == "PONG"
+    assert client.execute("GET", "missing") is None
+    assert client.execute("SET", "k", "中文 value") == "OK"
+    assert client.execute("GET", "k") == "中文 value"
+    assert client.execute("MGET", "k", "missing") == ["中文 value", None]
+    assert client.execute("DEL", "k", "missing") == 1
+    with pytest.raises(RedisError):
+        client.execute("NOPE")
+    assert client.execute("PING") == "PONG"  # 出错后重连还能用
+
+
+def test_redis_client_select_db(fake_redis):
+    client = RedisClient(port=fake_redis.port, db=3)
+    assert client.execute("SET", "k", "v") == "OK"
+
+
+def test_redis_store(fake_redis):
+    store = RedisStore(RedisClient(port=fake_redis.port))
+    assert store.get("team_1") is None
+    store.set("team_1", 123.5)
+    store.set("team_2", 1.0)
+    assert store.get("team_1") == 123.5
+    assert store.get_many(["team_1", "team_2", "team_3"]) == {"team_1": 123.5, "team_2": 1.0}
+    assert fake_redis.data["dqd:refresh:team_1"] == "123.5"
+
+
+def test_redis_store_degrades_when_server_is_down():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]  # 没人监听的端口
+    store = RedisStore(RedisClient(port=port, timeout=0.2))
+    assert store.get("team_1") is None
+    assert store.get_many(["team_1"]) == {}
+    store.set("team_1", 1.0)
+
+
+def test_mysql_store_on_sqlite(sqlite_pool):
+    import db_pool
+    store = MySQLStore(db_pool.get_conn)
+    assert store.get("team_1") is None
+    store.set("team_1", 5.0)
+    store.set("team_1", 6.0)
+    store.set("player_2", 7.0)
+    assert store.get("team_1") == 6.0
+    assert store.get_many(["team_1", "player_2", "x"]) == {"team_1": 6.0, "player_2": 7.0}
+    assert sqlite_pool.in_use == 0
+
+
+def test_mysql_store_survives_raising_factory():
+    def boom(): raise RuntimeError("连接池已满")
+
+    store = MySQLStore(boom)
+    assert store.get("team_1") is None
+    assert store.get_many(["team_1"]) == {}
+    store.set("team_1", 1.0)
+
+
+def test_make_store():
+    assert isinstance(state_store.make_store("memory"), state_store.MemoryStore)
+    assert isinstance(state_store.make_store("mysql", lambda: None), MySQLStore)
+    assert isinstance(state_store.make_store("redis", redis_config={"port": 1}), RedisStore)